@@ -0,0 +1,49 @@
+"""
+Archive cold history
+Usage: python archive_history.py [--hot-months 7]
+
+Moves analyses and mood logs older than the hot window into compressed
+columnar files under ARCHIVE_DIR and creates upcoming monthly partitions
+on PostgreSQL. Run it monthly (e.g. from cron).
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path to import models
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.connection import SessionLocal, engine, init_db
+
+
+def main():
+    from utils import archive
+    from utils.partitions import ensure_partitions
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hot-months", type=int, default=archive.HOT_WINDOW_MONTHS)
+    args = parser.parse_args()
+    archive.HOT_WINDOW_MONTHS = args.hot_months
+
+    init_db()
+    created = ensure_partitions(engine)
+    if created:
+        print(f"🗓️ Checked {created} upcoming partitions")
+
+    print(f"📦 Archiving rows older than {archive.hot_window_start():%Y-%m} into {archive.ARCHIVE_DIR}")
+    db = SessionLocal()
+    try:
+        totals = archive.run_archival(db)
+        for table_name, rows in totals.items():
+            print(f"✅ {table_name}: {rows} rows archived")
+    except Exception as e:
+        print(f"❌ Archival error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
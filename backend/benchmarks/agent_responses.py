@@ -0,0 +1,94 @@
+"""
+Benchmark: agent response generation
+Usage: python benchmarks/agent_responses.py [--calls 200000] [--batch 10000]
+
+Compares the previous generate_agent_response, which rebuilt the nested
+responses dict (and formatted every analytical string) on each call, with
+the compiled templates in utils/agent_templates, per call and in batch.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+EMOTIONS = ["joy", "sadness", "anger", "fear", "trust", "disgust", "surprise", "anticipation"]
+MODES = ["counselor", "analytical", "brutally_honest"]
+
+
+def legacy_agent_response(scores, mode: str, dominant: str) -> str:
+    """Previous implementation: rebuilds every mode's responses on each call"""
+    responses = {
+        "counselor": {
+            "anger": "I notice you're experiencing some anger. It's completely valid to feel this way. Would you like to try a brief breathing exercise?",
+            "sadness": "It sounds like you're going through a difficult time. Remember, it's okay to feel sad. Your emotions are valid.",
+            "fear": "I sense some anxiety in your words. Let's take a moment to ground ourselves. You're safe right now.",
+            "joy": "I'm glad to see you're experiencing some positive emotions. That's wonderful!",
+        },
+        "analytical": {
+            "anger": f"Anger detected at {scores.anger:.1%}. Consider identifying specific triggers to address the root cause.",
+            "sadness": f"Sadness level: {scores.sadness:.1%}. Pattern analysis suggests reviewing recent life changes.",
+            "fear": f"Fear response: {scores.fear:.1%}. Recommend cognitive reframing techniques.",
+            "joy": f"Positive affect: {scores.joy:.1%}. Maintain activities that generate this emotional state.",
+        },
+        "brutally_honest": {
+            "anger": "You're angry. That's clear. Now, what are you going to do about it?",
+            "sadness": "Feeling down won't solve anything. Time to identify what's actually wrong and take action.",
+            "fear": "Fear is just your brain's alarm system. Is the threat real or imagined?",
+            "joy": "Good. Keep doing whatever led to this feeling.",
+        }
+    }
+    
+    default_response = "Analysis complete. Review your emotion scores for insights."
+    return responses.get(mode, {}).get(dominant, default_response)
+
+
+
+def make_inputs(n: int):
+    from routes.analyze import EmotionScores
+
+    rng = random.Random(0)
+    inputs = []
+    for _ in range(n):
+        scores = EmotionScores(**{e: rng.random() for e in EMOTIONS})
+        dominant = max(dict(scores).items(), key=lambda x: x[1])[0]
+        inputs.append((scores, rng.choice(MODES), dominant))
+    return inputs
+
+
+def per_call_ns(fn, inputs) -> float:
+    started = time.perf_counter_ns()
+    for scores, mode, dominant in inputs:
+        fn(scores, mode, dominant)
+    return (time.perf_counter_ns() - started) / len(inputs)
+
+
+def main():
+    from routes.analyze import generate_agent_response
+    from utils.agent_templates import render_batch
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+
+    inputs = make_inputs(args.calls)
+    legacy = per_call_ns(legacy_agent_response, inputs)
+    compiled = per_call_ns(generate_agent_response, inputs)
+
+    batch = [(mode, dominant, dict(scores)) for scores, mode, dominant in inputs[:args.batch]]
+    started = time.perf_counter_ns()
+    render_batch(batch)
+    batched = (time.perf_counter_ns() - started) / len(batch)
+
+    print(f"Legacy (dict rebuilt per call):  {legacy / 1000:.2f} µs/call")
+    print(f"Compiled templates:              {compiled / 1000:.2f} µs/call ({legacy / compiled:.1f}x)")
+    print(f"render_batch ({args.batch} items):      {batched / 1000:.2f} µs/item")
+
+
+if __name__ == "__main__":
+    main()
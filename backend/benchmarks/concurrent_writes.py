@@ -0,0 +1,163 @@
+"""
+Concurrent-write benchmark
+Usage: python benchmarks/concurrent_writes.py [--workers 4] [--threads 4] [--writes 200] [--readers 2]
+
+Simulates several uvicorn workers saving analyses and mood check-ins into
+one SQLite file at once, comparing a stock engine (rollback journal, no
+busy timeout) with create_db_engine (WAL, busy timeout, PRAGMAs). Each
+worker process runs writer threads (one commit per row, as the routes
+do) and reader threads paging history. Reports committed writes per
+second, "database is locked" failures and commit latency percentiles.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCORES = {"joy": 0.6, "sadness": 0.1, "anger": 0.05, "fear": 0.05, "trust": 0.1,
+          "disgust": 0.05, "surprise": 0.03, "anticipation": 0.02}
+
+
+def make_engine(mode: str, url: str):
+    from sqlalchemy import create_engine
+    from models.connection import create_db_engine
+
+    if mode == "stock":
+        return create_engine(url, connect_args={"check_same_thread": False})
+    return create_db_engine(url)
+
+
+def _worker(mode: str, url: str, user_id: int, threads: int, writes: int, readers: int, results):
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import sessionmaker
+    from models.database import Analysis, MoodLog, SourceType
+
+    engine = make_engine(mode, url)
+    Session = sessionmaker(bind=engine)
+    latencies, errors, reads = [], [0], [0]
+    lock = threading.Lock()
+    writers_done = threading.Event()
+
+    def write(index):
+        db = Session()
+        try:
+            for i in range(writes):
+                row = (
+                    Analysis(user_id=user_id, encrypted_text=f"entry {index}-{i}", emotion_scores=SCORES,
+                             dominant_emotion="joy", source_type=SourceType.TEXT, agent_mode="analytical")
+                    if i % 2 == 0 else MoodLog(user_id=user_id, mood_rating=i % 5 + 1, trigger_tag="work")
+                )
+                started = time.perf_counter()
+                try:
+                    db.add(row)
+                    db.commit()
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+                except OperationalError:
+                    db.rollback()
+                    with lock:
+                        errors[0] += 1
+        finally:
+            db.close()
+
+    def read():
+        db = Session()
+        try:
+            while not writers_done.is_set():
+                try:
+                    db.query(Analysis).filter(Analysis.user_id == user_id).order_by(
+                        Analysis.timestamp.desc()
+                    ).limit(20).all()
+                    db.rollback()
+                    with lock:
+                        reads[0] += 1
+                except OperationalError:
+                    db.rollback()
+        finally:
+            db.close()
+
+    writers = [threading.Thread(target=write, args=(t,)) for t in range(threads)]
+    # Readers only add contention; they stop when this process's writers finish
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    for thread in writers + reader_threads:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    writers_done.set()
+    for thread in reader_threads:
+        thread.join()
+    results.put({"latencies": latencies, "errors": errors[0], "reads": reads[0]})
+    engine.dispose()
+
+
+def run(mode: str, args) -> dict:
+    from sqlalchemy.orm import sessionmaker
+    from models.database import Base, User
+
+    directory = tempfile.mkdtemp(prefix="writes-")
+    url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    engine = make_engine(mode, url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(firebase_uid="bench", email="bench@example.com")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    engine.dispose()
+
+    results = mp.Queue()
+    started = time.perf_counter()
+    processes = [
+        mp.Process(target=_worker, args=(mode, url, user_id, args.threads, args.writes, args.readers, results))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(l for c in collected for l in c["latencies"])
+    pct = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else 0.0
+    return {
+        "mode": mode,
+        "committed": len(latencies),
+        "locked_errors": sum(c["errors"] for c in collected),
+        "reads": sum(c["reads"] for c in collected),
+        "writes_per_s": len(latencies) / elapsed,
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4, help="Processes (uvicorn workers)")
+    parser.add_argument("--threads", type=int, default=4, help="Writer threads per process")
+    parser.add_argument("--writes", type=int, default=200, help="Commits per writer thread")
+    parser.add_argument("--readers", type=int, default=2, help="History reader threads per process")
+    args = parser.parse_args()
+
+    total = args.workers * args.threads * args.writes
+    print(f"✍️ {args.workers} workers × {args.threads} writers × {args.writes} commits ({total} rows), "
+          f"{args.readers} readers per worker")
+    for mode in ("stock", "tuned"):
+        r = run(mode, args)
+        print(
+            f"{r['mode']:>6}: {r['committed']}/{total} committed, {r['locked_errors']} locked errors, "
+            f"{r['writes_per_s']:.0f} writes/s, commit p50={r['p50_ms']:.2f} ms p99={r['p99_ms']:.2f} ms, "
+            f"{r['reads']} history reads"
+        )
+
+
+if __name__ == "__main__":
+    main()
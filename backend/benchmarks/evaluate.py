@@ -0,0 +1,157 @@
+"""
+Offline classifier evaluation
+Usage: python benchmarks/evaluate.py --dataset labeled.csv [--backend MODEL[:int8]]... [--batch-size 32] [--output results.json]
+
+Runs a labeled dataset (CSV or NDJSON with `text` and `label`, labels
+being Plutchik emotions or the source model's labels) through each
+backend, scoring predictions after normalize_emotion_scores exactly as
+the API does. Reports accuracy and macro-F1 with per-emotion F1 alongside
+throughput, p50/p99 latency and peak memory, and marks the backends on
+the quality/speed/memory Pareto front.
+
+A backend is a Hugging Face model name or local path; the `:int8` suffix
+applies PyTorch dynamic int8 quantization to its Linear layers, and
+`lexicon` is the keyword fallback classifier from utils/lexicon.py. Each
+backend runs in its own process so peak memory is measured in isolation.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def load_backend(spec: str):
+    """Build a classifier for a backend spec"""
+    if spec == "lexicon":
+        from utils.lexicon import score_text
+        # Pipeline-shaped output, already over the eight Plutchik labels
+        return lambda texts, **kwargs: [
+            [{"label": emotion, "score": score} for emotion, score in score_text(text).items()] for text in texts
+        ]
+
+    from transformers import pipeline
+
+    model_name, _, variant = spec.partition(":")
+    classifier = pipeline("text-classification", model=model_name, top_k=None)
+    if variant == "int8":
+        import torch
+        classifier.model = torch.ao.quantization.quantize_dynamic(classifier.model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif variant:
+        raise ValueError(f"Unknown backend variant: {variant}")
+    return classifier
+
+
+def _evaluate_worker(spec: str, examples, batch_size: int, results):
+    """Child process: load one backend, classify the dataset, report metrics"""
+    try:
+        from routes.analyze import normalize_emotion_scores, get_dominant_emotion
+        from utils.evaluation import classification_report, percentile
+        from utils.sentences import classify_batch
+
+        texts = [text for text, _ in examples]
+        gold = [label for _, label in examples]
+
+        started = time.perf_counter()
+        classifier = load_backend(spec)
+        load_s = time.perf_counter() - started
+        if spec == "lexicon":
+            from routes.analyze import EmotionScores
+            normalize = lambda raw: EmotionScores(**{r["label"]: r["score"] for r in raw})
+        else:
+            normalize = normalize_emotion_scores
+        classify_batch(classifier, texts[:batch_size], batch_size=batch_size)  # warm-up
+
+        predicted, batch_ms, per_text_ms = [], [], []
+        started = time.perf_counter()
+        for offset in range(0, len(texts), batch_size):
+            batch = texts[offset:offset + batch_size]
+            t0 = time.perf_counter()
+            outputs = classify_batch(classifier, batch, batch_size=batch_size)
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            batch_ms.append(elapsed_ms)
+            per_text_ms.extend([elapsed_ms / len(batch)] * len(batch))
+            predicted.extend(get_dominant_emotion(normalize(raw))[0] for raw in outputs)
+        wall = time.perf_counter() - started
+
+        report = classification_report(gold, predicted)
+        results.put({
+            "backend": spec,
+            **report,
+            "throughput": round(len(texts) / wall, 2),
+            "p50_batch_ms": round(percentile(batch_ms, 50), 2),
+            "p99_batch_ms": round(percentile(batch_ms, 99), 2),
+            "p50_text_ms": round(percentile(per_text_ms, 50), 3),
+            "p99_text_ms": round(percentile(per_text_ms, 99), 3),
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            "peak_memory_mb": round(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1
+            ),
+            "load_seconds": round(load_s, 2)
+        })
+    except Exception as e:
+        results.put({"backend": spec, "error": str(e)})
+
+
+def evaluate_backend(spec: str, examples, batch_size: int) -> dict:
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_evaluate_worker, args=(spec, examples, batch_size, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    from utils.evaluation import load_labeled_dataset, pareto_front, EMOTIONS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dataset", required=True, help="CSV or NDJSON with text and label fields")
+    parser.add_argument("--backend", action="append", help="Model name/path, optionally with :int8 (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=None, help="Evaluate only the first N examples")
+    parser.add_argument("--output", default=None, help="Write full results as JSON")
+    args = parser.parse_args()
+
+    backends = args.backend or [os.getenv("HF_MODEL_NAME", "bhadresh-savani/distilbert-base-uncased-emotion")]
+    examples = load_labeled_dataset(args.dataset)[:args.limit]
+    print(f"🧪 Evaluating {len(backends)} backend(s) on {len(examples)} examples (batch size {args.batch_size})")
+
+    results = []
+    for spec in backends:
+        result = evaluate_backend(spec, examples, args.batch_size)
+        if "error" in result:
+            print(f"❌ {spec}: {result['error']}")
+            continue
+        results.append(result)
+        per_emotion = "  ".join(
+            f"{e[:4]}={result['per_emotion'][e]['f1']:.2f}" for e in EMOTIONS if result["per_emotion"][e]["support"]
+        )
+        print(
+            f"{spec}\n"
+            f"  accuracy={result['accuracy']:.3f}  macro_f1={result['macro_f1']:.3f}  [{per_emotion}]\n"
+            f"  {result['throughput']:.1f} texts/s  p50={result['p50_batch_ms']:.1f} ms  "
+            f"p99={result['p99_batch_ms']:.1f} ms per batch  peak={result['peak_memory_mb']:.0f} MB"
+        )
+
+    front = {r["backend"] for r in pareto_front(results)}
+    for result in results:
+        result["pareto"] = result["backend"] in front
+    if results:
+        print(f"✅ Pareto front (macro-F1 / throughput / memory): {', '.join(sorted(front))}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: history read latency with thought encryption enabled vs plaintext
+Usage: python benchmarks/history_encryption.py [--rows 2000] [--limit 50] [--max-overhead-ms 1.5]
+
+Seeds a throwaway SQLite database with one plaintext user and one encrypted
+user, then times GET /api/history pages for each, alternating users and
+clearing the result cache before every request so each page is read and
+decrypted. Exits non-zero if the median per-page overhead of encryption
+exceeds the budget.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ.setdefault("ENCRYPTION_KEY", "benchmark-key-not-for-production")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--max-overhead-ms", type=float, default=1.5)
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    from main import app
+    from models.connection import SessionLocal, init_db
+    from models.database import User, Analysis, SourceType
+    from utils.auth import get_current_user
+    from utils.encryption import get_encryption_manager
+    from utils.versioning import result_cache
+
+    init_db()
+    db = SessionLocal()
+    plain_user = User(firebase_uid="bench-plain", email="plain@example.com")
+    secret_user = User(firebase_uid="bench-secret", email="secret@example.com")
+    db.add_all([plain_user, secret_user])
+    db.commit()
+
+    manager = get_encryption_manager()
+    scores = {"joy": 0.6, "sadness": 0.1, "anger": 0.05, "fear": 0.05,
+              "trust": 0.1, "disgust": 0.05, "surprise": 0.03, "anticipation": 0.02}
+    now = datetime.utcnow()
+    for user, encrypted in ((plain_user, False), (secret_user, True)):
+        for i in range(args.rows):
+            text = f"Journal entry {i}: a long day at work but a calm evening walk helped a lot."
+            db.add(Analysis(
+                user_id=user.id,
+                encrypted_text=manager.encrypt_for_user(user.firebase_uid, text) if encrypted else text,
+                emotion_scores=scores,
+                dominant_emotion="joy",
+                source_type=SourceType.TEXT,
+                agent_mode="analytical",
+                timestamp=now - timedelta(minutes=i)
+            ))
+    db.commit()
+
+    client = TestClient(app)
+
+    def time_page(user, page: int) -> float:
+        app.dependency_overrides[get_current_user] = lambda: user
+        # A cached page body would skip the database read and decryption being measured
+        result_cache.clear()
+        start = time.perf_counter()
+        response = client.get("/api/history", params={"page": page, "limit": args.limit})
+        elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code == 200
+        return elapsed
+
+    for user in (plain_user, secret_user):
+        time_page(user, 1)  # warm connections and the key cache
+
+    # Alternate users so drift (warm-up, CPU frequency, other load) hits both series alike
+    plain, secret = [], []
+    for i in range(args.repeat):
+        plain.append(time_page(plain_user, i % 10 + 1))
+        secret.append(time_page(secret_user, i % 10 + 1))
+    app.dependency_overrides.clear()
+    db.close()
+
+    plain_p50, secret_p50 = statistics.median(plain), statistics.median(secret)
+    overhead = secret_p50 - plain_p50
+    print(f"📊 History page ({args.limit} rows) p50 plaintext: {plain_p50:.2f} ms")
+    print(f"📊 History page ({args.limit} rows) p50 encrypted: {secret_p50:.2f} ms")
+    print(f"Overhead: {overhead:.2f} ms (budget {args.max_overhead_ms:.2f} ms)")
+
+    if overhead > args.max_overhead_ms:
+        print("❌ Encryption overhead exceeds budget")
+        sys.exit(1)
+    print("✅ Encryption overhead within budget")
+
+
+if __name__ == "__main__":
+    main()
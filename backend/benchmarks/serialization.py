@@ -0,0 +1,78 @@
+"""
+Benchmark: JSON serialization of a 1000-item history page
+Usage: python benchmarks/serialization.py [--items 1000] [--repeat 50]
+
+Compares FastAPI's default path (jsonable_encoder + JSONResponse) with
+FastJSONResponse, which renders the route's dicts directly with orjson.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def build_page(items: int) -> dict:
+    from models.database import SourceType
+
+    now = datetime.utcnow()
+    scores = {"joy": 0.61, "sadness": 0.08, "anger": 0.04, "fear": 0.05,
+              "trust": 0.12, "disgust": 0.04, "surprise": 0.03, "anticipation": 0.21}
+    return {
+        "items": [
+            {
+                "id": i,
+                "timestamp": now - timedelta(minutes=i),
+                "emotion_scores": scores,
+                "dominant_emotion": "joy",
+                "source_type": SourceType.TEXT,
+                "source_url": None,
+                "text": "Had a long day but the evening walk by the river helped me reset.",
+                "agent_response": "Positive affect: 61.0%. Maintain activities that generate this emotional state.",
+                "agent_mode": "analytical"
+            } for i in range(items)
+        ],
+        "total": items,
+        "page": 1,
+        "limit": items,
+        "pages": 1
+    }
+
+
+def time_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from utils.responses import FastJSONResponse, orjson
+
+    page = build_page(args.items)
+
+    default_ms = time_ms(lambda: JSONResponse(jsonable_encoder(page)), args.repeat)
+    fast_ms = time_ms(lambda: FastJSONResponse(page), args.repeat)
+
+    print(f"📊 History page with {args.items} items (median of {args.repeat})")
+    print(f"jsonable_encoder + JSONResponse: {default_ms:.2f} ms")
+    print(f"FastJSONResponse ({'orjson' if orjson else 'stdlib fallback'}): {fast_ms:.2f} ms")
+    print(f"Speedup: {default_ms / fast_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
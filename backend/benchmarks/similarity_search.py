@@ -0,0 +1,67 @@
+"""
+Similarity search benchmark
+Usage: python benchmarks/similarity_search.py [--vectors 100000] [--dim 768] [--queries 200]
+
+Measures top-k query latency over one user's in-memory embedding index,
+plus the int8 storage size versus float32, using random unit vectors
+(latency depends only on the vector count and dimension).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.embeddings import UserVectors, normalize_rows, quantize, dequantize  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = normalize_rows(rng.standard_normal((args.vectors, args.dim), dtype=np.float32))
+
+    started = time.perf_counter()
+    stored = [quantize(vector) for vector in matrix]
+    quantize_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    codes = np.frombuffer(b"".join(data for data, _ in stored), dtype=np.int8).reshape(args.vectors, -1)
+    scales = np.array([scale for _, scale in stored], dtype=np.float32)
+    vectors = UserVectors(dim=args.dim, capacity=args.vectors)
+    vectors.add_quantized(list(range(args.vectors)), codes, scales)
+    load_s = time.perf_counter() - started
+
+    queries = normalize_rows(rng.standard_normal((args.queries, args.dim), dtype=np.float32))
+    latencies = []
+    for query in queries:
+        t0 = time.perf_counter()
+        vectors.search(query, args.k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+
+    # Recall of int8 storage against exact float32 search
+    exact = set(np.argsort(-(matrix @ queries[0]))[:args.k].tolist())
+    approx = {match_id for match_id, _ in vectors.search(queries[0], args.k)}
+    recovered = np.dot(dequantize(*stored[0]), matrix[0])
+
+    print(f"Vectors: {args.vectors} x {args.dim}")
+    print(f"Stored size:  {sum(len(d) for d, _ in stored) / 1e6:.1f} MB int8 (float32 would be {matrix.nbytes / 1e6:.1f} MB)")
+    print(f"Quantize:     {quantize_s:.2f} s, cold load {load_s * 1000:.0f} ms, resident {vectors.nbytes / 1e6:.1f} MB")
+    print(f"Query top-{args.k}: p50 {statistics.median(latencies):.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms")
+    print(f"int8 cosine to original: {recovered:.4f}, top-{args.k} recall vs float32: {len(exact & approx) / args.k:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Auto-tune inference threading for this host
+Usage: python benchmarks/tune_threads.py [--model NAME] [--texts 256] [--output runtime_config.json]
+
+Sweeps intra-op threads x worker processes x batch size for HF_MODEL_NAME.
+Every configuration runs `workers` processes concurrently, each pinned to
+its own slice of CPUs, and measures aggregate throughput and p99 batch
+latency. The configuration with the best throughput (within the optional
+p99 budget) is written as the runtime config loaded by utils/runtime.py.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SAMPLE_TEXTS = [
+    "I finally finished the project and I feel proud of myself.",
+    "Nothing went right today and I am exhausted.",
+    "The news about the layoffs made me really anxious.",
+    "I can't believe they cancelled the trip at the last minute!",
+    "Spending the evening with friends made me so happy.",
+    "I'm furious that nobody listened to my concerns in the meeting.",
+    "Looking forward to the weekend hike, it should be beautiful.",
+    "I miss my family and the house feels empty without them.",
+]
+
+
+def powers_of_two(limit: int):
+    value = 1
+    while value <= limit:
+        yield value
+        value *= 2
+
+
+def _worker(model: str, threads: int, cpus, batch_size: int, texts, start_barrier, results):
+    """Benchmark process: pin, set threads, load the pipeline, time batches"""
+    import torch
+    from transformers import pipeline
+
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    classifier = pipeline("text-classification", model=model, top_k=None)
+    classifier(texts[:batch_size], batch_size=batch_size, truncation=True)  # warm-up
+
+    start_barrier.wait()
+    latencies = []
+    started = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        batch = texts[offset:offset + batch_size]
+        t0 = time.perf_counter()
+        classifier(batch, batch_size=batch_size, truncation=True)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    results.put((len(texts), time.perf_counter() - started, latencies))
+
+
+def run_config(model: str, workers: int, threads: int, batch_size: int, texts_per_worker: int) -> dict:
+    from utils.runtime import available_cpus
+
+    cpus = available_cpus()
+    texts = (SAMPLE_TEXTS * (texts_per_worker // len(SAMPLE_TEXTS) + 1))[:texts_per_worker]
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+
+    processes = []
+    for index in range(workers):
+        worker_cpus = cpus[index * threads:(index + 1) * threads]
+        p = ctx.Process(target=_worker, args=(model, threads, worker_cpus, batch_size, texts, barrier, results))
+        p.start()
+        processes.append(p)
+
+    outcomes = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+
+    total_texts = sum(n for n, _, _ in outcomes)
+    wall = max(elapsed for _, elapsed, _ in outcomes)
+    latencies = sorted(l for _, _, ls in outcomes for l in ls)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return {
+        "workers": workers,
+        "intra_op_threads": threads,
+        "inter_op_threads": 1,
+        "batch_size": batch_size,
+        "throughput": round(total_texts / wall, 2),
+        "p50_batch_ms": round(statistics.median(latencies), 2),
+        "p99_batch_ms": round(p99, 2),
+    }
+
+
+def main():
+    from utils.runtime import available_cpus, DEFAULT_CONFIG_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default=os.getenv("HF_MODEL_NAME", "bhadresh-savani/distilbert-base-uncased-emotion"))
+    parser.add_argument("--texts", type=int, default=256, help="Texts classified per worker")
+    parser.add_argument("--batch-sizes", default="1,8,32")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Discard configs above this p99 batch latency")
+    parser.add_argument("--output", default=DEFAULT_CONFIG_PATH)
+    args = parser.parse_args()
+
+    n_cpus = len(available_cpus())
+    max_workers = args.max_workers or n_cpus
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+
+    print(f"🧪 Tuning {args.model} on {n_cpus} CPUs")
+    results = []
+    for workers in powers_of_two(max_workers):
+        for threads in powers_of_two(n_cpus // workers):
+            for batch_size in batch_sizes:
+                result = run_config(args.model, workers, threads, batch_size, args.texts)
+                results.append(result)
+                print(
+                    f"workers={workers:<3} threads={threads:<3} batch={batch_size:<3} "
+                    f"{result['throughput']:>8.1f} texts/s  p99={result['p99_batch_ms']:.1f} ms"
+                )
+
+    eligible = [r for r in results if args.max_p99_ms is None or r["p99_batch_ms"] <= args.max_p99_ms]
+    if not eligible:
+        print("❌ No configuration met the p99 budget")
+        sys.exit(1)
+
+    best = max(eligible, key=lambda r: r["throughput"])
+    config = {**best, "cpu_affinity": "auto" if best["workers"] > 1 else None, "model": args.model, "cpus": n_cpus}
+    with open(args.output, "w") as f:
+        json.dump(config, f, indent=2)
+
+    print(f"✅ Best: {best['workers']} workers x {best['intra_op_threads']} threads, batch {best['batch_size']} "
+          f"({best['throughput']} texts/s). Written to {args.output}")
+    print(f"Start uvicorn with --workers {best['workers']} (or WEB_CONCURRENCY={best['workers']})")
+
+
+if __name__ == "__main__":
+    main()
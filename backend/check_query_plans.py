@@ -0,0 +1,76 @@
+"""
+Check query plans of the history, summary and mood routes
+Usage: python check_query_plans.py [--user-id ID] [--verbose] [--create]
+
+EXPLAINs every query shape those routes send (page and count, for each
+filter combination) against the configured database, after refreshing
+planner statistics. Full table scans and sorts the indexes do not avoid
+are reported, along with the composite indexes that would serve them.
+--create builds the proposed indexes. Exits 1 while problems remain, so
+it can gate a deploy.
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path to import models
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.connection import engine, init_db
+
+
+def busiest_user(conn) -> int:
+    """User with the most analyses (their plans are the ones that hurt)"""
+    from sqlalchemy import func, select
+    from models.database import Analysis
+
+    row = conn.execute(
+        select(Analysis.user_id).group_by(Analysis.user_id).order_by(func.count().desc()).limit(1)
+    ).first()
+    return row[0] if row else 1
+
+
+def main():
+    from utils import query_plans
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--user-id", type=int, help="User whose queries to explain (default: the busiest)")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan, not only problems")
+    parser.add_argument("--create", action="store_true", help="Create the proposed indexes")
+    args = parser.parse_args()
+
+    init_db()
+    with engine.begin() as conn:
+        query_plans.analyze_tables(conn)
+        user_id = args.user_id or busiest_user(conn)
+        results = query_plans.check_query_plans(conn, user_id)
+
+        for result in results:
+            marker = "❌" if result["problems"] else "✅"
+            print(f"{marker} {result['name']}")
+            for problem in result["problems"]:
+                print(f"     {problem}")
+            if args.verbose:
+                for line in result["plan"]:
+                    print(f"     | {line}")
+
+        proposals = query_plans.propose_indexes(conn, results)
+        for name, table, columns in proposals:
+            print(f"💡 CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+
+        if args.create and proposals:
+            query_plans.create_indexes(conn, proposals)
+            query_plans.analyze_tables(conn)
+            print(f"✅ Created {len(proposals)} index(es)")
+            results = query_plans.check_query_plans(conn, user_id)
+
+    remaining = [r["name"] for r in results if r["problems"]]
+    if remaining:
+        print(f"⚠️ {len(remaining)} query shape(s) still scan or sort: {', '.join(remaining)}")
+        sys.exit(1)
+    print("✅ Every query shape is served by an index")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+from utils.compression import CompressionMiddleware
+from utils.profiling import ProfilingMiddleware
+from utils.responses import FastJSONResponse
 import os
 from dotenv import load_dotenv
 
@@ -18,27 +21,62 @@ load_dotenv()
 ml_models = {}
 
 
+def load_emotion_classifier(model_name: str) -> None:
+    """Load the Hugging Face pipeline and re-score any lexicon-fallback results left behind"""
+    from transformers import pipeline
+    from utils.rescoring import schedule_rescoring
+    from utils.runtime import is_primary_worker
+    
+    ml_models["emotion_classifier"] = pipeline(
+        "text-classification",
+        model=model_name,
+        top_k=None  # Return all emotion scores
+    )
+    print("✅ Model loaded successfully!")
+    # Catch up rows left by the lexicon fallback or scored by a previous model
+    # (one worker per host starts it; the checkpoint claim keeps hosts from overlapping)
+    if os.getenv("RESCORE_ON_STARTUP", "true").lower() == "true" and is_primary_worker():
+        schedule_rescoring(ml_models["emotion_classifier"], force=True)
+
+
+def _load_in_background(model_name: str) -> None:
+    try:
+        load_emotion_classifier(model_name)
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Lifespan context manager for model loading
     Loads Hugging Face model on startup
     """
-    from transformers import pipeline
+    from utils.runtime import configure_inference_runtime
+    
+    # Size PyTorch thread pools per worker before the model spins them up
+    runtime = configure_inference_runtime()
+    print(f"⚙️ Inference runtime: {runtime}")
     
     print("🧠 Loading Hugging Face emotion analysis model...")
     model_name = os.getenv("HF_MODEL_NAME", "bhadresh-savani/distilbert-base-uncased-emotion")
     
     try:
-        from models.connection import init_db
+        from models.connection import init_db, engine
+        from utils.partitions import ensure_partitions
         init_db()
+        try:
+            ensure_partitions(engine)
+        except Exception as e:
+            # Writes still land in the DEFAULT partition; never keep the API from starting
+            print(f"⚠️ Could not ensure partitions: {e}")
         
-        ml_models["emotion_classifier"] = pipeline(
-            "text-classification",
-            model=model_name,
-            top_k=None  # Return all emotion scores
-        )
-        print("✅ Model loaded successfully!")
+        if os.getenv("MODEL_LOAD_IN_BACKGROUND", "false").lower() == "true":
+            # Start serving right away; /analyze uses the lexicon fallback until the model is ready
+            import threading
+            threading.Thread(target=_load_in_background, args=(model_name,), name="model-loader", daemon=True).start()
+        else:
+            load_emotion_classifier(model_name)
     except Exception as e:
         print(f"❌ Error loading model: {e}")
         raise
@@ -46,6 +84,10 @@ async def lifespan(app: FastAPI):
     yield
     
     # Cleanup
+    from utils.jobs import shutdown_job_queue
+    from utils.rescoring import stop_rescoring
+    stop_rescoring()
+    shutdown_job_queue()
     ml_models.clear()
     print("🧹 Cleaned up resources")
 
@@ -55,7 +97,8 @@ app = FastAPI(
     title="Emotion Analysis API",
     description="AI-powered emotion analysis for thoughts and media content",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS configuration for Next.js frontend
@@ -71,6 +114,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiated brotli/gzip compression (history payloads repeat the same keys per row)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+)
+
+# Opt-in sampling profiler (PROFILING_TOKEN header / PROFILING_SLOW_MS); outermost so timings include compression
+app.add_middleware(ProfilingMiddleware)
+
 
 @app.get("/")
 async def root():
@@ -85,18 +137,31 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
+    from models.connection import pool_stats
+    
     return {
         "status": "ok",
         "database": "connected",  # Will be updated when DB is integrated
+        "database_pool": pool_stats(),
         "redis": "connected",     # Will be updated when Redis is integrated
         "ai_model": "loaded" if "emotion_classifier" in ml_models else "not loaded"
     }
 
 
+# Bump per-user data versions (ETags / result cache) on every committed write
+from models.connection import SessionLocal
+from utils.versioning import install_session_hooks
+install_session_hooks(SessionLocal)
+
 # Import routes
-from routes import analyze, mood
+from routes import analyze, mood, stream, export, imports, analytics, profiles
+app.include_router(export.router, prefix="/api", tags=["analysis"])
+app.include_router(imports.router, prefix="/api", tags=["analysis"])
 app.include_router(analyze.router, prefix="/api", tags=["analysis"])
 app.include_router(mood.router, prefix="/api", tags=["mood"])
+app.include_router(stream.router, prefix="/api", tags=["analysis"])
+app.include_router(analytics.router, prefix="/api", tags=["analytics"])
+app.include_router(profiles.router, prefix="/api", tags=["admin"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+import sys
+import os
+from sqlalchemy import text
+
+# Add parent directory to path to import models
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.connection import SessionLocal, init_db
+
+def migrate():
+    print("🔄 Starting mood sync migration...")
+    # Creates mood_sync_keys
+    init_db()
+    db = SessionLocal()
+    
+    try:
+        # 1. Add column if it doesn't exist (SQLite doesn't support IF NOT EXISTS in ALTER TABLE easily, so we catch error)
+        try:
+            db.execute(text("ALTER TABLE mood_logs ADD COLUMN idempotency_key VARCHAR(64)"))
+            db.commit()
+            print("✅ Added idempotency_key column.")
+        except Exception:
+            print("ℹ️ Column idempotency_key already exists or couldn't be added directly.")
+            db.rollback()
+        
+        # 2. Claim keys already stored on check-ins (the oldest check-in wins a duplicated key)
+        claimed = db.execute(text("""
+            INSERT INTO mood_sync_keys (user_id, idempotency_key, mood_log_id, created_at)
+            SELECT m.user_id, m.idempotency_key, min(m.id), min(m.created_at)
+            FROM mood_logs m
+            WHERE m.idempotency_key IS NOT NULL AND NOT EXISTS (
+                SELECT 1 FROM mood_sync_keys k
+                WHERE k.user_id = m.user_id AND k.idempotency_key = m.idempotency_key
+            )
+            GROUP BY m.user_id, m.idempotency_key
+        """)).rowcount
+        db.commit()
+        print(f"✅ Backfilled {claimed} idempotency keys into mood_sync_keys.")
+        
+        # 3. Uniqueness now lives in mood_sync_keys; on a partitioned mood_logs this index included created_at
+        db.execute(text("DROP INDEX IF EXISTS uq_mood_logs_user_idempotency_key"))
+        db.commit()
+        print("✅ Dropped uq_mood_logs_user_idempotency_key.")
+        
+    except Exception as e:
+        print(f"❌ Migration error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,26 @@
+import sys
+import os
+
+# Add parent directory to path to import models
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.connection import engine
+
+def migrate():
+    print("🔄 Starting partitioning migration...")
+    from utils.partitions import convert_to_partitioned, is_postgres, PARTITIONED_TABLES
+
+    if not is_postgres(engine):
+        # SQLite has no declarative partitioning: archive_history.py keeps the hot tables bounded instead
+        print("ℹ️ Not PostgreSQL - skipping. Run archive_history.py to move cold months out of the hot tables.")
+        return
+
+    for table in PARTITIONED_TABLES:
+        try:
+            convert_to_partitioned(engine, table)
+            print(f"✅ {table} is partitioned by month.")
+        except Exception as e:
+            print(f"❌ Migration error on {table}: {e}")
+
+if __name__ == "__main__":
+    migrate()
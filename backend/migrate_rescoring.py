@@ -0,0 +1,88 @@
+"""
+Add scoring-model columns to analyses
+Usage: python migrate_rescoring.py [--assume-current]
+
+Adds needs_rescore, model_name and model_version and creates the
+rescore_checkpoints table (one unfinished, owner-claimed run per model
+version). Existing rows have no recorded model, so the
+background re-scorer treats them as stale; pass --assume-current to
+stamp them with the configured HF_MODEL_NAME instead when they are
+known to come from it.
+"""
+
+import argparse
+import sys
+import os
+from sqlalchemy import text
+
+# Add parent directory to path to import models
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.connection import SessionLocal, init_db
+
+COLUMNS = {
+    "needs_rescore": "BOOLEAN NOT NULL DEFAULT FALSE",
+    "model_name": "VARCHAR(255)",
+    "model_version": "VARCHAR(64)",
+}
+
+def migrate(assume_current: bool = False):
+    print("🔄 Starting re-scoring columns migration...")
+    init_db()
+    db = SessionLocal()
+    
+    try:
+        # Add columns if they don't exist (SQLite doesn't support IF NOT EXISTS in ALTER TABLE, so we catch errors)
+        for column, definition in COLUMNS.items():
+            try:
+                db.execute(text(f"ALTER TABLE analyses ADD COLUMN {column} {definition}"))
+                db.commit()
+                print(f"✅ Added {column} column.")
+            except Exception:
+                print(f"ℹ️ Column {column} already exists or couldn't be added directly.")
+                db.rollback()
+        
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_analyses_needs_rescore ON analyses (needs_rescore)"))
+        db.commit()
+        
+        try:
+            db.execute(text("ALTER TABLE rescore_checkpoints ADD COLUMN owner VARCHAR(128)"))
+            db.commit()
+            print("✅ Added rescore_checkpoints.owner column.")
+        except Exception:
+            print("ℹ️ Column owner already exists or couldn't be added directly.")
+            db.rollback()
+        
+        # Workers used to open duplicate runs; keep the most advanced one per model version open
+        db.execute(text(
+            "UPDATE rescore_checkpoints SET finished_at = updated_at WHERE finished_at IS NULL AND id NOT IN ("
+            "SELECT max(id) FROM rescore_checkpoints WHERE finished_at IS NULL GROUP BY model_name, model_version)"
+        ))
+        db.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_rescore_checkpoints_open "
+            "ON rescore_checkpoints (model_name, model_version) WHERE finished_at IS NULL"
+        ))
+        db.commit()
+        
+        if assume_current:
+            model_name = os.getenv("HF_MODEL_NAME", "bhadresh-savani/distilbert-base-uncased-emotion")
+            result = db.execute(
+                text("UPDATE analyses SET model_name = :name, model_version = :version "
+                     "WHERE model_name IS NULL AND needs_rescore = FALSE"),
+                {"name": model_name, "version": os.getenv("HF_MODEL_VERSION", "")}
+            )
+            db.commit()
+            print(f"✅ Stamped {result.rowcount} existing records with {model_name}")
+        
+        print("✅ Re-scoring columns are up to date!")
+        
+    except Exception as e:
+        print(f"❌ Migration error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--assume-current", action="store_true", help="Stamp unrecorded rows with HF_MODEL_NAME")
+    migrate(parser.parse_args().assume_current)
@@ -2,33 +2,279 @@
 Database connection and session management
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.pool import QueuePool
+from collections import deque
+from typing import Dict, Generator, Iterable, Optional
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Database URL from environment (default to SQLite for local development/testing)
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+# Optional read replica; reads go to the primary when unset
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+# Seconds a user's reads stay on the primary after they write (replica lag budget)
+READ_STICKINESS_SECONDS = float(os.getenv("READ_STICKINESS_SECONDS", 5))
 
-# Create engine based on database type
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False}
-    )
-else:
-    engine = create_engine(
-        DATABASE_URL,
+# SQLite per-connection settings (WAL lets readers run alongside the single writer)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 65536))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))
+
+# PostgreSQL connections this app may hold per server, shared by all workers
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", 90))
+# Seconds a request waits for a pooled connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+
+class PoolStats:
+    """Checkout counts and wait times of one connection pool"""
+
+    def __init__(self, window: int = 1000):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        # Recent waits for percentiles
+        self._waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self._waits.append(seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts, timeouts, connects = self.checkouts, self.timeouts, self.connects
+            wait_total, wait_max = self.wait_total, self.wait_max
+
+        def pct(q):
+            return round(waits[min(int(q * len(waits)), len(waits) - 1)] * 1000, 3) if waits else 0.0
+
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "connects": connects,
+            "wait_ms_avg": round(wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+            "wait_ms_p50": pct(0.50),
+            "wait_ms_p99": pct(0.99),
+            "wait_ms_max": round(wait_max * 1000, 3)
+        }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        # recreate() hands over the old pool's listeners (and stats) through _dispatch
+        if "_dispatch" not in kwargs:
+            event.listen(self, "connect", self._on_connect)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self.stats._lock:
+            self.stats.connects += 1
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # Keep counters across pool resets (e.g. after engine.dispose())
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def pool_limits(workers: int, max_connections: int = DB_MAX_CONNECTIONS) -> tuple[int, int]:
+    """
+    Split a server's connection budget across worker processes
+
+    Two thirds of each worker's share are kept open, the rest is overflow
+    for bursts, so all workers at peak stay within max_connections.
+
+    Returns:
+        Tuple of (pool_size, max_overflow) per worker
+    """
+    share = max(max_connections // max(workers, 1), 2)
+    pool_size = max(share * 2 // 3, 1)
+    return pool_size, share - pool_size
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection SQLite settings (PRAGMAs do not persist across connections)"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size = {-SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(url: str, workers: Optional[int] = None):
+    """
+    Create an engine tuned for the database type
+
+    SQLite: WAL journal, NORMAL sync, a busy timeout so concurrent writers
+    wait instead of failing with "database is locked", and larger page
+    cache / mmap. PostgreSQL: the connection budget is split across the
+    uvicorn workers (DB_POOL_SIZE / DB_MAX_OVERFLOW override it).
+
+    File-backed pools record checkout wait times; see pool_stats().
+    """
+    if url.startswith("sqlite"):
+        in_memory = ":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite:/")
+        options = {"connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+        if not in_memory:
+            options.update(
+                poolclass=InstrumentedQueuePool,
+                pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+                max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+                pool_timeout=DB_POOL_TIMEOUT
+            )
+        sqlite_engine = create_engine(url, **options)
+        event.listen(sqlite_engine, "connect", _sqlite_pragmas)
+        return sqlite_engine
+
+    if workers is None:
+        from utils.runtime import get_runtime_config
+        workers = get_runtime_config()["workers"]
+    pool_size, max_overflow = pool_limits(workers)
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
         pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20
+        pool_size=int(os.getenv("DB_POOL_SIZE", pool_size)),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", max_overflow)),
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE
     )
 
-# Create session factory
+
+def engine_pool_stats(db_engine) -> Dict:
+    """Live occupancy plus checkout/wait counters of an engine's pool"""
+    pool = db_engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            idle=pool.checkedin()
+        )
+    if hasattr(pool, "stats"):
+        stats.update(pool.stats.snapshot())
+    return stats
+
+
+# Create engines (the read engine is the primary unless a replica is configured)
+engine = create_db_engine(DATABASE_URL)
+read_engine = create_db_engine(READ_DATABASE_URL) if READ_DATABASE_URL else engine
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Monotonic deadline per user until which reads stick to the primary
+_sticky_until: Dict[int, float] = {}
+_sticky_lock = threading.Lock()
+
+
+def mark_written(user_ids: Iterable[int]) -> None:
+    """Pin the users' reads to the primary for the stickiness window"""
+    if read_engine is engine:
+        return
+
+    deadline = time.monotonic() + READ_STICKINESS_SECONDS
+    user_ids = [u for u in set(user_ids) if u is not None]
+    with _sticky_lock:
+        for user_id in user_ids:
+            _sticky_until[user_id] = deadline
+        # Drop expired entries so the map stays bounded by recent writers
+        if len(_sticky_until) > 10000:
+            now = time.monotonic()
+            for user_id in [u for u, until in _sticky_until.items() if until < now]:
+                del _sticky_until[user_id]
+
+    # Share stickiness with the other workers when Redis is available
+    try:
+        from utils.redis_client import get_redis_client
+
+        client = get_redis_client()
+        if client is not None:
+            ttl_ms = int(READ_STICKINESS_SECONDS * 1000)
+            for user_id in user_ids:
+                client.set(f"recent_write:{user_id}", 1, px=ttl_ms)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not share read stickiness: {e}")
+
+
+def recently_wrote(user_id: int) -> bool:
+    """True if the user wrote within the stickiness window (on any worker)"""
+    if _sticky_until.get(user_id, 0) > time.monotonic():
+        return True
+
+    try:
+        from utils.redis_client import get_redis_client
+
+        client = get_redis_client()
+        return client is not None and bool(client.exists(f"recent_write:{user_id}"))
+    except Exception:
+        # Unknown: read from the primary to be safe
+        return True
+
+
+def read_session_factory(user_id: Optional[int] = None) -> sessionmaker:
+    """
+    Pick the session factory for a read on behalf of a user
+
+    Reads go to the replica unless the user has just written, in which
+    case the primary is used so they always see their own writes.
+    """
+    if read_engine is engine or (user_id is not None and recently_wrote(user_id)):
+        return SessionLocal
+    return ReadSessionLocal
+
+
+def pool_stats() -> Dict[str, Dict]:
+    """Pool health of the primary (and replica, when configured)"""
+    stats = {"primary": engine_pool_stats(engine)}
+    if read_engine is not engine:
+        stats["replica"] = engine_pool_stats(read_engine)
+    return stats
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -3,7 +3,7 @@ Database models for Emotion Analysis
 SQLAlchemy ORM models for Users and Analyses
 """
 
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, ForeignKey, Enum, Float, LargeBinary, Boolean, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -59,16 +59,48 @@ class Analysis(Base):
     agent_mode = Column(String(20), nullable=True)
     agent_response = Column(Text, nullable=True)
     
+    # Classifier that produced emotion_scores (rows scored by an older model are re-scored)
+    model_name = Column(String(255), nullable=True)
+    model_version = Column(String(64), nullable=True)
+    
+    # Scored by the lexicon fallback; re-scored by the model in the background
+    needs_rescore = Column(Boolean, nullable=False, default=False, index=True)
+    
     # Timestamp
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     
     # Relationship to user
     user = relationship("User", back_populates="analyses")
     
+    # History/summary/export queries filter by user (plus one equality filter) and read by timestamp
+    __table_args__ = (
+        Index("ix_analyses_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_analyses_user_id_dominant_emotion_timestamp", "user_id", "dominant_emotion", "timestamp"),
+        Index("ix_analyses_user_id_source_type_timestamp", "user_id", "source_type", "timestamp"),
+    )
+    
     def __repr__(self):
         return f"<Analysis(id={self.id}, user_id={self.user_id}, timestamp={self.timestamp})>"
 
 
+class AnalysisEmbedding(Base):
+    """Quantized text embedding of an analysis, used for similarity search"""
+    __tablename__ = "analysis_embeddings"
+    
+    analysis_id = Column(Integer, ForeignKey("analyses.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Model that produced the vector (vectors from different models are not comparable)
+    model_name = Column(String(255), nullable=False)
+    
+    # int8 components; the float vector is vector * scale
+    vector = Column(LargeBinary, nullable=False)
+    scale = Column(Float, nullable=False)
+    
+    def __repr__(self):
+        return f"<AnalysisEmbedding(analysis_id={self.analysis_id}, model={self.model_name})>"
+
+
 class MoodLog(Base):
     """Model for quick mood check-ins and self-care activity logging"""
     __tablename__ = "mood_logs"
@@ -89,11 +121,89 @@ class MoodLog(Base):
     activity_type = Column(String(50), nullable=True) # "meditation", "breathing", "doodle"
     duration = Column(Integer, nullable=True) # Duration in seconds
     
+    # Client-generated key of an offline check-in (claimed in mood_sync_keys)
+    idempotency_key = Column(String(64), nullable=True)
+    
     # Timestamp
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
     # Relationship to user
     user = relationship("User")
     
+    __table_args__ = (
+        Index("ix_mood_logs_user_id_created_at", "user_id", "created_at"),
+    )
+    
     def __repr__(self):
         return f"<MoodLog(id={self.id}, user_id={self.user_id}, mood={self.mood_rating})>"
+
+
+class MoodSyncKey(Base):
+    """
+    Idempotency key of a synced check-in, one row per (user, key)
+
+    Kept out of mood_logs so the key stays unique when that table is
+    partitioned (PostgreSQL unique indexes there must include created_at).
+    """
+    __tablename__ = "mood_sync_keys"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    idempotency_key = Column(String(64), primary_key=True)
+    
+    # Check-in stored under the key (no foreign key: mood_logs may be partitioned or archived)
+    mood_log_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<MoodSyncKey(user_id={self.user_id}, key={self.idempotency_key}, mood_log_id={self.mood_log_id})>"
+
+
+class ArchivedPartition(Base):
+    """Month of rows moved from a hot table into an archive file"""
+    __tablename__ = "archived_partitions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String(50), nullable=False, index=True)
+    
+    # Archived month (YYYY-MM); a month may be archived in several parts
+    month = Column(String(7), nullable=False, index=True)
+    
+    # File path relative to ARCHIVE_DIR
+    path = Column(String(512), nullable=False)
+    row_count = Column(Integer, nullable=False, default=0)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ArchivedPartition(table={self.table_name}, month={self.month}, rows={self.row_count})>"
+
+
+class RescoreCheckpoint(Base):
+    """Progress of a re-scoring run toward one model version (lets an interrupted run resume)"""
+    __tablename__ = "rescore_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    model_name = Column(String(255), nullable=False)
+    model_version = Column(String(64), nullable=False, default="")
+    
+    # Highest analysis id processed so far
+    last_id = Column(Integer, nullable=False, default=0)
+    rescored = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    
+    # Process running it; updated_at doubles as its lease heartbeat
+    owner = Column(String(128), nullable=True)
+    
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # At most one unfinished run per model version
+    __table_args__ = (
+        Index(
+            "uq_rescore_checkpoints_open", "model_name", "model_version", unique=True,
+            sqlite_where=text("finished_at IS NULL"), postgresql_where=text("finished_at IS NULL")
+        ),
+    )
+    
+    def __repr__(self):
+        return f"<RescoreCheckpoint(model={self.model_name}@{self.model_version}, last_id={self.last_id})>"
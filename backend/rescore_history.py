@@ -0,0 +1,56 @@
+"""
+Re-score stored analyses with the current model
+Usage: python rescore_history.py [--batch-size 64] [--no-throttle]
+
+Re-classifies every analysis whose scores came from another model or
+version (or from the lexicon fallback) and bulk-updates scores, dominant
+emotion and agent response. Progress is checkpointed per chunk, so an
+interrupted run picks up where it stopped. The API also runs this in the
+background at startup; use this script to drive it offline.
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path to import models
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.connection import SessionLocal, init_db
+
+
+def main():
+    from transformers import pipeline
+    from utils import rescoring
+    from utils.runtime import configure_inference_runtime
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=rescoring.RESCORE_BATCH_SIZE)
+    parser.add_argument("--no-throttle", action="store_true", help="Run flat out (no live traffic to protect)")
+    args = parser.parse_args()
+
+    configure_inference_runtime()
+    model_name = os.getenv("HF_MODEL_NAME", "bhadresh-savani/distilbert-base-uncased-emotion")
+    print(f"🧠 Loading {model_name}...")
+    classifier = pipeline("text-classification", model=model_name, top_k=None)
+
+    init_db()
+    db = SessionLocal()
+    progress = {}
+    try:
+        totals = rescoring.run_rescoring(
+            db, classifier, batch_size=args.batch_size, throttle=not args.no_throttle, progress=progress
+        )
+        print(f"✅ Re-scored {totals['rescored']} analyses ({totals['skipped']} without text), last id {totals['last_id']}")
+    except KeyboardInterrupt:
+        print(f"⏸️ Stopped at id {progress.get('last_id', 0)}; run again to resume")
+    except Exception as e:
+        print(f"❌ Re-scoring error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Emotion Analytics Routes
+Similar entries, similar days and recurring mood states from emotion-score vectors
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+import logging
+from sqlalchemy.orm import Session
+from models.database import Analysis, User
+from utils.auth import get_current_user, get_read_db
+from utils.emotion_index import EMOTIONS, get_emotion_index, kmeans
+from utils.versioning import versioned_json_response
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/analytics/similar/{analysis_id}")
+async def get_similar_analyses(
+    request: Request,
+    analysis_id: int,
+    limit: int = 5,
+    by: str = "entry",
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Find past entries (or days, with by=day) whose emotion profile is closest to an analysis
+
+    Similarity is the cosine distance between 8-emotion score vectors.
+    """
+    if by not in ("entry", "day"):
+        raise HTTPException(status_code=400, detail="by must be 'entry' or 'day'")
+    limit = min(max(limit, 1), 50)
+
+    def build():
+        vectors = get_emotion_index().get(db, current_user.id)
+        if vectors.position(analysis_id) is None:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+
+        if by == "day":
+            return {
+                "items": [
+                    {"date": day, "distance": round(distance, 4)}
+                    for day, distance in vectors.similar_days(analysis_id, limit)
+                ]
+            }
+
+        matches = vectors.similar(analysis_id, limit)
+        rows = {
+            a.id: a for a in db.query(Analysis).filter(
+                Analysis.user_id == current_user.id,
+                Analysis.id.in_([match_id for match_id, _ in matches])
+            )
+        }
+        return {
+            "items": [
+                {
+                    "id": match_id,
+                    "timestamp": rows[match_id].timestamp,
+                    "distance": round(distance, 4),
+                    "dominant_emotion": rows[match_id].dominant_emotion,
+                    "emotion_scores": rows[match_id].emotion_scores
+                } for match_id, distance in matches if match_id in rows
+            ]
+        }
+
+    try:
+        params = {"analysis_id": analysis_id, "limit": limit, "by": by}
+        return await run_in_threadpool(
+            versioned_json_response, request, current_user.id, "analytics_similar", params, build
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Similarity query error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to find similar analyses")
+
+
+@router.get("/analytics/mood-states")
+async def get_mood_states(
+    request: Request,
+    k: int = 4,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Cluster the user's days into recurring mood states
+
+    Each day is the average of its analyses' emotion vectors; days are
+    grouped with k-means and every state reports its centroid and days.
+    """
+    k = min(max(k, 1), 12)
+
+    def build():
+        vectors = get_emotion_index().get(db, current_user.id)
+        if len(vectors) == 0:
+            return {"states": [], "days": []}
+
+        days, means = vectors.daily()
+        centroids, labels = kmeans(means, k)
+
+        states = []
+        for state, centroid in enumerate(centroids):
+            scores = {emotion: round(float(value), 4) for emotion, value in zip(EMOTIONS, centroid)}
+            states.append({
+                "state": state,
+                "dominant_emotion": max(scores.items(), key=lambda x: x[1])[0],
+                "emotion_scores": scores,
+                "days": int((labels == state).sum())
+            })
+
+        return {
+            "states": states,
+            "days": [{"date": str(day), "state": int(label)} for day, label in zip(days, labels)]
+        }
+
+    try:
+        return await run_in_threadpool(
+            versioned_json_response, request, current_user.id, "mood_states", {"k": k}, build
+        )
+    except Exception as e:
+        logger.error(f"Mood state clustering error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to compute mood states")
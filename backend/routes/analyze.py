@@ -3,23 +3,33 @@ Emotion Analysis Routes
 Handles text and media analysis endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
 from pydantic import BaseModel, HttpUrl, Field
 from typing import Optional, Dict, List
 import logging
+import os
 from sqlalchemy.orm import Session
 from models.connection import get_db
 from models.database import Analysis, User, SourceType
+from utils.agent_templates import render_response
+from utils.responses import FastJSONResponse, model_response
+from utils.singleflight import SingleFlight, text_fingerprint
+from utils.versioning import versioned_json_response
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Coalesces identical in-flight inference (same text hash / normalized URL)
+inference_flight = SingleFlight()
+
 
 class TextAnalysisRequest(BaseModel):
     """Request model for text analysis"""
     text: str = Field(..., min_length=1)
     agent_mode: Optional[str] = "analytical"  # counselor, analytical, brutally_honest
+    trigger_attribution: bool = False  # Rank trigger words by occlusion (extra batched inference)
+    timeline: bool = False  # Score each sentence and return the mood timeline
     
 
 class MediaAnalysisRequest(BaseModel):
@@ -39,6 +49,21 @@ class EmotionScores(BaseModel):
     anticipation: float
 
 
+class TriggerWord(BaseModel):
+    """Trigger word with its contribution to the dominant emotion"""
+    word: str
+    weight: float
+
+
+class SentenceEmotion(BaseModel):
+    """Emotion scores for one sentence of the analyzed text"""
+    index: int
+    text: str
+    emotion_scores: EmotionScores
+    dominant_emotion: str
+    intensity: float
+
+
 class AnalysisResponse(BaseModel):
     """Analysis response model"""
     emotion_scores: EmotionScores
@@ -46,6 +71,9 @@ class AnalysisResponse(BaseModel):
     intensity: float
     agent_response: Optional[str] = None
     trigger_words: Optional[List[str]] = None
+    trigger_weights: Optional[List[TriggerWord]] = None
+    timeline: Optional[List[SentenceEmotion]] = None
+    provisional: bool = False  # Scored by the lexicon fallback; re-scored by the model later
 
 
 def get_emotion_classifier():
@@ -58,6 +86,22 @@ def get_emotion_classifier():
     return ml_models["emotion_classifier"]
 
 
+def get_optional_classifier():
+    """Dependency to get the ML model, or None while it is not loaded (lexicon fallback)"""
+    from main import ml_models
+    
+    classifier = ml_models.get("emotion_classifier")
+    if classifier is None and not LEXICON_FALLBACK:
+        raise HTTPException(status_code=503, detail="AI model not loaded")
+    return classifier
+
+
+# Serve lexicon scores instead of 503s when the model is missing or the queue is too deep
+LEXICON_FALLBACK = os.getenv("LEXICON_FALLBACK", "true").lower() == "true"
+# Expected inference wait (seconds) beyond which /analyze falls back to the lexicon
+FALLBACK_LATENCY_BUDGET = float(os.getenv("FALLBACK_LATENCY_BUDGET", 2.0))
+
+
 def normalize_emotion_scores(raw_results: List[Dict]) -> EmotionScores:
     """
     Convert Hugging Face output to 8-emotion Plutchik model
@@ -111,36 +155,85 @@ def get_dominant_emotion(scores: EmotionScores) -> tuple[str, float]:
     return dominant[0], dominant[1]
 
 
+def score_timeline(classifier, text: str) -> tuple[Optional[EmotionScores], List[SentenceEmotion]]:
+    """
+    Score every sentence of a text in one batched pass
+
+    Sentence scores are cached by hash, so re-submitting an edited entry
+    only runs the changed sentences through the model.
+
+    Returns:
+        Tuple of (length-weighted document scores, per-sentence timeline)
+    """
+    from utils.sentences import split_sentences, score_sentences, aggregate_scores, get_sentence_cache
+
+    sentences = split_sentences(text)
+    if not sentences:
+        return None, []
+
+    sentence_scores, _ = score_sentences(classifier, sentences, get_sentence_cache())
+
+    timeline = []
+    for index, (sentence, scores) in enumerate(zip(sentences, sentence_scores)):
+        sentence_emotions = EmotionScores(**scores)
+        dominant, intensity = get_dominant_emotion(sentence_emotions)
+        timeline.append(SentenceEmotion(
+            index=index,
+            text=sentence,
+            emotion_scores=sentence_emotions,
+            dominant_emotion=dominant,
+            intensity=intensity
+        ))
+
+    return EmotionScores(**aggregate_scores(sentences, sentence_scores)), timeline
+
+
+def score_lexicon(text: str, timeline: bool) -> tuple[EmotionScores, Optional[List[SentenceEmotion]]]:
+    """
+    Score a text with the lexicon classifier (no model needed)
+
+    Returns:
+        Tuple of (document scores, per-sentence timeline if requested)
+    """
+    from utils.lexicon import score_text
+    from utils.sentences import split_sentences, aggregate_scores
+
+    if not timeline:
+        return EmotionScores(**score_text(text)), None
+
+    sentences = split_sentences(text) or [text]
+    sentence_scores = [score_text(sentence) for sentence in sentences]
+    entries = []
+    for index, (sentence, scores) in enumerate(zip(sentences, sentence_scores)):
+        sentence_emotions = EmotionScores(**scores)
+        dominant, intensity = get_dominant_emotion(sentence_emotions)
+        entries.append(SentenceEmotion(
+            index=index,
+            text=sentence,
+            emotion_scores=sentence_emotions,
+            dominant_emotion=dominant,
+            intensity=intensity
+        ))
+    return EmotionScores(**aggregate_scores(sentences, sentence_scores)), entries
+
+
+def should_fall_back(classifier) -> bool:
+    """Whether a request should be scored by the lexicon instead of waiting for the model"""
+    if not LEXICON_FALLBACK:
+        return False
+    return classifier is None or admission.saturated or admission.expected_wait() > FALLBACK_LATENCY_BUDGET
+
+
 def generate_agent_response(scores: EmotionScores, mode: str, dominant: str) -> str:
     """
     Generate contextual response based on agent mode
+    Uses the templates compiled at import by utils.agent_templates
     """
-    responses = {
-        "counselor": {
-            "anger": "I notice you're experiencing some anger. It's completely valid to feel this way. Would you like to try a brief breathing exercise?",
-            "sadness": "It sounds like you're going through a difficult time. Remember, it's okay to feel sad. Your emotions are valid.",
-            "fear": "I sense some anxiety in your words. Let's take a moment to ground ourselves. You're safe right now.",
-            "joy": "I'm glad to see you're experiencing some positive emotions. That's wonderful!",
-        },
-        "analytical": {
-            "anger": f"Anger detected at {scores.anger:.1%}. Consider identifying specific triggers to address the root cause.",
-            "sadness": f"Sadness level: {scores.sadness:.1%}. Pattern analysis suggests reviewing recent life changes.",
-            "fear": f"Fear response: {scores.fear:.1%}. Recommend cognitive reframing techniques.",
-            "joy": f"Positive affect: {scores.joy:.1%}. Maintain activities that generate this emotional state.",
-        },
-        "brutally_honest": {
-            "anger": "You're angry. That's clear. Now, what are you going to do about it?",
-            "sadness": "Feeling down won't solve anything. Time to identify what's actually wrong and take action.",
-            "fear": "Fear is just your brain's alarm system. Is the threat real or imagined?",
-            "joy": "Good. Keep doing whatever led to this feeling.",
-        }
-    }
-    
-    default_response = "Analysis complete. Review your emotion scores for insights."
-    return responses.get(mode, {}).get(dominant, default_response)
-
+    # vars() exposes the field values without copying them into a new dict
+    return render_response(mode, dominant, vars(scores))
 
-from utils.auth import get_current_user
+from utils.auth import get_current_user, get_read_db
+from utils.ratelimit import admission, rate_limited_user
 
 # ... router and models ...
 
@@ -148,18 +241,39 @@ from utils.auth import get_current_user
 async def analyze_text(
     request: TextAnalysisRequest,
     db: Session = Depends(get_db),
-    classifier = Depends(get_emotion_classifier),
-    current_user: User = Depends(get_current_user)
+    classifier = Depends(get_optional_classifier),
+    current_user: User = Depends(rate_limited_user)
 ):
     """
     Analyze text and return emotion scores for the authenticated user
+    
+    While the model is not loaded, or the inference queue is deeper than
+    the latency budget, the text is scored by the lexicon classifier; the
+    result is marked provisional and re-scored in the background later.
     """
     try:
-        # Run AI inference
-        raw_results = classifier(request.text)[0]
+        from fastapi.concurrency import run_in_threadpool
+        
+        timeline = None
+        emotion_scores = None
+        provisional = should_fall_back(classifier)
+        if provisional:
+            emotion_scores, timeline = score_lexicon(request.text, request.timeline)
+        elif request.timeline:
+            # Per-sentence scores in one batch; the document vector aggregates them
+            emotion_scores, timeline = await run_in_threadpool(admission.run, score_timeline, classifier, request.text)
         
-        # Normalize to 8-emotion model
-        emotion_scores = normalize_emotion_scores(raw_results)
+        if emotion_scores is None:
+            # Run AI inference (identical concurrent texts share one forward pass;
+            # only the leader queues for an inference slot)
+            raw_results = await run_in_threadpool(
+                inference_flight.do,
+                f"text:{text_fingerprint(request.text)}",
+                lambda: admission.run(lambda: classifier(request.text)[0])
+            )
+            
+            # Normalize to 8-emotion model
+            emotion_scores = normalize_emotion_scores(raw_results)
         
         # Get dominant emotion
         dominant_emotion, intensity = get_dominant_emotion(emotion_scores)
@@ -171,94 +285,160 @@ async def analyze_text(
             dominant_emotion
         )
         
-        # Extract trigger words (simplified - can be enhanced with NER)
-        trigger_words = [word for word in request.text.split() if len(word) > 5][:5]
+        # Extract trigger words
+        trigger_weights = None
+        if request.trigger_attribution and provisional:
+            from utils.lexicon import trigger_words as lexicon_trigger_words
+            trigger_weights = lexicon_trigger_words(request.text, dominant_emotion)
+            trigger_words = [t["word"] for t in trigger_weights]
+        elif request.trigger_attribution:
+            # Occlusion attribution: one batched forward pass over masked variants
+            from utils.attribution import extract_trigger_words
+            trigger_weights = await run_in_threadpool(
+                admission.run, extract_trigger_words, classifier, request.text, dominant_emotion
+            )
+            trigger_words = [t["word"] for t in trigger_weights]
+        else:
+            # Cheap heuristic for callers that did not ask for attribution
+            trigger_words = [word for word in request.text.split() if len(word) > 5][:5]
         
         response_data = AnalysisResponse(
             emotion_scores=emotion_scores,
             dominant_emotion=dominant_emotion,
             intensity=intensity,
             agent_response=agent_response,
-            trigger_words=trigger_words
+            trigger_words=trigger_words,
+            trigger_weights=trigger_weights,
+            timeline=timeline,
+            provisional=provisional
         )
 
         # PERSIST TO DATABASE (Linked to authenticated user)
         try:
+            from utils.encryption import encrypt_thought
+            from utils.lexicon import SCORING_MODEL as LEXICON_MODEL
+            from utils.sentences import scoring_model
+            
             new_analysis = Analysis(
                 user_id=current_user.id,
-                encrypted_text=request.text,
+                encrypted_text=encrypt_thought(current_user.firebase_uid, request.text),
                 emotion_scores=emotion_scores.model_dump(),
                 dominant_emotion=dominant_emotion,
                 source_type=SourceType.TEXT,
                 agent_mode=request.agent_mode,
-                agent_response=agent_response
+                agent_response=agent_response,
+                needs_rescore=provisional,
+                **(LEXICON_MODEL if provisional else scoring_model(classifier))
             )
             db.add(new_analysis)
             db.commit()
+            
+            from utils.rescoring import mark_pending, schedule_rescoring
+            if provisional:
+                mark_pending()
+            else:
+                # Embed for similarity search off the request path
+                from utils.embeddings import schedule_indexing
+                schedule_indexing(classifier, current_user.id, new_analysis.id, request.text)
+                # The model is keeping up again: re-score earlier fallback results
+                schedule_rescoring(classifier)
         except Exception as db_error:
             logger.error(f"Database error: {db_error}")
 
-        return response_data
+        return model_response(response_data)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Analysis error: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+def run_media_analysis(url: str, classifier, shed: bool = True) -> AnalysisResponse:
+    """
+    Scrape a URL and classify its content
+
+    Only the classifier call holds an inference slot; the fetch does not.
+
+    Raises:
+        ValueError: If no text could be extracted from the page
+    """
+    from utils.scraper import scrape_article
+    
+    # Scrape article text
+    article_text = scrape_article(url)
+    
+    if not article_text:
+        raise ValueError("Could not extract text from URL")
+    
+    # Analyze the scraped text
+    raw_results = admission.run(lambda: classifier(article_text[:512])[0], shed=shed)
+    
+    emotion_scores = normalize_emotion_scores(raw_results)
+    dominant_emotion, intensity = get_dominant_emotion(emotion_scores)
+    
+    return AnalysisResponse(
+        emotion_scores=emotion_scores,
+        dominant_emotion=dominant_emotion,
+        intensity=intensity,
+        agent_response=f"Media analysis complete. Dominant tone: {dominant_emotion}",
+        trigger_words=None
+    )
+
+
+def save_media_analysis(db: Session, user_id: int, url: str, response_data: AnalysisResponse, classifier=None) -> Analysis:
+    """Persist a media analysis result for a user"""
+    from utils.sentences import scoring_model
+    
+    new_analysis = Analysis(
+        user_id=user_id,
+        encrypted_text=None,
+        emotion_scores=response_data.emotion_scores.model_dump(),
+        dominant_emotion=response_data.dominant_emotion,
+        source_type=SourceType.URL,
+        source_url=url,
+        agent_mode="analytical",
+        **(scoring_model(classifier) if classifier is not None else {})
+    )
+    
+    db.add(new_analysis)
+    db.commit()
+    return new_analysis
+
+
 @router.post("/scrape", response_model=AnalysisResponse)
 async def analyze_media(
     request: MediaAnalysisRequest,
     db: Session = Depends(get_db),
     classifier = Depends(get_emotion_classifier),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(rate_limited_user)
 ):
     """
     Scrape URL and analyze content for the authenticated user
     """
     try:
-        from utils.scraper import scrape_article
-        
-        # Scrape article text
-        article_text = scrape_article(str(request.url))
-        
-        if not article_text:
-            raise HTTPException(status_code=400, detail="Could not extract text from URL")
-        
-        # Analyze the scraped text
-        raw_results = classifier(article_text[:512])[0]
-        
-        emotion_scores = normalize_emotion_scores(raw_results)
-        dominant_emotion, intensity = get_dominant_emotion(emotion_scores)
+        from fastapi.concurrency import run_in_threadpool
+        from utils.scraper import normalize_url
         
-        # Prepare response
-        response_data = AnalysisResponse(
-            emotion_scores=emotion_scores,
-            dominant_emotion=dominant_emotion,
-            intensity=intensity,
-            agent_response=f"Media analysis complete. Dominant tone: {dominant_emotion}",
-            trigger_words=None
-        )
+        try:
+            # Concurrent requests for the same page share one fetch + inference
+            response_data = await run_in_threadpool(
+                inference_flight.do,
+                f"url:{normalize_url(str(request.url))}",
+                run_media_analysis, str(request.url), classifier
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # PERSIST TO DATABASE (Linked to authenticated user)
         try:
-            new_analysis = Analysis(
-                user_id=current_user.id,
-                encrypted_text=None,
-                emotion_scores=emotion_scores.model_dump(),
-                dominant_emotion=dominant_emotion,
-                source_type=SourceType.URL,
-                source_url=str(request.url),
-                agent_mode="analytical"
-            )
-            
-            db.add(new_analysis)
-            db.commit()
+            save_media_analysis(db, current_user.id, str(request.url), response_data, classifier)
             logger.info(f"✅ Saved media analysis for user {current_user.id}")
             
         except Exception as db_error:
             logger.error(f"❌ Database focus error: {db_error}")
             
-        return response_data
+        return model_response(response_data)
         
     except HTTPException:
         raise
@@ -267,8 +447,182 @@ async def analyze_media(
         raise HTTPException(status_code=500, detail=f"Media analysis failed: {str(e)}")
 
 
+def _media_analysis_job(job, url: str, user_id: int, classifier) -> dict:
+    """Background worker: scrape, classify and persist a URL analysis"""
+    from models.connection import SessionLocal
+    from utils.scraper import normalize_url
+    
+    response_data = inference_flight.do(f"url:{normalize_url(url)}", run_media_analysis, url, classifier, shed=False)
+    
+    db = SessionLocal()
+    try:
+        new_analysis = save_media_analysis(db, user_id, url, response_data, classifier)
+        logger.info(f"✅ Saved background media analysis for user {user_id}")
+        return {"analysis_id": new_analysis.id, **response_data.model_dump()}
+    finally:
+        db.close()
+
+
+@router.post("/scrape/jobs", status_code=202)
+async def submit_media_job(
+    request: MediaAnalysisRequest,
+    classifier = Depends(get_emotion_classifier),
+    current_user: User = Depends(rate_limited_user)
+):
+    """
+    Queue a URL analysis and return its job id immediately
+    
+    Submitting the same URL again while its job is still in flight
+    returns the existing job.
+    """
+    from utils.jobs import get_job_queue
+    from utils.scraper import normalize_url
+    
+    url = str(request.url)
+    job = get_job_queue().submit(
+        _media_analysis_job, url, current_user.id, classifier,
+        key=f"scrape:{current_user.id}:{normalize_url(url)}",
+        owner_id=current_user.id
+    )
+    return {"job_id": job.id, "status": job.status}
+
+
+@router.get("/scrape/jobs/{job_id}")
+async def get_media_job(
+    job_id: str,
+    wait: float = 0,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Poll a URL analysis job
+    
+    Pass `wait` (seconds, max 30) to long-poll until the job finishes.
+    """
+    import asyncio
+    import time
+    from utils.jobs import get_job_queue
+    
+    job = get_job_queue().get(job_id)
+    if job is None or job.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    deadline = time.monotonic() + min(max(wait, 0), 30)
+    while not job.finished and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    
+    return job.to_dict()
+
+
+HISTORY_FIELDS = [
+    "id", "timestamp", "emotion_scores", "dominant_emotion", "source_type",
+    "source_url", "text", "agent_response", "agent_mode"
+]
+
+
+def history_row(a: Analysis) -> Dict:
+    """Analysis row as a dict with the same keys as an archived record"""
+    return {
+        "id": a.id,
+        "timestamp": a.timestamp,
+        "emotion_scores": a.emotion_scores,
+        "dominant_emotion": a.dominant_emotion,
+        "source_type": a.source_type,
+        "source_url": a.source_url,
+        "encrypted_text": a.encrypted_text,
+        "agent_response": a.agent_response,
+        "agent_mode": a.agent_mode
+    }
+
+
+def archived_row_matches(row: Dict, source_type: Optional[str], emotion: Optional[str], search: Optional[str]) -> bool:
+    """Apply the history filters that SQL applies to hot rows"""
+    if source_type and str(getattr(row["source_type"], "value", row["source_type"])).lower() != source_type.lower():
+        return False
+    if emotion and emotion != 'all' and row["dominant_emotion"] != emotion:
+        return False
+    if search:
+        needle = search.lower()
+        return any(needle in (row[field] or "").lower() for field in ("encrypted_text", "source_url"))
+    return True
+
+
+def to_columns(items: List[Dict]) -> Dict:
+    """
+    Pivot history rows into one array per field
+    
+    emotion_scores is pivoted as well, into one array per emotion.
+    """
+    columns = {field: [item[field] for item in items] for field in HISTORY_FIELDS if field != "emotion_scores"}
+    emotions = EmotionScores.model_fields.keys()
+    columns["emotion_scores"] = {
+        emotion: [(item["emotion_scores"] or {}).get(emotion) for item in items] for emotion in emotions
+    }
+    return columns
+
+
+def parse_history_dates(start_date: Optional[str], end_date: Optional[str]) -> tuple:
+    """Parse the history date range; unparseable bounds are ignored and a bare end date covers the whole day"""
+    from datetime import datetime
+    
+    s_date = e_date = None
+    if start_date:
+        try:
+            s_date = datetime.fromisoformat(start_date)
+        except ValueError:
+            pass
+    
+    if end_date:
+        try:
+            end_value = end_date if 'T' in end_date else end_date + 'T23:59:59'
+            e_date = datetime.fromisoformat(end_value)
+        except ValueError:
+            pass
+    
+    return s_date, e_date
+
+
+def history_query(
+    db: Session,
+    user_id: int,
+    source_type: Optional[str] = None,
+    emotion: Optional[str] = None,
+    search: Optional[str] = None,
+    s_date=None,
+    e_date=None
+):
+    """
+    Filtered history query for a user (unordered, unpaginated)
+    
+    Shared with utils/query_plans.py so the plan checks cover exactly the
+    SQL this route sends.
+    """
+    # Base query filtered by current user
+    query = db.query(Analysis).filter(Analysis.user_id == user_id)
+    
+    # Filtering
+    if source_type:
+        query = query.filter(Analysis.source_type == source_type)
+    if emotion and emotion != 'all':
+        query = query.filter(Analysis.dominant_emotion == emotion)
+    if search:
+        search_query = f"%{search}%"
+        query = query.filter(
+            (Analysis.encrypted_text.ilike(search_query)) | 
+            (Analysis.source_url.ilike(search_query))
+        )
+    
+    # Date range filtering
+    if s_date is not None:
+        query = query.filter(Analysis.timestamp >= s_date)
+    if e_date is not None:
+        query = query.filter(Analysis.timestamp <= e_date)
+    
+    return query
+
+
 @router.get("/history")
 async def get_history(
+    request: Request,
     page: int = 1,
     limit: int = 10,
     source_type: Optional[str] = None,
@@ -276,141 +630,226 @@ async def get_history(
     search: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db: Session = Depends(get_db),
+    format: str = "rows",
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Fetch paginated history for the authenticated user only"""
+    """
+    Fetch paginated history for the authenticated user only
+    
+    `format=columnar` returns one array per field instead of one object
+    per row, which keeps repeated keys off the wire.
+    
+    Note: `search` matches text in SQL, so it only finds thoughts stored
+    before encryption was enabled (ENCRYPT_THOUGHTS) and source URLs.
+    """
     try:
-        # Base query filtered by current user
-        query = db.query(Analysis).filter(Analysis.user_id == current_user.id)
+        from utils.encryption import decrypt_thoughts
         
-        # Filtering
-        if source_type:
-            query = query.filter(Analysis.source_type == source_type)
-        if emotion and emotion != 'all':
-            query = query.filter(Analysis.dominant_emotion == emotion)
-        if search:
-            search_query = f"%{search}%"
-            query = query.filter(
-                (Analysis.encrypted_text.ilike(search_query)) | 
-                (Analysis.source_url.ilike(search_query))
-            )
+        params = {
+            "page": page, "limit": limit, "source_type": source_type, "emotion": emotion,
+            "search": search, "start_date": start_date, "end_date": end_date, "format": format
+        }
         
-        # Date range filtering
-        if start_date:
-            try:
-                from datetime import datetime
-                s_date = datetime.fromisoformat(start_date)
-                query = query.filter(Analysis.timestamp >= s_date)
-            except ValueError:
-                pass
+        def build_page():
+            s_date, e_date = parse_history_dates(start_date, end_date)
+            query = history_query(db, current_user.id, source_type, emotion, search, s_date, e_date)
+
+            # Archived months are only read when the date range reaches back to them
+            archived = []
+            if s_date is not None:
+                from utils.archive import read_archived
+                archived = [
+                    row for row in read_archived(db, "analyses", current_user.id, s_date, e_date)
+                    if archived_row_matches(row, source_type, emotion, search)
+                ]
+
+            # Count total before limit/offset
+            total = query.count() + len(archived)
+            pages = (total + limit - 1) // limit
         
-        if end_date:
-            try:
-                from datetime import datetime
-                if 'T' not in end_date:
-                    end_date += 'T23:59:59'
-                e_date = datetime.fromisoformat(end_date)
-                query = query.filter(Analysis.timestamp <= e_date)
-            except ValueError:
-                pass
-
-        # Count total before limit/offset
-        total = query.count()
-        pages = (total + limit - 1) // limit
+            # Paginate
+            offset = (page - 1) * limit
+            ordered = query.order_by(Analysis.timestamp.desc())
+            if archived:
+                hot = [history_row(a) for a in ordered.limit(offset + limit).all()]
+                rows = sorted(hot + archived, key=lambda r: r["timestamp"], reverse=True)[offset:offset + limit]
+            else:
+                rows = [history_row(a) for a in ordered.limit(limit).offset(offset).all()]
         
-        # Paginate
-        offset = (page - 1) * limit
-        analyses = query.order_by(Analysis.timestamp.desc()).limit(limit).offset(offset).all()
+            # Decrypt the whole page in one batch (single cached key derivation)
+            texts = decrypt_thoughts(current_user.firebase_uid, [r["encrypted_text"] for r in rows])
         
-        return {
-            "items": [
+            items = [
                 {
-                    "id": a.id,
-                    "timestamp": a.timestamp,
-                    "emotion_scores": a.emotion_scores,
-                    "dominant_emotion": a.dominant_emotion,
-                    "source_type": a.source_type,
-                    "source_url": a.source_url,
-                    "text": a.encrypted_text,
-                    "agent_response": a.agent_response,
-                    "agent_mode": a.agent_mode
-                } for a in analyses
-            ],
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "pages": pages
-        }
+                    **{field: r[field] for field in HISTORY_FIELDS if field != "text"},
+                    "text": text
+                } for r, text in zip(rows, texts)
+            ]
+            
+            page_data = {"items": items} if format != "columnar" else {"columns": to_columns(items)}
+            return {
+                **page_data,
+                "total": total,
+                "page": page,
+                "limit": limit,
+                "pages": pages
+            }
+        
+        # 304 / cached body when nothing changed since the client's last poll
+        return versioned_json_response(request, current_user.id, "history", params, build_page)
     except Exception as e:
         logger.error(f"History fetch error: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch history")
 
 
+def summary_queries(db: Session, user_id: int, since) -> tuple:
+    """Analyses and mood logs read by the history summary"""
+    from models.database import MoodLog
+    
+    analyses = db.query(Analysis).filter(
+        Analysis.user_id == user_id,
+        Analysis.timestamp >= since
+    )
+    mood_logs = db.query(MoodLog).filter(
+        MoodLog.user_id == user_id,
+        MoodLog.created_at >= since
+    )
+    return analyses, mood_logs
+
+
 @router.get("/history/summary")
 async def get_history_summary(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Fetch heatmap summary for the authenticated user only"""
     try:
-        from sqlalchemy import func
-        from models.database import MoodLog
         from datetime import datetime, timedelta, timezone
         from collections import defaultdict
         
-        # Use UTC for consistency with database timestamps
-        six_months_ago = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=180)
+        def build_summary():
+            # Use UTC for consistency with database timestamps
+            six_months_ago = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=180)
         
-        # Filter both tables by current user
-        analyses = db.query(Analysis).filter(
-            Analysis.user_id == current_user.id,
-            Analysis.timestamp >= six_months_ago
-        ).all()
-        logger.info(f"📊 Found {len(analyses)} analyses for summary (User: {current_user.id})")
+            # Filter both tables by current user
+            analyses_query, mood_query = summary_queries(db, current_user.id, six_months_ago)
+            analyses = analyses_query.all()
+            logger.info(f"📊 Found {len(analyses)} analyses for summary (User: {current_user.id})")
         
-        daily_stats = defaultdict(lambda: {"count": 0, "emotions": defaultdict(list)})
+            daily_stats = defaultdict(lambda: {"count": 0, "emotions": defaultdict(list)})
         
-        # Process analyses
-        for a in analyses:
-            date_str = a.timestamp.date().isoformat()
-            daily_stats[date_str]["count"] += 1
-            if a.emotion_scores:
-                for emo, score in a.emotion_scores.items():
-                    daily_stats[date_str]["emotions"][emo].append(score)
+            # Process analyses
+            for a in analyses:
+                date_str = a.timestamp.date().isoformat()
+                daily_stats[date_str]["count"] += 1
+                if a.emotion_scores:
+                    for emo, score in a.emotion_scores.items():
+                        daily_stats[date_str]["emotions"][emo].append(score)
         
-        # Process mood logs
-        try:
-            mood_logs = db.query(MoodLog).filter(
-                MoodLog.user_id == current_user.id,
-                MoodLog.created_at >= six_months_ago
-            ).all()
+            # Process mood logs
+            try:
+                mood_logs = mood_query.all()
             
-            for log in mood_logs:
-                date_str = log.created_at.date().isoformat()
-                daily_stats[date_str]["count"] += 1
-                if log.mood_rating:
-                    proxy_emo = "joy" if log.mood_rating >= 4 else "sadness" if log.mood_rating <= 2 else "trust"
-                    daily_stats[date_str]["emotions"][proxy_emo].append(log.mood_rating / 5.0)
-        except Exception as inner_e:
-            logger.warning(f"MoodLog fetch error: {inner_e}")
+                for log in mood_logs:
+                    date_str = log.created_at.date().isoformat()
+                    daily_stats[date_str]["count"] += 1
+                    if log.mood_rating:
+                        proxy_emo = "joy" if log.mood_rating >= 4 else "sadness" if log.mood_rating <= 2 else "trust"
+                        daily_stats[date_str]["emotions"][proxy_emo].append(log.mood_rating / 5.0)
+            except Exception as inner_e:
+                logger.warning(f"MoodLog fetch error: {inner_e}")
         
-        summary = []
-        for date_str, stats in daily_stats.items():
-            avg_emotions = {emo: sum(scores)/len(scores) for emo, scores in stats["emotions"].items()}
+            summary = []
+            for date_str, stats in daily_stats.items():
+                avg_emotions = {emo: sum(scores)/len(scores) for emo, scores in stats["emotions"].items()}
             
-            if not avg_emotions:
+                if not avg_emotions:
+                    summary.append({
+                        "date": date_str, "count": stats["count"], "intensity": 0.3, "dominant_emotion": "trust"
+                    })
+                    continue
+
+                dominant = max(avg_emotions.items(), key=lambda x: x[1])
                 summary.append({
-                    "date": date_str, "count": stats["count"], "intensity": 0.3, "dominant_emotion": "trust"
+                    "date": date_str, "count": stats["count"], "intensity": dominant[1], "dominant_emotion": dominant[0]
                 })
-                continue
-
-            dominant = max(avg_emotions.items(), key=lambda x: x[1])
-            summary.append({
-                "date": date_str, "count": stats["count"], "intensity": dominant[1], "dominant_emotion": dominant[0]
-            })
             
-        return summary
+            return summary
+        
+        # The 180-day window moves daily, so the day is part of the cache key
+        params = {"day": datetime.now(timezone.utc).date().isoformat()}
+        return versioned_json_response(request, current_user.id, "summary", params, build_summary)
     except Exception as e:
         logger.error(f"Summary fetch error: {e}")
-        return []
+        return FastJSONResponse([])
+
+
+@router.get("/history/similar")
+async def get_similar_entries(
+    text: Optional[str] = None,
+    analysis_id: Optional[int] = None,
+    limit: int = 5,
+    db: Session = Depends(get_read_db),
+    classifier = Depends(get_emotion_classifier),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Find past entries that read most like a text or an existing analysis
+    
+    Pass either `text` (embedded on the fly) or `analysis_id`. Results are
+    ranked by cosine similarity of the stored embeddings.
+    """
+    try:
+        from fastapi.concurrency import run_in_threadpool
+        from utils.embeddings import embed_texts, get_embedding_index, load_user_vectors
+        from utils.encryption import decrypt_thoughts
+        from utils.sentences import classifier_name
+        
+        if not text and analysis_id is None:
+            raise HTTPException(status_code=400, detail="Provide text or analysis_id")
+        limit = min(max(limit, 1), 50)
+        
+        model_name = classifier_name(classifier)
+        vectors = await run_in_threadpool(
+            get_embedding_index().get, current_user.id, model_name,
+            lambda: load_user_vectors(db, current_user.id, model_name)
+        )
+        
+        if analysis_id is not None:
+            query = vectors.vector_for(analysis_id)
+            if query is None:
+                raise HTTPException(status_code=404, detail="No embedding for this analysis")
+        else:
+            query = (await run_in_threadpool(admission.run, embed_texts, classifier, [text]))[0]
+        
+        matches = vectors.search(query, limit, exclude_id=analysis_id)
+        
+        # Rows may have been deleted since they were indexed
+        rows = {
+            a.id: a for a in db.query(Analysis).filter(
+                Analysis.user_id == current_user.id,
+                Analysis.id.in_([match_id for match_id, _ in matches])
+            )
+        }
+        found = [(rows[match_id], similarity) for match_id, similarity in matches if match_id in rows]
+        texts = decrypt_thoughts(current_user.firebase_uid, [a.encrypted_text for a, _ in found])
+        
+        return {
+            "items": [
+                {
+                    "id": a.id,
+                    "timestamp": a.timestamp,
+                    "similarity": round(similarity, 4),
+                    "emotion_scores": a.emotion_scores,
+                    "dominant_emotion": a.dominant_emotion,
+                    "text": decrypted
+                } for (a, similarity), decrypted in zip(found, texts)
+            ]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Similarity search error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to search history")
@@ -0,0 +1,252 @@
+"""
+History Export Routes
+Streams a user's full analysis and mood history as NDJSON, CSV or Parquet
+"""
+
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from typing import Dict, Iterator, List, Optional
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+from models.connection import read_session_factory
+from models.database import Analysis, MoodLog, User
+from utils.auth import get_current_user
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Rows fetched per server-side cursor batch and serialized per chunk
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 500))
+
+EMOTIONS = ["joy", "sadness", "anger", "fear", "trust", "disgust", "surprise", "anticipation"]
+
+# Flat column layout shared by CSV and Parquet (NDJSON keeps emotion_scores nested)
+FLAT_COLUMNS = [
+    "record_type", "id", "timestamp", "source_type", "source_url", "text", "dominant_emotion",
+    *[f"emotion_{e}" for e in EMOTIONS],
+    "agent_mode", "agent_response",
+    "mood_rating", "trigger_tag", "nuance_tag", "activity_type", "duration"
+]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+
+def iter_history_chunks(user: User, chunk_size: Optional[int] = None) -> Iterator[List[Dict]]:
+    """
+    Yield the user's history in chunks using server-side cursors (chunk_size defaults to EXPORT_CHUNK_SIZE)
+
+    Analyses come first, then mood logs, each in chronological order
+    (archived months before the hot tables).
+    A dedicated session is used because the response outlives the request
+    dependencies; it reads from the replica when one is configured. Each
+    batch is expunged once yielded (expunge_all would invalidate the
+    identity map the open yield_per cursor is loading into).
+    """
+    from types import SimpleNamespace
+    from utils.archive import iter_archived
+    from utils.encryption import decrypt_thoughts
+
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+
+    def analysis_records(batch):
+        texts = decrypt_thoughts(user.firebase_uid, [a.encrypted_text for a in batch])
+        return [
+            {
+                "record_type": "analysis",
+                "id": a.id,
+                "timestamp": a.timestamp.isoformat() if a.timestamp else None,
+                "source_type": a.source_type.value if a.source_type else None,
+                "source_url": a.source_url,
+                "text": text,
+                "dominant_emotion": a.dominant_emotion,
+                "emotion_scores": a.emotion_scores,
+                "agent_mode": a.agent_mode,
+                "agent_response": a.agent_response
+            } for a, text in zip(batch, texts)
+        ]
+
+    def mood_records(batch):
+        return [
+            {
+                "record_type": "mood_log",
+                "id": log.id,
+                "timestamp": log.created_at.isoformat() if log.created_at else None,
+                "mood_rating": log.mood_rating,
+                "trigger_tag": log.trigger_tag,
+                "nuance_tag": log.nuance_tag,
+                "activity_type": log.activity_type,
+                "duration": log.duration
+            } for log in batch
+        ]
+
+    db = read_session_factory(user.id)()
+    try:
+        # Archived months are older than anything in the hot tables
+        for rows in iter_archived(db, "analyses", user.id):
+            yield analysis_records([SimpleNamespace(**row) for row in rows])
+
+        analyses = db.execute(
+            select(Analysis)
+            .where(Analysis.user_id == user.id)
+            .order_by(Analysis.timestamp)
+            .execution_options(yield_per=chunk_size)
+        ).scalars()
+        for batch in analyses.partitions():
+            yield analysis_records(batch)
+            for row in batch:
+                db.expunge(row)
+
+        for rows in iter_archived(db, "mood_logs", user.id):
+            yield mood_records([SimpleNamespace(**row) for row in rows])
+
+        mood_logs = db.execute(
+            select(MoodLog)
+            .where(MoodLog.user_id == user.id)
+            .order_by(MoodLog.created_at)
+            .execution_options(yield_per=chunk_size)
+        ).scalars()
+        for batch in mood_logs.partitions():
+            yield mood_records(batch)
+            for row in batch:
+                db.expunge(row)
+    finally:
+        db.close()
+
+
+def flatten_record(record: Dict) -> Dict:
+    """Spread emotion_scores into one column per emotion"""
+    flat = {column: record.get(column) for column in FLAT_COLUMNS}
+    scores = record.get("emotion_scores") or {}
+    for emotion in EMOTIONS:
+        flat[f"emotion_{emotion}"] = scores.get(emotion)
+    return flat
+
+
+def serialize_ndjson(chunks: Iterator[List[Dict]]) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield "".join(json.dumps(record, default=str) + "\n" for record in chunk).encode("utf-8")
+
+
+def serialize_csv(chunks: Iterator[List[Dict]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FLAT_COLUMNS)
+    writer.writeheader()
+    for chunk in chunks:
+        writer.writerows(flatten_record(record) for record in chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only stream whose buffered bytes can be drained while keeping a running offset"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def serialize_parquet(chunks: Iterator[List[Dict]]) -> Iterator[bytes]:
+    """Write one Parquet row group per chunk, yielding bytes as they are produced"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [("record_type", pa.string()), ("id", pa.int64()), ("timestamp", pa.string()),
+         ("source_type", pa.string()), ("source_url", pa.string()), ("text", pa.string()),
+         ("dominant_emotion", pa.string())]
+        + [(f"emotion_{e}", pa.float64()) for e in EMOTIONS]
+        + [("agent_mode", pa.string()), ("agent_response", pa.string()),
+           ("mood_rating", pa.int64()), ("trigger_tag", pa.string()), ("nuance_tag", pa.string()),
+           ("activity_type", pa.string()), ("duration", pa.int64())]
+    )
+
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pylist([flatten_record(r) for r in chunk], schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def gzip_stream(stream: Iterator[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for data in stream:
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+@router.get("/history/export")
+async def export_history(
+    format: str = "ndjson",
+    gzip: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export the authenticated user's full history as a streamed file
+
+    Memory stays flat regardless of history size: rows are read through a
+    server-side cursor and serialized chunk by chunk. With `gzip=true` the
+    file itself is gzip-compressed on the fly.
+    """
+    serializers = {"ndjson": serialize_ndjson, "csv": serialize_csv, "parquet": serialize_parquet}
+    if format not in serializers:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+    if format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+
+    stream = serializers[format](iter_history_chunks(current_user))
+    filename = f"emotion-history.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        stream = gzip_stream(stream)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    logger.info(f"📦 Exporting history for user {current_user.id} as {filename}")
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,231 @@
+"""
+History Import Routes
+Bulk-imports timestamped journal entries from other apps as background jobs
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlalchemy import insert
+from typing import Dict, Iterator, Optional, TextIO, Tuple
+from datetime import datetime, timezone
+import csv
+import json
+import logging
+import os
+import tempfile
+from models.database import Analysis, User, SourceType
+from routes.analyze import get_emotion_classifier, normalize_emotion_scores
+from utils.agent_templates import get_mode, render_batch
+from utils.auth import get_current_user
+from utils.ratelimit import rate_limited_user
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Entries classified and inserted per database batch
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 64))
+# Upload size limit in bytes
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", 200 * 1024 * 1024))
+# Parse errors kept in the job progress for the caller to inspect
+MAX_REPORTED_ERRORS = 20
+# Width of analyses.agent_mode
+AGENT_MODE_MAX_LENGTH = Analysis.__table__.c.agent_mode.type.length
+
+
+def parse_timestamp(value: Optional[str]) -> datetime:
+    """Parse an ISO-8601 timestamp into naive UTC (the convention used by the tables)"""
+    if not value:
+        raise ValueError("missing timestamp")
+    if not isinstance(value, str):
+        raise ValueError("expected an ISO-8601 string")
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def iter_entries(f: TextIO, fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Stream entries from an uploaded file
+
+    Yields:
+        (line number, entry dict or None, error message or None)
+    """
+    if fmt == "csv":
+        for row in csv.DictReader(f):
+            yield 0, row, None
+        return
+
+    for line_no, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+            if not isinstance(entry, dict):
+                raise ValueError("expected a JSON object")
+            yield line_no, entry, None
+        except ValueError as e:
+            yield line_no, None, str(e)
+
+
+def _import_job(job, path: str, fmt: str, user_id: int, user_salt: str, classifier) -> dict:
+    """Background worker: parse, batch-classify and bulk-insert imported entries"""
+    from models.connection import SessionLocal
+    from utils.embeddings import index_analyses
+    from utils.encryption import encrypt_thought
+    from utils.ratelimit import admission
+    from utils.sentences import classify_batch, scoring_model
+    from utils.versioning import bump_versions
+
+    total_bytes = os.path.getsize(path) or 1
+    progress = {"processed": 0, "imported": 0, "skipped": 0, "percent": 0.0, "errors": []}
+    job.progress = progress
+    model = scoring_model(classifier)
+
+    def skip(where, reason):
+        progress["skipped"] += 1
+        if len(progress["errors"]) < MAX_REPORTED_ERRORS:
+            progress["errors"].append(f"{where}: {reason}")
+
+    def flush(batch, db):
+        if not batch:
+            return
+        # Queue behind live requests for the model (never shed: the job just waits)
+        raw_outputs = admission.run(classify_batch, classifier, [e["text"] for e in batch], shed=False)
+        scored = []
+        for entry, raw in zip(batch, raw_outputs):
+            scores = normalize_emotion_scores(raw).model_dump()
+            scored.append((entry["agent_mode"], max(scores, key=scores.get), scores))
+        responses = render_batch(scored)
+
+        rows = []
+        for entry, (mode, dominant, scores), agent_response in zip(batch, scored, responses):
+            rows.append({
+                "user_id": user_id,
+                "encrypted_text": encrypt_thought(user_salt, entry["text"]),
+                "emotion_scores": scores,
+                "dominant_emotion": dominant,
+                "source_type": SourceType.TEXT,
+                "agent_mode": mode,
+                "agent_response": agent_response,
+                "timestamp": entry["timestamp"],
+                **model
+            })
+        analysis_ids = db.scalars(insert(Analysis).returning(Analysis.id, sort_by_parameter_order=True), rows).all()
+        db.commit()
+        # Core bulk inserts bypass the session hooks that bump data versions
+        bump_versions([user_id])
+        progress["imported"] += len(rows)
+
+        try:
+            admission.run(index_analyses, db, classifier, user_id, analysis_ids, [e["text"] for e in batch], shed=False)
+        except Exception as e:
+            logger.error(f"❌ Embedding failed for imported batch: {e}")
+            db.rollback()
+
+    db = SessionLocal()
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            batch = []
+            for index, (line_no, entry, error) in enumerate(iter_entries(f, fmt), start=1):
+                progress["processed"] += 1
+                where = f"line {line_no}" if line_no else f"row {index}"
+                if error:
+                    skip(where, error)
+                    continue
+                text = entry.get("text") or ""
+                if not isinstance(text, str):
+                    skip(where, "text must be a string")
+                    continue
+                text = text.strip()
+                if not text:
+                    skip(where, "missing text")
+                    continue
+                try:
+                    timestamp = parse_timestamp(entry.get("timestamp"))
+                except (ValueError, TypeError) as e:
+                    skip(where, f"invalid timestamp ({e})")
+                    continue
+                # One bad value would fail the bulk insert of the whole batch
+                agent_mode = entry.get("agent_mode") or "analytical"
+                known = isinstance(agent_mode, str) and get_mode(agent_mode) is not None
+                if not known or len(agent_mode) > AGENT_MODE_MAX_LENGTH:
+                    skip(where, f"unknown agent_mode {agent_mode!r}")
+                    continue
+
+                batch.append({
+                    "text": text,
+                    "timestamp": timestamp,
+                    "agent_mode": agent_mode
+                })
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    flush(batch, db)
+                    batch = []
+                    progress["percent"] = round(min(f.buffer.tell(), total_bytes) / total_bytes * 100, 1)
+            flush(batch, db)
+        progress["percent"] = 100.0
+        logger.info(f"✅ Imported {progress['imported']} entries for user {user_id} ({progress['skipped']} skipped)")
+        return {"imported": progress["imported"], "skipped": progress["skipped"]}
+    finally:
+        db.close()
+        os.unlink(path)
+
+
+@router.post("/history/import", status_code=202)
+async def import_history(
+    request: Request,
+    format: Optional[str] = None,
+    classifier = Depends(get_emotion_classifier),
+    current_user: User = Depends(rate_limited_user)
+):
+    """
+    Import timestamped journal entries in bulk
+
+    The request body is the raw file: NDJSON (one {"timestamp", "text",
+    "agent_mode"?} object per line) or CSV with the same columns. It is
+    streamed to disk and processed by a background job; poll
+    /api/history/import/{job_id} for progress.
+    """
+    from utils.jobs import get_job_queue
+
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if fmt not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+
+    received = 0
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=f".{fmt}")
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > IMPORT_MAX_BYTES:
+                raise HTTPException(status_code=413, detail="Import file too large")
+            tmp.write(chunk)
+        tmp.close()
+    except BaseException:
+        tmp.close()
+        os.unlink(tmp.name)
+        raise
+
+    if received == 0:
+        os.unlink(tmp.name)
+        raise HTTPException(status_code=400, detail="Empty import file")
+
+    job = get_job_queue().submit(
+        _import_job, tmp.name, fmt, current_user.id, current_user.firebase_uid, classifier,
+        owner_id=current_user.id
+    )
+    return {"job_id": job.id, "status": job.status}
+
+
+@router.get("/history/import/{job_id}")
+async def get_import_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Report progress of an import job"""
+    from utils.jobs import get_job_queue
+
+    job = get_job_queue().get(job_id)
+    if job is None or job.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -3,14 +3,18 @@ Mood Check-in Routes
 Handles quick mood logging and self-care activity history
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Depends, Request
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
 import logging
+import os
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from models.connection import get_db
-from models.database import MoodLog, User
-from datetime import datetime
+from models.database import MoodLog, MoodSyncKey, User
+from datetime import datetime, timezone
+from utils.versioning import versioned_json_response
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +27,23 @@ class MoodCheckInRequest(BaseModel):
     activity_type: Optional[str] = None
     duration: Optional[int] = None
 
-from utils.auth import get_current_user
+
+class MoodSyncEntry(MoodCheckInRequest):
+    """A check-in queued on the client while offline"""
+    idempotency_key: str = Field(..., min_length=1, max_length=64)
+    client_timestamp: Optional[datetime] = None
+
+
+class MoodSyncRequest(BaseModel):
+    entries: List[MoodSyncEntry]
+
+
+# Largest batch accepted by /mood/sync
+MOOD_SYNC_MAX_ENTRIES = int(os.getenv("MOOD_SYNC_MAX_ENTRIES", 1000))
+# Keys per IN (...) lookup, below SQLite's bound-parameter limit
+_KEY_LOOKUP_CHUNK = 500
+
+from utils.auth import get_current_user, get_read_db
 
 @router.post("/mood/check-in")
 async def mood_check_in(
@@ -57,48 +77,180 @@ async def mood_check_in(
         logger.error(f"Mood check-in error: {e}")
         raise HTTPException(status_code=500, detail="Failed to save mood check-in")
 
+def sync_timestamp(value: Optional[datetime], now: datetime) -> datetime:
+    """Client timestamp as naive UTC, clamped to the server clock (missing = now)"""
+    if value is None:
+        return now
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(value, now)
+
+
+def existing_keys(db: Session, user_id: int, keys: List[str]) -> Dict[str, int]:
+    """Server ids of a user's check-ins already stored under these idempotency keys"""
+    found = {}
+    for offset in range(0, len(keys), _KEY_LOOKUP_CHUNK):
+        rows = db.execute(select(MoodSyncKey.idempotency_key, MoodSyncKey.mood_log_id).where(
+            MoodSyncKey.user_id == user_id,
+            MoodSyncKey.idempotency_key.in_(keys[offset:offset + _KEY_LOOKUP_CHUNK])
+        ))
+        found.update({key: log_id for key, log_id in rows})
+    return found
+
+
+def sync_mood_logs(db: Session, user_id: int, entries: List[MoodSyncEntry]) -> List[Dict]:
+    """
+    Store a batch of offline check-ins in one transaction
+
+    Entries whose idempotency key is already stored (a retried sync) or
+    repeated within the batch are not inserted again; they resolve to the
+    existing server id. Keys are claimed in mood_sync_keys in the same
+    transaction, so a concurrent sync of the same entries fails with
+    IntegrityError instead of inserting them twice.
+
+    Returns:
+        One {"idempotency_key", "id", "status"} item per entry, in order
+    """
+    now = datetime.utcnow()
+    keys = list(dict.fromkeys(entry.idempotency_key for entry in entries))
+    ids = existing_keys(db, user_id, keys)
+    duplicates = set(ids)
+
+    new_entries = {}
+    for entry in entries:
+        if entry.idempotency_key not in ids and entry.idempotency_key not in new_entries:
+            new_entries[entry.idempotency_key] = entry
+
+    if new_entries:
+        rows = [
+            {
+                "user_id": user_id,
+                "mood_rating": entry.mood_rating,
+                "trigger_tag": entry.trigger_tag,
+                "nuance_tag": entry.nuance_tag,
+                "activity_type": entry.activity_type,
+                "duration": entry.duration,
+                "idempotency_key": key,
+                "created_at": sync_timestamp(entry.client_timestamp, now)
+            } for key, entry in new_entries.items()
+        ]
+        new_ids = db.scalars(insert(MoodLog).returning(MoodLog.id, sort_by_parameter_order=True), rows).all()
+        ids.update(zip(new_entries, new_ids))
+        db.execute(insert(MoodSyncKey), [
+            {"user_id": user_id, "idempotency_key": key, "mood_log_id": ids[key], "created_at": now}
+            for key in new_entries
+        ])
+    db.commit()
+
+    items, reported = [], set()
+    for entry in entries:
+        key = entry.idempotency_key
+        # Later repeats of a key within the batch are duplicates of its first occurrence
+        status = "duplicate" if key in duplicates or key in reported else "created"
+        reported.add(key)
+        items.append({"idempotency_key": key, "id": ids[key], "status": status})
+    return items
+
+
+@router.post("/mood/sync")
+async def mood_sync(
+    request: MoodSyncRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Sync check-ins queued while offline in a single round-trip
+
+    Safe to retry: entries are deduplicated by idempotency key, so
+    re-sending a batch whose response was lost creates nothing new.
+    """
+    if len(request.entries) > MOOD_SYNC_MAX_ENTRIES:
+        raise HTTPException(status_code=413, detail=f"At most {MOOD_SYNC_MAX_ENTRIES} entries per sync")
+    if not request.entries:
+        return {"status": "success", "created": 0, "duplicates": 0, "items": []}
+
+    try:
+        from fastapi.concurrency import run_in_threadpool
+        from utils.versioning import bump_versions
+        
+        try:
+            items = await run_in_threadpool(sync_mood_logs, db, current_user.id, request.entries)
+        except IntegrityError:
+            # A concurrent sync of the same entries won the race; its rows are now visible
+            db.rollback()
+            items = await run_in_threadpool(sync_mood_logs, db, current_user.id, request.entries)
+        
+        created = sum(1 for item in items if item["status"] == "created")
+        if created:
+            # Core bulk inserts bypass the session hooks that bump data versions
+            bump_versions([current_user.id])
+        
+        return {
+            "status": "success",
+            "created": created,
+            "duplicates": len(items) - created,
+            "items": items
+        }
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Mood sync error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to sync mood check-ins")
+
+
+def mood_history_query(db: Session, user_id: int):
+    """A user's mood logs (unordered, unpaginated)"""
+    return db.query(MoodLog).filter(MoodLog.user_id == user_id)
+
+
 @router.get("/mood/history")
 async def get_mood_history(
+    request: Request,
     page: int = 1,
     limit: int = 20,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Fetch recent mood check-ins for the authenticated user only
     """
     try:
-        offset = (page - 1) * limit
+        def build_page():
+            offset = (page - 1) * limit
         
-        # Query logs filtered by current user
-        total_logs = db.query(MoodLog).filter(MoodLog.user_id == current_user.id).count()
+            # Query logs filtered by current user
+            query = mood_history_query(db, current_user.id)
+            total_logs = query.count()
         
-        logs = db.query(MoodLog)\
-            .filter(MoodLog.user_id == current_user.id)\
-            .order_by(MoodLog.created_at.desc())\
-            .offset(offset)\
-            .limit(limit)\
-            .all()
+            logs = query\
+                .order_by(MoodLog.created_at.desc())\
+                .offset(offset)\
+                .limit(limit)\
+                .all()
         
-        total_pages = (total_logs + limit - 1) // limit
+            total_pages = (total_logs + limit - 1) // limit
         
-        return {
-            "items": [
-                {
-                    "id": log.id,
-                    "mood_rating": log.mood_rating,
-                    "trigger_tag": log.trigger_tag,
-                    "nuance_tag": log.nuance_tag,
-                    "activity_type": log.activity_type,
-                    "duration": log.duration,
-                    "created_at": log.created_at
-                } for log in logs
-            ],
-            "total": total_logs,
-            "page": page,
-            "pages": total_pages,
-            "limit": limit
-        }
+            return {
+                "items": [
+                    {
+                        "id": log.id,
+                        "mood_rating": log.mood_rating,
+                        "trigger_tag": log.trigger_tag,
+                        "nuance_tag": log.nuance_tag,
+                        "activity_type": log.activity_type,
+                        "duration": log.duration,
+                        "created_at": log.created_at
+                    } for log in logs
+                ],
+                "total": total_logs,
+                "page": page,
+                "pages": total_pages,
+                "limit": limit
+            }
+        
+        # 304 / cached body when nothing changed since the client's last poll
+        return versioned_json_response(
+            request, current_user.id, "mood_history", {"page": page, "limit": limit}, build_page
+        )
     except Exception as e:
         logger.error(f"Mood history error: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch mood history")
@@ -0,0 +1,54 @@
+"""
+Profiling Admin Routes
+Captured request profiles: summaries, SQL timings and folded stacks for flamegraphs
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from utils import profiling
+
+router = APIRouter()
+
+
+def require_profiling_admin(x_profile_token: Optional[str] = Header(None)) -> None:
+    """Allow only callers holding PROFILING_TOKEN; the routes do not exist while it is unset"""
+    if not profiling.PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is not enabled")
+    if not profiling.is_admin_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+def _get_profile(profile_id: int) -> profiling.Profile:
+    profile = profiling.get_profile_store().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (it may have been evicted)")
+    return profile
+
+
+@router.get("/admin/profiles", dependencies=[Depends(require_profiling_admin)])
+async def list_profiles():
+    """Captured profiles, newest first"""
+    return {"items": [p.summary() for p in profiling.get_profile_store().list()]}
+
+
+@router.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_profiling_admin)])
+async def get_profile(profile_id: int, top: int = 20):
+    """One profile with its SQL statements and heaviest stacks"""
+    return _get_profile(profile_id).to_dict(top_stacks=min(max(top, 1), 500))
+
+
+@router.get("/admin/profiles/{profile_id}/folded", dependencies=[Depends(require_profiling_admin)])
+async def get_profile_folded(profile_id: int):
+    """
+    Folded stacks of one profile
+
+    Pipe into flamegraph.pl or inferno-flamegraph, or open in speedscope.
+    """
+    profile = _get_profile(profile_id)
+    return PlainTextResponse(
+        profile.folded(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.folded"'}
+    )
@@ -0,0 +1,155 @@
+"""
+Live Journaling Stream Routes
+WebSocket endpoint that re-scores text incrementally while the user types
+"""
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+import asyncio
+import logging
+import math
+import os
+import time
+from models.connection import SessionLocal
+from routes.analyze import EmotionScores, get_dominant_emotion
+from utils.auth import get_current_user
+from utils.ratelimit import admission, get_rate_limiter
+from utils.sentences import split_sentences, score_sentences, aggregate_scores, get_sentence_cache
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Debounce window (seconds of keyboard silence before re-scoring)
+STREAM_DEBOUNCE_SECONDS = float(os.getenv("STREAM_DEBOUNCE_SECONDS", 0.4))
+# Upper bound on how long continuous typing can postpone an update
+STREAM_MAX_WAIT_SECONDS = float(os.getenv("STREAM_MAX_WAIT_SECONDS", 2.0))
+# Hard cap on document size accepted over the stream
+STREAM_MAX_CHARS = int(os.getenv("STREAM_MAX_CHARS", 20000))
+
+
+def score_document(classifier, text: str) -> dict:
+    """
+    Score a draft using the shared sentence cache
+
+    Only sentences that are not already cached go through the model,
+    so the cost of a keystroke is bounded by the edited sentence window.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return {"emotion_scores": None, "dominant_emotion": None, "intensity": 0.0, "sentences": 0, "rescored": 0}
+
+    sentence_scores, rescored = score_sentences(classifier, sentences, get_sentence_cache())
+    emotion_scores = EmotionScores(**aggregate_scores(sentences, sentence_scores))
+    dominant_emotion, intensity = get_dominant_emotion(emotion_scores)
+
+    return {
+        "emotion_scores": emotion_scores.model_dump(),
+        "dominant_emotion": dominant_emotion,
+        "intensity": intensity,
+        "sentences": len(sentences),
+        "rescored": rescored
+    }
+
+
+async def _authenticate(token: Optional[str]):
+    """Resolve the user for a WebSocket (browsers cannot set Authorization headers)"""
+    db = SessionLocal()
+    try:
+        return await get_current_user(authorization=f"Bearer {token}" if token else None, db=db)
+    finally:
+        db.close()
+
+
+@router.websocket("/analyze/stream")
+async def analyze_stream(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Stream emotion scores for a draft as it is being written
+
+    Client messages (JSON):
+        {"text": "..."}    replace the draft with the full current text
+        {"append": "..."}  append characters to the draft
+        {"flush": true}    score immediately, bypassing the debounce window
+
+    Server messages carry emotion_scores, dominant_emotion, intensity and
+    how many sentences had to be re-scored for that update.
+    """
+    from main import ml_models
+
+    try:
+        user = await _authenticate(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+
+    classifier = ml_models.get("emotion_classifier")
+    if classifier is None:
+        await websocket.send_json({"error": "AI model not loaded"})
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+
+    text = ""
+    pending_since: Optional[float] = None
+
+    async def push_update():
+        # Every update may run inference, so it draws on the same per-user bucket as /analyze
+        try:
+            allowed, retry_after = get_rate_limiter().acquire(str(user.id))
+        except Exception as e:
+            logger.error(f"❌ Rate limiter error: {e}")
+            allowed = True
+        if not allowed:
+            await websocket.send_json({"error": "Rate limit exceeded", "retry_after": max(1, math.ceil(retry_after))})
+            return
+        try:
+            result = await run_in_threadpool(admission.run, score_document, classifier, text)
+        except HTTPException as e:
+            # Inference queue full: keep the stream open, the next update retries
+            await websocket.send_json({"error": e.detail, "retry_after": int(e.headers["Retry-After"])})
+            return
+        await websocket.send_json(result)
+
+    try:
+        while True:
+            timeout = None
+            if pending_since is not None:
+                remaining_budget = STREAM_MAX_WAIT_SECONDS - (time.monotonic() - pending_since)
+                timeout = max(min(STREAM_DEBOUNCE_SECONDS, remaining_budget), 0)
+
+            try:
+                message = await asyncio.wait_for(websocket.receive_json(), timeout=timeout)
+            except asyncio.TimeoutError:
+                # Debounce window elapsed (or max wait reached) - score the latest draft
+                pending_since = None
+                await push_update()
+                continue
+            except ValueError:
+                # Frame was not valid JSON
+                message = None
+
+            if not isinstance(message, dict):
+                await websocket.send_json({"error": "Expected a JSON object"})
+                continue
+
+            if "text" in message:
+                text = str(message["text"])
+            elif "append" in message:
+                text += str(message["append"])
+
+            if len(text) > STREAM_MAX_CHARS:
+                text = text[:STREAM_MAX_CHARS]
+
+            if message.get("flush"):
+                pending_since = None
+                await push_update()
+            elif pending_since is None:
+                pending_since = time.monotonic()
+
+    except WebSocketDisconnect:
+        logger.info("Live journaling stream closed by client")
+    except Exception as e:
+        logger.error(f"Stream analysis error: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
@@ -0,0 +1,58 @@
+"""
+Agent response template tests
+"""
+
+import pytest
+from routes.analyze import EmotionScores, generate_agent_response
+from utils.agent_templates import (
+    DEFAULT_RESPONSE, intensity_band, register_mode, render_batch, render_response, _modes
+)
+
+EMOTIONS = list(EmotionScores.model_fields)
+
+
+def scores_with(emotion: str, value: float) -> dict:
+    scores = {e: 0.01 for e in EMOTIONS}
+    scores[emotion] = value
+    return scores
+
+
+def test_existing_responses_are_unchanged():
+    scores = EmotionScores(**scores_with("anger", 0.5))
+    assert generate_agent_response(scores, "analytical", "anger") == (
+        "Anger detected at 50.0%. Consider identifying specific triggers to address the root cause."
+    )
+    assert generate_agent_response(scores, "brutally_honest", "anger") == (
+        "You're angry. That's clear. Now, what are you going to do about it?"
+    )
+    assert generate_agent_response(scores, "unknown", "anger") == DEFAULT_RESPONSE
+
+
+@pytest.mark.parametrize("mode", ["counselor", "analytical", "brutally_honest"])
+@pytest.mark.parametrize("emotion", EMOTIONS)
+@pytest.mark.parametrize("value", [0.2, 0.5, 0.9])
+def test_every_emotion_and_band_has_a_response(mode, emotion, value):
+    assert render_response(mode, emotion, scores_with(emotion, value)) != DEFAULT_RESPONSE
+
+
+def test_intensity_bands():
+    assert [intensity_band(v) for v in (0.1, 0.4, 0.69, 0.7, 1.0)] == ["low", "medium", "medium", "high", "high"]
+    low = render_response("counselor", "sadness", scores_with("sadness", 0.3))
+    high = render_response("counselor", "sadness", scores_with("sadness", 0.95))
+    assert low != high
+
+
+def test_register_custom_mode_and_batch():
+    try:
+        register_mode("coach", {"joy": {"high": "Huge win at {joy:.0%}!", "*": "Nice."}}, default="Keep going.")
+        items = [
+            ("coach", "joy", scores_with("joy", 0.9)),
+            ("coach", "joy", scores_with("joy", 0.3)),
+            ("coach", "fear", scores_with("fear", 0.9)),
+            ("analytical", "fear", scores_with("fear", 0.9)),
+        ]
+        assert render_batch(items) == [
+            "Huge win at 90%!", "Nice.", "Keep going.", render_response("analytical", "fear", items[3][2])
+        ]
+    finally:
+        _modes.pop("coach", None)
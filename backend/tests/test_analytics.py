@@ -0,0 +1,101 @@
+"""
+Emotion-vector index and analytics route tests
+"""
+
+import uuid
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from models.connection import init_db, SessionLocal
+from models.database import Analysis, User, SourceType
+from utils.auth import get_current_user
+from utils.emotion_index import EMOTIONS, kmeans, get_emotion_index
+
+HAPPY = {"joy": 0.9, "trust": 0.3}
+SAD = {"sadness": 0.8, "fear": 0.2}
+
+
+def make_scores(base):
+    return {emotion: base.get(emotion, 0.01) for emotion in EMOTIONS}
+
+
+@pytest.fixture
+def seeded_user():
+    init_db()
+    get_emotion_index().clear()
+    db = SessionLocal()
+    user = User(firebase_uid=f"analytics-{uuid.uuid4().hex}", email="analytics@example.com")
+    db.add(user)
+    db.commit()
+
+    start = datetime(2026, 1, 1, 12)
+    # Alternate happy and sad days; day 0 has an extra happy entry
+    rows = [(start, HAPPY), (start + timedelta(hours=1), HAPPY)]
+    rows += [(start + timedelta(days=d), HAPPY if d % 2 == 0 else SAD) for d in range(1, 8)]
+    analyses = []
+    for timestamp, base in rows:
+        scores = make_scores(base)
+        analyses.append(Analysis(
+            user_id=user.id, emotion_scores=scores, dominant_emotion=max(scores, key=scores.get),
+            source_type=SourceType.TEXT, timestamp=timestamp
+        ))
+    db.add_all(analyses)
+    db.commit()
+    ids = [a.id for a in analyses]
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app), ids
+    app.dependency_overrides.clear()
+
+
+def test_kmeans_separates_clusters():
+    rng = np.random.default_rng(0)
+    points = np.vstack([rng.normal(0, 0.05, (20, 2)), rng.normal(1, 0.05, (20, 2))])
+    _, labels = kmeans(points, 2)
+    assert len(set(labels[:20])) == 1 and len(set(labels[20:])) == 1
+    assert labels[0] != labels[-1]
+
+
+def test_similar_entries_and_days(seeded_user):
+    client, ids = seeded_user
+    items = client.get(f"/api/analytics/similar/{ids[0]}", params={"limit": 3}).json()["items"]
+    assert len(items) == 3
+    assert all(item["dominant_emotion"] == "joy" for item in items)
+    assert ids[0] not in [item["id"] for item in items]
+
+    days = client.get(f"/api/analytics/similar/{ids[0]}", params={"by": "day", "limit": 10}).json()["items"]
+    assert "2026-01-01" not in [d["date"] for d in days]
+    assert [d["date"] for d in days[:3]] == ["2026-01-03", "2026-01-05", "2026-01-07"]
+
+    assert client.get("/api/analytics/similar/999999999").status_code == 404
+
+
+def test_mood_states_cluster_days(seeded_user):
+    client, _ = seeded_user
+    data = client.get("/api/analytics/mood-states", params={"k": 2}).json()
+    assert sorted(s["dominant_emotion"] for s in data["states"]) == ["joy", "sadness"]
+    assert sum(s["days"] for s in data["states"]) == len(data["days"]) == 8
+
+
+def test_index_reloads_after_write(seeded_user, monkeypatch):
+    monkeypatch.setattr("utils.versioning.DATA_VERSIONS_SINGLE_PROCESS", True)
+    client, ids = seeded_user
+    index = get_emotion_index()
+    loads = index.loads
+    client.get(f"/api/analytics/similar/{ids[0]}")
+    client.get(f"/api/analytics/similar/{ids[1]}")
+    assert index.loads == loads + 1
+
+    db = SessionLocal()
+    analysis = db.get(Analysis, ids[1])
+    analysis.emotion_scores = make_scores(SAD)
+    db.commit()
+    db.close()
+
+    client.get(f"/api/analytics/similar/{ids[0]}", params={"limit": 2})
+    assert index.loads == loads + 2
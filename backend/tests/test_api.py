@@ -99,5 +99,19 @@ def test_encryption_empty():
     assert manager.decrypt_text("") == ""
 
 
+def test_per_user_encryption():
+    """Test per-user keys and batch decryption"""
+    manager = EncryptionManager("test-key-for-testing-purposes-only")
+    
+    token = manager.encrypt_for_user("user-a", "A private thought")
+    assert manager.decrypt_many_for_user("user-a", [token, None, "legacy plaintext"]) == [
+        "A private thought", None, "legacy plaintext"
+    ]
+    # Another user's key cannot read it (value is returned as stored)
+    assert manager.decrypt_many_for_user("user-b", [token]) == [token]
+    # Derived keys are cached
+    assert manager.user_fernet("user-a") is manager.user_fernet("user-a")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
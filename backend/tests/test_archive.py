@@ -0,0 +1,112 @@
+"""
+Partition helpers and cold-data archival tests
+"""
+
+import json
+import uuid
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from models.connection import init_db, SessionLocal
+from models.database import Analysis, ArchivedPartition, MoodLog, User, SourceType
+from utils import archive
+from utils.auth import get_current_user
+from utils.partitions import add_months, partition_indexes, partition_name
+
+# Archival runs "as of" this date so only this module's rows are old enough
+NOW = datetime(2001, 12, 15)
+
+
+def test_month_arithmetic():
+    assert add_months(datetime(2001, 11, 1), 3) == datetime(2002, 2, 1)
+    assert add_months(datetime(2001, 1, 1), -1) == datetime(2000, 12, 1)
+    assert partition_name("analyses", datetime(2001, 3, 1)) == "analyses_2001_03"
+    assert archive.hot_window_start(NOW) == datetime(2001, 5, 1)
+
+
+@pytest.fixture(params=[
+    pytest.param("parquet", marks=pytest.mark.skipif(archive.pq is None, reason="pyarrow not installed")),
+    "ndjson",
+])
+def archived_user(request, tmp_path, monkeypatch):
+    init_db()
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path))
+    if request.param == "ndjson":
+        monkeypatch.setattr(archive, "pq", None)
+
+    db = SessionLocal()
+    user = User(firebase_uid=f"archive-{uuid.uuid4().hex}", email="archive@example.com")
+    db.add(user)
+    db.commit()
+    for month, emotion in [(1, "joy"), (2, "sadness"), (3, "joy"), (11, "anger")]:
+        db.add(Analysis(
+            user_id=user.id, encrypted_text=f"entry {month}", emotion_scores={emotion: 0.9},
+            dominant_emotion=emotion, source_type=SourceType.TEXT, timestamp=datetime(2001, month, 10)
+        ))
+    db.add(MoodLog(user_id=user.id, mood_rating=2, created_at=datetime(2001, 2, 1)))
+    db.commit()
+
+    totals = archive.run_archival(db, now=NOW)
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app), user, totals, request.param
+    app.dependency_overrides.clear()
+
+    # The manifest points into this test's tmp_path
+    db = SessionLocal()
+    db.query(ArchivedPartition).filter(ArchivedPartition.month.like("2001-%")).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+
+
+def test_archival_moves_cold_months_out_of_hot_tables(archived_user):
+    _, user, totals, fmt = archived_user
+    assert totals["analyses"] >= 3 and totals["mood_logs"] >= 1
+
+    db = SessionLocal()
+    try:
+        hot = db.query(Analysis).filter(Analysis.user_id == user.id).all()
+        assert [a.timestamp.month for a in hot] == [11]
+        assert db.query(MoodLog).filter(MoodLog.user_id == user.id).count() == 0
+        paths = [p.path for p in db.query(ArchivedPartition).filter(ArchivedPartition.month == "2001-02")]
+        assert paths and all(p.endswith("parquet" if fmt == "parquet" else "ndjson.gz") for p in paths)
+    finally:
+        db.close()
+
+
+def test_history_reads_archive_when_range_reaches_back(archived_user):
+    client, _, _, _ = archived_user
+
+    recent = client.get("/api/history", params={"limit": 10}).json()
+    assert [item["text"] for item in recent["items"]] == ["entry 11"]
+
+    full = client.get("/api/history", params={"limit": 3, "start_date": "2001-01-01", "end_date": "2001-12-31"}).json()
+    assert full["total"] == 4
+    assert [item["text"] for item in full["items"]] == ["entry 11", "entry 3", "entry 2"]
+
+    page_two = client.get("/api/history", params={"limit": 3, "page": 2, "start_date": "2001-01-01"}).json()
+    assert [item["text"] for item in page_two["items"]] == ["entry 1"]
+
+    joy = client.get("/api/history", params={"emotion": "joy", "start_date": "2001-01-01"}).json()
+    assert [item["text"] for item in joy["items"]] == ["entry 3", "entry 1"]
+
+
+def test_export_includes_archived_months(archived_user):
+    client, _, _, _ = archived_user
+    response = client.get("/api/history/export", params={"format": "ndjson"})
+    records = [json.loads(line) for line in response.text.splitlines()]
+    analyses = [r["text"] for r in records if r["record_type"] == "analysis"]
+    assert analyses == ["entry 1", "entry 2", "entry 3", "entry 11"]
+    assert [r["record_type"] for r in records].count("mood_log") == 1
+
+
+def test_partition_indexes_follow_the_model():
+    indexes = dict(partition_indexes("analyses"))
+    assert indexes["ix_analyses_needs_rescore"] == ["needs_rescore"]
+    assert indexes["ix_analyses_user_id_timestamp"] == ["user_id", "timestamp"]
+    assert "ix_analyses_id" not in indexes
+    assert dict(partition_indexes("mood_logs"))["ix_mood_logs_user_id_created_at"] == ["user_id", "created_at"]
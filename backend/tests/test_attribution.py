@@ -0,0 +1,30 @@
+"""
+Trigger word attribution tests
+"""
+
+from utils.attribution import extract_trigger_words, candidate_words
+
+
+def test_candidate_words_respects_cap():
+    text = "alpha bravo charlie delta echo foxtrot golf hotel india juliet"
+    words = candidate_words(text, max_candidates=4)
+    assert len(words) == 4
+    # Kept words stay in reading order
+    assert words == sorted(words, key=text.index)
+
+
+def test_candidate_words_skips_stopwords():
+    assert candidate_words("I was really happy with the garden") == ["happy", "garden"]
+
+
+def test_extract_trigger_words_ranks_emotional_word(fake_classifier):
+    weights = extract_trigger_words(fake_classifier, "The commute was long but I am happy tonight", "joy")
+    assert weights[0]["word"] == "happy"
+    assert all(w["weight"] > 0 for w in weights)
+    # Original plus every occluded variant are scored in a single batched call
+    assert len(fake_classifier.calls) == 1
+
+
+def test_extract_trigger_words_empty(fake_classifier):
+    assert extract_trigger_words(fake_classifier, "I am", "joy") == []
+    assert fake_classifier.calls == []
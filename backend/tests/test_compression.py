@@ -0,0 +1,98 @@
+"""
+Compression middleware and columnar history tests
+"""
+
+import uuid
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from fastapi.testclient import TestClient
+from main import app
+from models.connection import init_db, SessionLocal
+from models.database import User, Analysis, SourceType
+from utils.auth import get_current_user
+from utils.compression import CompressionMiddleware, brotli, choose_encoding
+
+
+def make_app():
+    demo = FastAPI()
+    demo.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @demo.get("/big")
+    async def big():
+        return {"items": [{"dominant_emotion": "joy", "agent_response": "Keep going"}] * 200}
+
+    @demo.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @demo.get("/stream")
+    async def stream():
+        return StreamingResponse((f"line {i}\n" * 50 for i in range(20)), media_type="application/x-ndjson")
+
+    @demo.get("/archive")
+    async def archive():
+        return PlainTextResponse("x" * 1000, media_type="application/gzip")
+
+    return demo
+
+
+def test_choose_encoding():
+    # Brotli is optional: without it, gzip is negotiated instead
+    assert choose_encoding("gzip, deflate, br") == ("br" if brotli is not None else "gzip")
+    assert choose_encoding("br") == ("br" if brotli is not None else None)
+    assert choose_encoding("gzip;q=1.0, br;q=0") == "gzip"
+    assert choose_encoding("identity") is None
+
+
+@pytest.mark.parametrize("encoding", [
+    "gzip",
+    pytest.param("br", marks=pytest.mark.skipif(brotli is None, reason="brotli not installed")),
+])
+def test_compresses_large_responses(encoding):
+    client = TestClient(make_app())
+    response = client.get("/big", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()["items"]) == 200
+
+
+def test_skips_small_and_precompressed_responses():
+    client = TestClient(make_app())
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/archive", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_streams_compressed_chunks():
+    client = TestClient(make_app())
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text.count("\n") == 1000
+
+
+def test_history_columnar_format():
+    init_db()
+    db = SessionLocal()
+    user = User(firebase_uid=f"columnar-{uuid.uuid4().hex}", email="columnar@example.com")
+    db.add(user)
+    db.commit()
+    for i in range(3):
+        db.add(Analysis(user_id=user.id, encrypted_text=f"entry {i}", emotion_scores={"joy": 0.1 * i},
+                        dominant_emotion="joy", source_type=SourceType.TEXT))
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        data = TestClient(app).get("/api/history", params={"format": "columnar"}).json()
+        assert "items" not in data
+        assert len(data["columns"]["id"]) == 3
+        assert sorted(data["columns"]["emotion_scores"]["joy"]) == pytest.approx([0.0, 0.1, 0.2])
+        assert data["columns"]["emotion_scores"]["fear"] == [None, None, None]
+        assert data["total"] == 3
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,72 @@
+"""
+Engine factory and pool instrumentation tests
+"""
+
+import threading
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from models.connection import create_db_engine, engine_pool_stats, pool_limits
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    yield db_engine
+    db_engine.dispose()
+
+
+def test_sqlite_connections_get_pragmas(sqlite_engine):
+    with sqlite_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -65536
+
+
+def test_in_memory_sqlite_keeps_default_pool():
+    db_engine = create_db_engine("sqlite:///:memory:")
+    with db_engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    assert "checkouts" not in engine_pool_stats(db_engine)
+
+
+def test_pool_stats_track_checkouts_overflow_and_timeouts(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "1")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "1")
+    monkeypatch.setattr("models.connection.DB_POOL_TIMEOUT", 0.05)
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'small.db'}")
+    try:
+        first, second = db_engine.connect(), db_engine.connect()
+        stats = engine_pool_stats(db_engine)
+        assert (stats["size"], stats["checked_out"], stats["overflow"]) == (1, 2, 1)
+
+        with pytest.raises(PoolTimeoutError):
+            db_engine.connect()
+
+        # A waiter is served as soon as a connection is returned
+        waited = threading.Timer(0.02, second.close)
+        waited.start()
+        monkeypatch.setattr(db_engine.pool, "_timeout", 1.0)
+        third = db_engine.connect()
+        waited.join()
+        third.close()
+        first.close()
+
+        stats = engine_pool_stats(db_engine)
+        assert stats["checkouts"] == 3
+        assert stats["timeouts"] == 1
+        assert stats["connects"] == 2
+        assert stats["wait_ms_max"] >= 10
+        assert stats["checked_out"] == 0
+    finally:
+        db_engine.dispose()
+
+
+def test_postgres_pool_budget_is_split_across_workers():
+    assert pool_limits(1, 90) == (60, 30)
+    assert pool_limits(4, 90) == (14, 8)
+    size, overflow = pool_limits(8, 90)
+    assert 8 * (size + overflow) <= 90
+    # Never below a usable pool
+    assert pool_limits(100, 10) == (1, 1)
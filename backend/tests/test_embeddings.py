@@ -0,0 +1,124 @@
+"""
+Embedding storage and similarity search tests
+"""
+
+import time
+import uuid
+import zlib
+import numpy as np
+from fastapi.testclient import TestClient
+from main import app, ml_models
+from models.connection import init_db, SessionLocal
+from models.database import AnalysisEmbedding, User
+from utils.auth import get_current_user
+from utils.embeddings import quantize, dequantize, normalize_rows, UserVectors, EmbeddingIndex, get_embedding_index
+
+
+def bag_of_words_embed(classifier, texts, batch_size=None):
+    """Deterministic stand-in for the encoder: hashed word counts"""
+    vectors = np.zeros((len(texts), 64), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().strip(".!").split():
+            vectors[row, zlib.crc32(word.encode()) % 64] += 1.0
+    return normalize_rows(vectors)
+
+
+def test_quantize_round_trip():
+    vector = normalize_rows(np.random.default_rng(0).normal(size=(1, 768)))[0]
+    data, scale = quantize(vector)
+    assert len(data) == 768
+    assert np.dot(dequantize(data, scale), vector) > 0.999
+
+
+def test_user_vectors_top_k_grows_and_replaces_duplicates():
+    rng = np.random.default_rng(1)
+    matrix = normalize_rows(rng.normal(size=(200, 16)))
+    vectors = UserVectors(dim=16, capacity=4)
+    vectors.add(list(range(100)), matrix[:100])
+    vectors.add(list(range(100, 200)), matrix[100:])
+    # A re-embedded id replaces its old vector instead of being appended
+    vectors.add([5], matrix[6:7])
+    assert vectors.count == 200
+    assert np.dot(vectors.vector_for(5), matrix[6]) > 0.99
+
+    matches = vectors.search(matrix[42], k=3)
+    assert matches[0][0] == 42
+    assert [m[0] for m in vectors.search(matrix[42], k=3, exclude_id=42)][0] != 42
+    assert matches[0][1] >= matches[1][1] >= matches[2][1]
+    # Kept as int8 codes; search dequantizes block by block
+    assert vectors.codes.dtype == np.int8
+    assert np.dot(vectors.vector_for(42), matrix[42]) > 0.99
+
+
+def test_search_blocks_match_a_single_pass(monkeypatch):
+    rng = np.random.default_rng(2)
+    matrix = normalize_rows(rng.normal(size=(1000, 32)))
+    vectors = UserVectors(dim=32)
+    vectors.add(list(range(1000)), matrix)
+    whole = vectors.search(matrix[7], k=5)
+    monkeypatch.setattr("utils.embeddings.SEARCH_BLOCK_ROWS", 64)
+    assert vectors.search(matrix[7], k=5) == whole
+
+
+def test_index_loads_lazily_and_evicts_lru():
+    index = EmbeddingIndex(max_users=1)
+    loads = []
+
+    def loader(user_id):
+        def load():
+            loads.append(user_id)
+            return [1], np.full((1, 4), 64, dtype=np.int8), np.array([1 / 128], dtype=np.float32)
+        return load
+
+    index.get(1, "m", loader(1))
+    index.get(1, "m", loader(1))
+    index.get(2, "m", loader(2))
+    index.get(1, "m", loader(1))
+    assert loads == [1, 2, 1]
+
+
+def test_similar_entries_endpoint(fake_classifier, monkeypatch):
+    init_db()
+    db = SessionLocal()
+    user = User(firebase_uid=f"similar-{uuid.uuid4().hex}", email="similar@example.com")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    monkeypatch.setattr("utils.embeddings.embed_texts", bag_of_words_embed)
+    get_embedding_index().clear()
+    ml_models["emotion_classifier"] = fake_classifier
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        client = TestClient(app)
+        texts = [
+            "My dog ran away and I feel sad",
+            "Excited about the concert tonight",
+            "The dog ran off again today",
+        ]
+        for text in texts:
+            assert client.post("/api/analyze", json={"text": text}).status_code == 200
+
+        db = SessionLocal()
+        try:
+            deadline = time.monotonic() + 5
+            while db.query(AnalysisEmbedding).filter_by(user_id=user.id, model_name="fake-emotion-model").count() < 3:
+                assert time.monotonic() < deadline, "embeddings were not written"
+                time.sleep(0.05)
+        finally:
+            db.close()
+
+        response = client.get("/api/history/similar", params={"text": "the dog ran away", "limit": 2})
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert {item["text"] for item in items} == {texts[0], texts[2]}
+
+        by_id = client.get("/api/history/similar", params={"analysis_id": items[0]["id"], "limit": 1}).json()
+        assert by_id["items"][0]["id"] == items[1]["id"]
+
+        assert client.get("/api/history/similar").status_code == 400
+    finally:
+        ml_models.pop("emotion_classifier", None)
+        app.dependency_overrides.clear()
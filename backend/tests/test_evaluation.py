@@ -0,0 +1,59 @@
+"""
+Classifier evaluation helper tests
+"""
+
+import json
+import os
+import pytest
+from utils.evaluation import classification_report, load_labeled_dataset, pareto_front, percentile
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks", "data", "emotions_sample.csv")
+
+
+def test_sample_dataset_loads_with_love_mapped_to_trust():
+    examples = load_labeled_dataset(SAMPLE)
+    labels = {label for _, label in examples}
+    assert "love" not in labels
+    assert "trust" in labels
+    assert all(text for text, _ in examples)
+
+
+def test_ndjson_dataset_and_unknown_label(tmp_path):
+    path = tmp_path / "data.ndjson"
+    path.write_text(json.dumps({"text": "great day", "label": "Joy"}) + "\n\n")
+    assert load_labeled_dataset(str(path)) == [("great day", "joy")]
+
+    path.write_text(json.dumps({"text": "meh", "label": "boredom"}) + "\n")
+    with pytest.raises(ValueError):
+        load_labeled_dataset(str(path))
+
+
+def test_classification_report():
+    gold = ["joy", "joy", "anger", "fear"]
+    predicted = ["joy", "anger", "anger", "fear"]
+    report = classification_report(gold, predicted)
+
+    assert report["accuracy"] == 0.75
+    assert report["per_emotion"]["joy"] == {"precision": 1.0, "recall": 0.5, "f1": 0.6667, "support": 2}
+    assert report["per_emotion"]["anger"]["precision"] == 0.5
+    # Macro-F1 only averages emotions present in the gold labels
+    assert report["macro_f1"] == round((0.6667 + 0.6667 + 1.0) / 3, 4)
+    assert report["per_emotion"]["disgust"]["support"] == 0
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_pareto_front():
+    results = [
+        {"backend": "fp32", "macro_f1": 0.90, "throughput": 100, "peak_memory_mb": 800},
+        {"backend": "int8", "macro_f1": 0.88, "throughput": 180, "peak_memory_mb": 500},
+        {"backend": "worse", "macro_f1": 0.85, "throughput": 90, "peak_memory_mb": 900},
+    ]
+    assert [r["backend"] for r in pareto_front(results)] == ["fp32", "int8"]
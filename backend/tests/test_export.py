@@ -0,0 +1,75 @@
+"""
+History export tests
+"""
+
+import csv
+import gzip
+import io
+import json
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from main import app
+from models.connection import init_db, SessionLocal
+from models.database import User, Analysis, MoodLog, SourceType
+from routes.export import iter_history_chunks
+from utils.auth import get_current_user
+
+
+@pytest.fixture
+def export_client():
+    init_db()
+    db = SessionLocal()
+    user = User(firebase_uid=f"export-{uuid.uuid4().hex}", email="export@example.com")
+    db.add(user)
+    db.commit()
+    now = datetime.utcnow()
+    for i in range(7):
+        db.add(Analysis(
+            user_id=user.id, encrypted_text=f"entry {i}", emotion_scores={"joy": 0.5, "sadness": 0.1},
+            dominant_emotion="joy", source_type=SourceType.TEXT, timestamp=now - timedelta(days=i)
+        ))
+    db.add(MoodLog(user_id=user.id, mood_rating=4, trigger_tag="work"))
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_export_ndjson(export_client, monkeypatch):
+    monkeypatch.setattr("routes.export.EXPORT_CHUNK_SIZE", 3)
+    response = export_client.get("/api/history/export")
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert len(records) == 8
+    assert records[0]["record_type"] == "analysis"
+    assert records[0]["text"] == "entry 6"
+    assert records[-1]["record_type"] == "mood_log"
+
+    # The patched size is read at call time
+    user = app.dependency_overrides[get_current_user]()
+    assert [len(chunk) for chunk in iter_history_chunks(user)] == [3, 3, 1, 1]
+
+
+def test_export_csv_gzip(export_client):
+    response = export_client.get("/api/history/export", params={"format": "csv", "gzip": True})
+    assert response.headers["content-type"] == "application/gzip"
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert len(rows) == 8
+    assert rows[0]["emotion_joy"] == "0.5"
+
+
+def test_export_parquet(export_client):
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = export_client.get("/api/history/export", params={"format": "parquet"})
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 8
+
+
+def test_export_rejects_unknown_format(export_client):
+    assert export_client.get("/api/history/export", params={"format": "xml"}).status_code == 400
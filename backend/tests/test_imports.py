@@ -0,0 +1,58 @@
+"""
+Bulk history import tests
+"""
+
+import json
+import pytest
+from fastapi.testclient import TestClient
+from main import app, ml_models
+from models.connection import init_db, SessionLocal
+from models.database import Analysis
+from routes.imports import parse_timestamp
+
+
+def test_parse_timestamp_normalizes_to_naive_utc():
+    assert parse_timestamp("2021-03-04T10:00:00Z").isoformat() == "2021-03-04T10:00:00"
+    assert parse_timestamp("2021-03-04T12:00:00+02:00").isoformat() == "2021-03-04T10:00:00"
+    with pytest.raises(ValueError):
+        parse_timestamp(1700000000)
+
+
+def test_import_ndjson_keeps_original_timestamps(fake_classifier, monkeypatch):
+    init_db()
+    monkeypatch.setattr("routes.imports.IMPORT_BATCH_SIZE", 4)
+    ml_models["emotion_classifier"] = fake_classifier
+    try:
+        lines = [json.dumps({"timestamp": f"2019-01-{day:02d}T08:00:00", "text": f"I was happy on day {day}"})
+                 for day in range(1, 11)]
+        lines.insert(3, "not json")
+        lines.append(json.dumps({"timestamp": "yesterday", "text": "bad date"}))
+        # Wrongly typed or unknown values skip the row instead of failing the job
+        lines.append(json.dumps({"timestamp": "2019-02-01T08:00:00", "text": 5}))
+        lines.append(json.dumps({"timestamp": 1700000000, "text": "epoch seconds"}))
+        lines.append(json.dumps({"timestamp": "2019-02-01T08:00:00", "text": "poem", "agent_mode": "poetic"}))
+
+        client = TestClient(app)
+        response = client.post("/api/history/import", content="\n".join(lines),
+                               headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        from utils.jobs import get_job_queue
+        get_job_queue().get(job_id).wait(10)
+        job = client.get(f"/api/history/import/{job_id}").json()
+        assert job["status"] == "done"
+        assert job["result"] == {"imported": 10, "skipped": 5}
+        assert job["progress"]["percent"] == 100.0
+        # Batched: 10 entries in batches of 4 -> 3 classifier calls
+        assert len(fake_classifier.calls) == 3
+
+        db = SessionLocal()
+        try:
+            imported = db.query(Analysis).filter(Analysis.encrypted_text == "I was happy on day 5").first()
+            assert imported.timestamp.isoformat() == "2019-01-05T08:00:00"
+            assert imported.dominant_emotion == "joy"
+        finally:
+            db.close()
+    finally:
+        ml_models.pop("emotion_classifier", None)
@@ -0,0 +1,67 @@
+"""
+Background job queue tests
+"""
+
+import threading
+from fastapi.testclient import TestClient
+from main import app, ml_models
+from models.connection import init_db, SessionLocal
+from models.database import Analysis
+from utils.jobs import JobQueue, JobStatus
+
+
+def test_job_queue_deduplicates_in_flight_keys():
+    queue = JobQueue(max_workers=2)
+    release = threading.Event()
+
+    first = queue.submit(lambda job: release.wait(5) and "done", key="same")
+    second = queue.submit(lambda job: "other", key="same")
+    assert first is second
+
+    release.set()
+    assert first.wait(5)
+    assert first.status == JobStatus.DONE
+    assert first.result == "done"
+
+    # Once finished, the key can be queued again
+    third = queue.submit(lambda job: "again", key="same")
+    assert third is not first
+    queue.shutdown()
+
+
+def test_job_queue_records_failures():
+    queue = JobQueue(max_workers=1)
+
+    def boom(job):
+        raise RuntimeError("site unreachable")
+
+    job = queue.submit(boom)
+    assert job.wait(5)
+    assert job.status == JobStatus.FAILED
+    assert "unreachable" in job.error
+    queue.shutdown()
+
+
+def test_scrape_job_persists_analysis(fake_classifier, monkeypatch):
+    init_db()
+    monkeypatch.setattr("utils.scraper.scrape_article", lambda url, timeout=10: "I am so happy and excited today.")
+    ml_models["emotion_classifier"] = fake_classifier
+    try:
+        client = TestClient(app)
+        response = client.post("/api/scrape/jobs", json={"url": "https://example.com/story"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        job = client.get(f"/api/scrape/jobs/{job_id}", params={"wait": 5}).json()
+        assert job["status"] == "done"
+        assert job["result"]["dominant_emotion"] == "joy"
+
+        db = SessionLocal()
+        try:
+            assert db.query(Analysis).filter(Analysis.id == job["result"]["analysis_id"]).count() == 1
+        finally:
+            db.close()
+
+        assert client.get("/api/scrape/jobs/unknown").status_code == 404
+    finally:
+        ml_models.pop("emotion_classifier", None)
@@ -0,0 +1,105 @@
+"""
+Lexicon fallback classifier and re-scoring tests
+"""
+
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from models.connection import init_db, SessionLocal
+from models.database import Analysis, User
+from routes.analyze import get_optional_classifier
+from utils import rescoring
+from utils.auth import get_current_user
+from utils.lexicon import EMOTIONS, lookup, score_text, trigger_words
+from utils.ratelimit import admission
+
+
+def dominant(text):
+    scores = score_text(text)
+    return max(scores, key=scores.get)
+
+
+def test_scores_cover_plutchik_and_sum_to_one():
+    scores = score_text("I was so scared and anxious before the exam")
+    assert set(scores) == set(EMOTIONS)
+    assert abs(sum(scores.values()) - 1.0) < 1e-9
+    assert dominant("I was so scared and anxious before the exam") == "fear"
+    assert dominant("Absolutely disgusting and vile behaviour") == "disgust"
+    assert dominant("Can't wait for the upcoming trip, so eager") == "anticipation"
+
+
+def test_negation_intensifiers_and_stems():
+    assert dominant("I am not happy at all") == "sadness"
+    assert score_text("very happy")["joy"] > score_text("happy")["joy"]
+    assert lookup("worrying") == lookup("worry")
+    # No lexicon hits: uniform scores
+    assert len(set(score_text("the table is brown").values())) == 1
+
+
+def test_trigger_words_rank_contributing_words():
+    words = trigger_words("Happy and excited, really happy", "joy")
+    assert [w["word"] for w in words] == ["happy", "excited"]
+    assert words[0]["weight"] == 1.0
+    assert trigger_words("happy", "anger") == []
+
+
+@pytest.fixture
+def fallback_user(monkeypatch):
+    init_db()
+    # Provisional rows left by other tests would otherwise start a re-score on the classifier under test
+    rescoring._pending.clear()
+    monkeypatch.setattr(rescoring, "schedule_rescoring", lambda classifier, force=False: None)
+    db = SessionLocal()
+    user = User(firebase_uid=f"lexicon-{uuid.uuid4().hex}", email="lexicon@example.com")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield user
+    app.dependency_overrides.clear()
+
+
+def test_analyze_falls_back_without_model(fallback_user):
+    app.dependency_overrides[get_optional_classifier] = lambda: None
+    client = TestClient(app)
+    response = client.post("/api/analyze", json={
+        "text": "I am so angry. They ignored me again.", "timeline": True, "trigger_attribution": True
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["provisional"] is True
+    assert data["dominant_emotion"] == "anger"
+    assert [t["word"] for t in data["trigger_weights"]][:1] == ["angry"]
+    assert len(data["timeline"]) == 2
+
+    db = SessionLocal()
+    try:
+        row = db.query(Analysis).filter(Analysis.user_id == fallback_user.id).one()
+        assert row.needs_rescore is True
+        assert (row.model_name, row.model_version) == ("lexicon", "1")
+    finally:
+        db.close()
+
+
+def test_analyze_falls_back_when_queue_exceeds_budget(fallback_user, fake_classifier, monkeypatch):
+    app.dependency_overrides[get_optional_classifier] = lambda: fake_classifier
+    client = TestClient(app)
+
+    response = client.post("/api/analyze", json={"text": "I am happy"})
+    assert response.json()["provisional"] is False
+    db = SessionLocal()
+    try:
+        row = db.query(Analysis).filter(Analysis.user_id == fallback_user.id).one()
+        assert (row.model_name, row.needs_rescore) == ("fake-emotion-model", False)
+    finally:
+        db.close()
+
+    monkeypatch.setattr(admission, "avg_latency", 60.0)
+    response = client.post("/api/analyze", json={"text": "I am happy"})
+    assert response.json()["provisional"] is True
+    # The second request never reached the model
+    assert fake_classifier.scored_texts.count("I am happy") == 1
@@ -0,0 +1,117 @@
+"""
+Offline mood sync endpoint tests
+"""
+
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from models.connection import init_db, SessionLocal
+from models.database import MoodLog, User
+from routes import mood
+from utils.auth import get_current_user
+
+
+@pytest.fixture
+def sync_user():
+    init_db()
+    db = SessionLocal()
+    user = User(firebase_uid=f"sync-{uuid.uuid4().hex}", email="sync@example.com")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app), user
+    app.dependency_overrides.clear()
+
+
+def stored_logs(user_id):
+    db = SessionLocal()
+    try:
+        return db.query(MoodLog).filter(MoodLog.user_id == user_id).order_by(MoodLog.id).all()
+    finally:
+        db.close()
+
+
+def test_sync_inserts_batch_and_is_idempotent(sync_user):
+    client, user = sync_user
+    entries = [
+        {"idempotency_key": f"k{i}", "mood_rating": i % 5 + 1, "client_timestamp": f"2026-03-0{i + 1}T08:00:00+02:00"}
+        for i in range(5)
+    ]
+    first = client.post("/api/mood/sync", json={"entries": entries}).json()
+    assert first["created"] == 5 and first["duplicates"] == 0
+    assert [item["idempotency_key"] for item in first["items"]] == [e["idempotency_key"] for e in entries]
+
+    logs = stored_logs(user.id)
+    assert [log.id for log in logs] == [item["id"] for item in first["items"]]
+    # Client timestamps are stored as naive UTC
+    assert logs[0].created_at == datetime(2026, 3, 1, 6, 0)
+
+    # Retrying the same batch (lost response) plus one new entry creates only the new one
+    retry = client.post("/api/mood/sync", json={"entries": entries + [{"idempotency_key": "k9", "mood_rating": 3}]}).json()
+    assert retry["created"] == 1 and retry["duplicates"] == 5
+    assert [item["id"] for item in retry["items"][:5]] == [item["id"] for item in first["items"]]
+    assert len(stored_logs(user.id)) == 6
+
+
+def test_sync_dedupes_within_batch_and_clamps_future(sync_user):
+    client, user = sync_user
+    future = (datetime.utcnow() + timedelta(days=3)).isoformat()
+    data = client.post("/api/mood/sync", json={"entries": [
+        {"idempotency_key": "same", "mood_rating": 2, "client_timestamp": future},
+        {"idempotency_key": "same", "mood_rating": 4},
+    ]}).json()
+    assert [item["status"] for item in data["items"]] == ["created", "duplicate"]
+    assert data["items"][0]["id"] == data["items"][1]["id"]
+
+    logs = stored_logs(user.id)
+    assert len(logs) == 1 and logs[0].mood_rating == 2
+    assert logs[0].created_at <= datetime.utcnow()
+
+    # Synced check-ins show up in history
+    assert client.get("/api/mood/history").json()["total"] == 1
+
+
+def test_concurrent_retry_resolves_through_the_key_table(sync_user, monkeypatch):
+    """A racing retry without client_timestamp gets a new created_at; the key table still rejects it"""
+    client, user = sync_user
+    first = client.post("/api/mood/sync", json={"entries": [{"idempotency_key": "race", "mood_rating": 2}]}).json()
+
+    # Let the retry miss the stored key once, as a sync that read before the first committed would
+    lookup = mood.existing_keys
+    misses = iter([True])
+    monkeypatch.setattr(mood, "existing_keys", lambda *args: {} if next(misses, False) else lookup(*args))
+    retry = client.post("/api/mood/sync", json={"entries": [{"idempotency_key": "race", "mood_rating": 2}]}).json()
+
+    assert retry["items"] == [{"idempotency_key": "race", "id": first["items"][0]["id"], "status": "duplicate"}]
+    assert len(stored_logs(user.id)) == 1
+
+
+def test_sync_keys_are_per_user(sync_user):
+    client, user = sync_user
+    client.post("/api/mood/sync", json={"entries": [{"idempotency_key": "shared", "mood_rating": 1}]})
+
+    other = User(firebase_uid=f"sync-{uuid.uuid4().hex}", email="other@example.com")
+    db = SessionLocal()
+    db.add(other)
+    db.commit()
+    db.refresh(other)
+    db.expunge(other)
+    db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: other
+    data = client.post("/api/mood/sync", json={"entries": [{"idempotency_key": "shared", "mood_rating": 5}]}).json()
+    assert data["created"] == 1
+
+
+def test_sync_rejects_oversized_batch(sync_user, monkeypatch):
+    client, _ = sync_user
+    monkeypatch.setattr(mood, "MOOD_SYNC_MAX_ENTRIES", 2)
+    entries = [{"idempotency_key": f"k{i}"} for i in range(3)]
+    assert client.post("/api/mood/sync", json={"entries": entries}).status_code == 413
+    assert client.post("/api/mood/sync", json={"entries": [{"mood_rating": 3}]}).status_code == 422
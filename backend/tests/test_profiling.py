@@ -0,0 +1,136 @@
+"""
+Request profiling middleware and admin route tests
+"""
+
+import threading
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from main import app
+from utils import profiling
+
+TOKEN = "profile-secret"
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", TOKEN)
+    monkeypatch.setattr(profiling, "_profile_store", profiling.ProfileStore(max_profiles=3))
+    return profiling.get_profile_store()
+
+
+@pytest.fixture
+def profiled_app(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profiled.db'}")
+    test_app = FastAPI()
+    test_app.add_middleware(profiling.ProfilingMiddleware, slow_ms=50, paths=("/api/slow",))
+
+    def work(seconds):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            busy_wait(seconds)
+            conn.execute(text("SELECT 2"))
+
+    @test_app.get("/api/slow")
+    async def slow(seconds: float = 0.15):
+        await run_in_threadpool(work, seconds)
+        return {"ok": True}
+
+    @test_app.get("/api/other")
+    async def other():
+        await run_in_threadpool(work, 0.15)
+        return {"ok": True}
+
+    yield TestClient(test_app)
+    engine.dispose()
+
+
+def test_slow_requests_on_watched_paths_are_kept(store, profiled_app):
+    assert profiled_app.get("/api/slow", params={"seconds": 0}).status_code == 200
+    assert store.list() == []
+
+    assert profiled_app.get("/api/slow").status_code == 200
+    assert profiled_app.get("/api/other").status_code == 200  # not watched, no token
+    (profile,) = store.list()
+    assert profile.trigger == "slow" and profile.status == 200
+    assert profile.duration_ms >= 150
+    assert [s["statement"] for s in profile.statements] == ["SELECT 1", "SELECT 2"]
+    assert profile.statements[1]["offset_ms"] >= profile.statements[0]["offset_ms"] + 100
+    assert profile.samples > 0
+    assert any("busy_wait (tests/test_profiling.py" in stack for stack in profile.stacks)
+
+
+def test_token_header_profiles_any_path(store, profiled_app):
+    response = profiled_app.get("/api/other", headers={"X-Profile-Token": TOKEN})
+    assert response.headers["X-Profile-Id"] == str(store.list()[0].id)
+    assert store.list()[0].trigger == "header"
+
+    response = profiled_app.get("/api/other", headers={"X-Profile-Token": "wrong"})
+    assert "X-Profile-Id" not in response.headers
+    assert len(store.list()) == 1
+
+
+def test_ring_buffer_keeps_newest(store, profiled_app):
+    for _ in range(5):
+        profiled_app.get("/api/other", headers={"X-Profile-Token": TOKEN})
+    ids = [p.id for p in store.list()]
+    assert len(ids) == 3 and ids == sorted(ids, reverse=True)
+
+
+def test_sampler_restarts_after_a_failed_sample(monkeypatch):
+    sampler = profiling.StackSampler(interval_ms=1)
+    profile = profiling.Profile(1, "GET", "/api/slow", "header")
+    monkeypatch.setattr(sampler, "sample", lambda: 1 / 0)
+    monkeypatch.setattr(threading, "excepthook", lambda args: None)
+
+    sampler.start(profile)
+    thread = sampler._thread
+    thread.join(timeout=2)
+    assert sampler._thread is None
+
+    # The next profiled request gets a working sampler again
+    monkeypatch.undo()
+    retry = profiling.Profile(2, "GET", "/api/slow", "header")
+    sampler.start(retry)
+    assert sampler._thread not in (None, thread)
+    sampler.stop(retry)
+    sampler.stop(profile)
+
+
+def test_admin_routes(store, profiled_app):
+    client = TestClient(app)
+    assert client.get("/api/admin/profiles").status_code == 403
+    assert client.get("/api/admin/profiles", headers={"X-Profile-Token": "wrong"}).status_code == 403
+
+    profile_id = int(profiled_app.get("/api/slow", headers={"X-Profile-Token": TOKEN}).headers["X-Profile-Id"])
+    headers = {"X-Profile-Token": TOKEN}
+
+    listing = client.get("/api/admin/profiles", headers=headers).json()["items"]
+    assert [p["id"] for p in listing] == [profile_id]
+    assert listing[0]["sql_statements"] == 2
+
+    detail = client.get(f"/api/admin/profiles/{profile_id}", headers=headers).json()
+    assert detail["path"] == "/api/slow" and len(detail["statements"]) == 2
+
+    folded = client.get(f"/api/admin/profiles/{profile_id}/folded", headers=headers)
+    assert folded.status_code == 200
+    for line in folded.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack.startswith("thread:") and int(count) > 0
+
+    assert client.get("/api/admin/profiles/999999", headers=headers).status_code == 404
+    assert len(store.list()) == 1  # admin calls are not profiled
+
+
+def test_admin_routes_hidden_without_token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", None)
+    assert TestClient(app).get("/api/admin/profiles", headers={"X-Profile-Token": ""}).status_code == 404
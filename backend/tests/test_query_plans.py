@@ -0,0 +1,82 @@
+"""
+Query plan regression tests
+EXPLAINs every history/summary/mood query shape against a seeded SQLite file and fails on scans or temp sorts
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+from models.database import Analysis, Base, MoodLog, SourceType, User
+from utils import query_plans
+
+EMOTIONS = ["joy", "sadness", "anger", "fear", "trust", "disgust", "surprise", "anticipation"]
+COMPOSITES = [
+    "ix_analyses_user_id_timestamp",
+    "ix_analyses_user_id_dominant_emotion_timestamp",
+    "ix_analyses_user_id_source_type_timestamp",
+    "ix_mood_logs_user_id_created_at",
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    Base.metadata.create_all(bind=engine)
+
+    # A few heavy users among many light ones, a year of history
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"firebase_uid": f"plan-user-{i}", "email": f"p{i}@example.com"} for i in range(40)])
+        conn.execute(insert(Analysis), [{
+            "user_id": 1 if i % 3 == 0 else rng.randint(2, 40),
+            "encrypted_text": "entry",
+            "emotion_scores": {},
+            "dominant_emotion": rng.choice(EMOTIONS),
+            "source_type": rng.choice(list(SourceType)),
+            "timestamp": now - timedelta(minutes=rng.randint(0, 525600)),
+        } for i in range(6000)])
+        conn.execute(insert(MoodLog), [{
+            "user_id": 1 if i % 3 == 0 else rng.randint(2, 40),
+            "mood_rating": rng.randint(1, 5),
+            "created_at": now - timedelta(minutes=rng.randint(0, 525600)),
+        } for i in range(3000)])
+        query_plans.analyze_tables(conn)
+    yield engine
+    engine.dispose()
+
+
+def test_every_shape_is_served_by_an_index(engine):
+    with engine.connect() as conn:
+        results = query_plans.check_query_plans(conn, user_id=1)
+
+    assert len(results) == len(query_plans.query_shapes())
+    problems = {r["name"]: r["problems"] for r in results if r["problems"]}
+    assert problems == {}
+
+
+def test_detects_sorts_and_proposes_missing_indexes(engine):
+    with engine.begin() as conn:
+        for name in COMPOSITES:
+            conn.execute(text(f"DROP INDEX {name}"))
+        query_plans.analyze_tables(conn)
+
+        results = query_plans.check_query_plans(conn, user_id=1)
+        flagged = {r["name"] for r in results if r["problems"]}
+        assert {"history[all] page", "history[emotion] page", "mood history page", "export analyses"} <= flagged
+
+        proposals = query_plans.propose_indexes(conn, results)
+        assert sorted(name for name, _, _ in proposals) == sorted(COMPOSITES)
+
+        query_plans.create_indexes(conn, proposals)
+        query_plans.analyze_tables(conn)
+        assert not any(r["problems"] for r in query_plans.check_query_plans(conn, user_id=1))
+
+
+def test_capture_sql_does_not_execute(engine):
+    with engine.connect() as conn:
+        sql, parameters = query_plans.capture_sql(conn, text("DELETE FROM analyses WHERE user_id = :u").bindparams(u=1))
+        assert sql.startswith("DELETE FROM analyses")
+        assert conn.execute(text("SELECT count(*) FROM analyses WHERE user_id = 1")).scalar() > 0
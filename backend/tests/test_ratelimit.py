@@ -0,0 +1,82 @@
+"""
+Rate limiting and admission control tests
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from main import app, ml_models
+from models.connection import init_db
+from utils import ratelimit
+from utils.ratelimit import MemoryRateLimiter, AdmissionController
+from utils.singleflight import SingleFlight
+
+
+def test_token_bucket_allows_burst_then_limits():
+    limiter = MemoryRateLimiter(rate_per_second=1.0, burst=3)
+    assert all(limiter.acquire("user-1")[0] for _ in range(3))
+    allowed, retry_after = limiter.acquire("user-1")
+    assert not allowed
+    assert 0 < retry_after <= 1.0
+    # Buckets are independent per user
+    assert limiter.acquire("user-2")[0]
+
+
+def test_admission_sheds_when_queue_is_full():
+    controller = AdmissionController(max_concurrency=1, max_queue=1)
+    release = threading.Event()
+    holders = [threading.Thread(target=controller.run, args=(release.wait,)) for _ in range(2)]
+    for holder in holders:
+        holder.start()
+    deadline = time.monotonic() + 2
+    while controller.depth < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert controller.depth == 2
+
+    with pytest.raises(HTTPException) as exc:
+        controller.run(lambda: None)
+    # Background work queues instead of being shed
+    background = threading.Thread(target=controller.run, args=(lambda: None,), kwargs={"shed": False})
+    background.start()
+    release.set()
+    for thread in holders + [background]:
+        thread.join(timeout=2)
+
+    assert exc.value.status_code == 503
+    assert int(exc.value.headers["Retry-After"]) >= 1
+    assert controller.depth == 0
+
+
+def test_burst_followers_share_the_leaders_inference():
+    """Followers wait on the single flight, not on an inference slot, so a burst runs the model once"""
+    controller = AdmissionController(max_concurrency=1, max_queue=16)
+    flight = SingleFlight()
+    calls = []
+
+    def infer():
+        calls.append(1)
+        time.sleep(0.1)
+        return "scores"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flight.do("text:same", lambda: controller.run(infer)), range(8)))
+
+    assert results == ["scores"] * 8
+    assert len(calls) == 1
+
+
+def test_analyze_returns_429_with_retry_after(fake_classifier, monkeypatch):
+    init_db()
+    monkeypatch.setattr(ratelimit, "_rate_limiter", MemoryRateLimiter(rate_per_second=0.01, burst=2))
+    ml_models["emotion_classifier"] = fake_classifier
+    try:
+        client = TestClient(app)
+        statuses = [client.post("/api/analyze", json={"text": "I am happy"}).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        response = client.post("/api/analyze", json={"text": "I am happy"})
+        assert int(response.headers["retry-after"]) > 1
+    finally:
+        ml_models.pop("emotion_classifier", None)
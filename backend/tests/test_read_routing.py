@@ -0,0 +1,68 @@
+"""
+Read replica routing tests
+Two SQLite files stand in for the primary and the replica
+"""
+
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from main import app
+from models import connection
+from models.connection import init_db, SessionLocal, read_session_factory
+from models.database import Base, User, MoodLog
+from utils.auth import get_current_user
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    init_db()
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=replica_engine)
+    replica_sessions = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    monkeypatch.setattr(connection, "read_engine", replica_engine)
+    monkeypatch.setattr(connection, "ReadSessionLocal", replica_sessions)
+    monkeypatch.setattr(connection, "_sticky_until", {})
+
+    db = SessionLocal()
+    user = User(firebase_uid=f"replica-{uuid.uuid4().hex}", email="replica@example.com")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app), user, replica_sessions
+    app.dependency_overrides.clear()
+    replica_engine.dispose()
+
+
+def test_reads_use_replica_until_user_writes(replica):
+    client, user, replica_sessions = replica
+
+    # Replica has a row the primary does not: reads are served from the replica
+    db = replica_sessions()
+    db.add(MoodLog(user_id=user.id, mood_rating=1, trigger_tag="replica"))
+    db.commit()
+    db.close()
+    items = client.get("/api/mood/history").json()["items"]
+    assert [item["trigger_tag"] for item in items] == ["replica"]
+
+    # After a write, the same user reads their own write from the primary
+    assert client.post("/api/mood/check-in", json={"mood_rating": 5, "trigger_tag": "primary"}).status_code == 200
+    items = client.get("/api/mood/history").json()["items"]
+    assert [item["trigger_tag"] for item in items] == ["primary"]
+
+
+def test_stickiness_expires(replica, monkeypatch):
+    _, user, replica_sessions = replica
+    monkeypatch.setattr(connection, "READ_STICKINESS_SECONDS", 0)
+    connection.mark_written([user.id])
+    assert read_session_factory(user.id) is replica_sessions
+
+    monkeypatch.setattr(connection, "READ_STICKINESS_SECONDS", 60)
+    connection.mark_written([user.id])
+    assert read_session_factory(user.id) is SessionLocal
+    assert read_session_factory(user.id + 1) is replica_sessions
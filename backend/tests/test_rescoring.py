@@ -0,0 +1,131 @@
+"""
+Background re-scoring pipeline tests
+Runs against a throwaway SQLite file so other tests' rows are left alone
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from models.database import Analysis, Base, RescoreCheckpoint, SourceType, User
+from utils import rescoring
+from utils.sentences import scoring_model
+
+OLD_SCORES = {"joy": 0.1, "sadness": 0.8, "anger": 0.02, "fear": 0.02, "trust": 0.02,
+              "disgust": 0.02, "surprise": 0.01, "anticipation": 0.01}
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rescore.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def seed(db, rows):
+    user = User(firebase_uid="rescore-user", email="rescore@example.com")
+    db.add(user)
+    db.commit()
+    for text, model_name, flagged in rows:
+        db.add(Analysis(
+            user_id=user.id, encrypted_text=text, emotion_scores=OLD_SCORES, dominant_emotion="sadness",
+            source_type=SourceType.TEXT, agent_mode="analytical", agent_response="old",
+            model_name=model_name, needs_rescore=flagged
+        ))
+    db.commit()
+    return user
+
+
+def test_rescores_stale_rows_only(db, fake_classifier):
+    current = scoring_model(fake_classifier)["model_name"]
+    seed(db, [
+        ("I am happy", None, False),            # legacy row, no model recorded
+        ("I am angry", "old-model", False),     # scored by a previous model
+        ("I am scared", "lexicon", True),       # lexicon fallback
+        ("I am lonely", current, False),        # already current
+        (None, "old-model", False),             # no text to re-score
+    ])
+
+    totals = rescoring.run_rescoring(db, fake_classifier, batch_size=2, throttle=False)
+    assert totals == {"rescored": 3, "skipped": 1, "last_id": 5}
+    assert sorted(fake_classifier.scored_texts) == ["I am angry", "I am happy", "I am scared"]
+
+    rows = db.query(Analysis).order_by(Analysis.id).all()
+    assert [r.dominant_emotion for r in rows] == ["joy", "anger", "fear", "sadness", "sadness"]
+    assert all(r.needs_rescore is False for r in rows)
+    # The text-less row is stamped too, so the next run does not walk it again
+    assert [r.model_name for r in rows] == [current] * 5
+    assert rows[0].agent_response.startswith("Positive affect")
+    assert rows[3].agent_response == "old"
+
+    checkpoint = db.query(RescoreCheckpoint).one()
+    assert checkpoint.finished_at is not None and checkpoint.rescored == 3
+    assert rescoring.run_rescoring(db, fake_classifier, throttle=False)["skipped"] == 0
+
+
+def test_undecryptable_rows_keep_their_scores(db, fake_classifier):
+    seed(db, [("gAAAAABnot-a-valid-token", "old-model", True), ("I am happy", "old-model", False)])
+
+    totals = rescoring.run_rescoring(db, fake_classifier, throttle=False)
+    assert totals["rescored"] == 1 and totals["skipped"] == 1
+    assert fake_classifier.scored_texts == ["I am happy"]
+
+    row = db.query(Analysis).order_by(Analysis.id).first()
+    assert (row.dominant_emotion, row.model_name, row.needs_rescore) == ("sadness", "old-model", True)
+
+
+def test_interrupted_run_resumes_from_checkpoint(db, fake_classifier, monkeypatch):
+    seed(db, [(f"I am happy {i}", "old-model", False) for i in range(5)])
+
+    # Stop after the first chunk, as a shutdown would
+    original = rescoring.rescore_chunk
+
+    def chunk_then_stop(*args, **kwargs):
+        result = original(*args, **kwargs)
+        rescoring.stop_rescoring()
+        return result
+
+    monkeypatch.setattr(rescoring, "rescore_chunk", chunk_then_stop)
+    try:
+        first = rescoring.run_rescoring(db, fake_classifier, batch_size=2, throttle=False)
+    finally:
+        rescoring._stop.clear()
+    assert first["rescored"] == 2
+    assert db.query(RescoreCheckpoint).one().finished_at is None
+
+    monkeypatch.setattr(rescoring, "rescore_chunk", original)
+    calls_before = len(fake_classifier.scored_texts)
+    second = rescoring.run_rescoring(db, fake_classifier, batch_size=2, throttle=False)
+    assert second["rescored"] == 3
+    # Only the remaining rows were classified again
+    assert len(fake_classifier.scored_texts) - calls_before == 3
+    assert db.query(RescoreCheckpoint).one().finished_at is not None
+
+
+def test_only_one_process_runs_a_model_version(db, fake_classifier):
+    seed(db, [("I am happy", "old-model", False)])
+    model = scoring_model(fake_classifier)
+
+    held = rescoring.claim_checkpoint(db, model["model_name"], model["model_version"], "host-a:1")
+    assert held is not None and held.owner == "host-a:1"
+    # A second worker neither opens its own run nor re-classifies the rows
+    assert rescoring.claim_checkpoint(db, model["model_name"], model["model_version"], "host-b:2") is None
+    assert rescoring.run_rescoring(db, fake_classifier, throttle=False) == {"rescored": 0, "skipped": 0, "last_id": 0}
+    assert fake_classifier.scored_texts == []
+    assert db.query(RescoreCheckpoint).count() == 1
+
+
+def test_stale_claim_is_taken_over(db, fake_classifier):
+    seed(db, [("I am happy", "old-model", False)])
+    model = scoring_model(fake_classifier)
+    held = rescoring.claim_checkpoint(db, model["model_name"], model["model_version"], "crashed:1")
+    held.updated_at = datetime.utcnow() - timedelta(seconds=rescoring.RESCORE_LEASE_SECONDS + 1)
+    db.commit()
+
+    totals = rescoring.run_rescoring(db, fake_classifier, throttle=False)
+    assert totals["rescored"] == 1
+    checkpoint = db.query(RescoreCheckpoint).one()
+    assert checkpoint.finished_at is not None and checkpoint.owner is None
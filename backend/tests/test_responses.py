@@ -0,0 +1,29 @@
+"""
+Response serialization tests
+"""
+
+import json
+from datetime import datetime
+from models.database import SourceType
+from routes.analyze import EmotionScores
+from utils import responses
+from utils.responses import FastJSONResponse, model_response
+
+
+def test_fast_json_response_handles_datetimes_and_enums():
+    body = FastJSONResponse({"timestamp": datetime(2024, 5, 1, 8, 30), "source_type": SourceType.URL}).body
+    assert json.loads(body) == {"timestamp": "2024-05-01T08:30:00", "source_type": "url"}
+
+
+def test_stdlib_fallback_matches(monkeypatch):
+    payload = {"timestamp": datetime(2024, 5, 1, 8, 30), "source_type": SourceType.TEXT, "n": [1.5]}
+    fast = json.loads(responses.dumps(payload))
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(responses.dumps(payload)) == fast
+
+
+def test_model_response_is_pre_serialized():
+    scores = EmotionScores(joy=0.5, sadness=0.1, anger=0, fear=0, trust=0, disgust=0, surprise=0, anticipation=0)
+    response = model_response(scores)
+    assert response.media_type == "application/json"
+    assert json.loads(response.body)["joy"] == 0.5
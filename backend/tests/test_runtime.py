@@ -0,0 +1,41 @@
+"""
+Inference runtime configuration tests
+"""
+
+import json
+from utils.runtime import parse_cpu_list, load_runtime_config, affinity_cpus
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list("0-3,8,10-11") == [0, 1, 2, 3, 8, 10, 11]
+
+
+def test_runtime_config_file_and_env_overrides(tmp_path, monkeypatch):
+    path = tmp_path / "runtime_config.json"
+    path.write_text(json.dumps({"workers": 4, "intra_op_threads": 2, "batch_size": 16}))
+    monkeypatch.setenv("TORCH_INTRA_OP_THREADS", "3")
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+
+    config = load_runtime_config(str(path))
+    assert config["workers"] == 4
+    assert config["intra_op_threads"] == 3
+    assert config["batch_size"] == 16
+    assert config["inter_op_threads"] == 1
+
+
+def test_runtime_config_defaults_split_cpus(tmp_path, monkeypatch):
+    for env in ("WEB_CONCURRENCY", "TORCH_INTRA_OP_THREADS", "TORCH_INTER_OP_THREADS", "CPU_AFFINITY"):
+        monkeypatch.delenv(env, raising=False)
+    monkeypatch.setattr("utils.runtime.available_cpus", lambda: list(range(16)))
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+
+    config = load_runtime_config(str(tmp_path / "missing.json"))
+    assert config["intra_op_threads"] == 4
+    assert config["cpu_affinity"] is None
+
+
+def test_auto_affinity_gives_each_worker_its_own_slice(monkeypatch):
+    monkeypatch.setattr("utils.runtime.available_cpus", lambda: list(range(8)))
+    monkeypatch.setattr("utils.runtime.claim_worker_slot", lambda workers: 2)
+    assert affinity_cpus({"cpu_affinity": "auto", "workers": 4}) == [4, 5]
+    assert affinity_cpus({"cpu_affinity": "1,3", "workers": 4}) == [1, 3]
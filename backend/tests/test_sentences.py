@@ -0,0 +1,121 @@
+"""
+Sentence cache and live stream tests
+"""
+
+from fastapi.testclient import TestClient
+from main import app, ml_models
+from models.connection import init_db
+from utils import ratelimit
+from utils.ratelimit import MemoryRateLimiter
+from utils.sentences import split_sentences, score_sentences, aggregate_scores, SentenceScoreCache, get_sentence_cache
+
+
+def test_split_sentences():
+    text = "I am happy today.  Work was hard!\nStill, I feel fine"
+    assert split_sentences(text) == ["I am happy today.", "Work was hard!", "Still, I feel fine"]
+    assert split_sentences("   ") == []
+
+
+def test_score_sentences_reuses_cache(fake_classifier):
+    cache = SentenceScoreCache()
+    first = ["I am happy.", "I am sad.", "The meeting ran long."]
+    scores, rescored = score_sentences(fake_classifier, first, cache)
+    assert rescored == 3
+    assert scores[0]["joy"] > scores[0]["sadness"]
+
+    # Editing one sentence only re-scores that sentence
+    edited = ["I am happy.", "I am furious.", "The meeting ran long."]
+    scores, rescored = score_sentences(fake_classifier, edited, cache)
+    assert rescored == 1
+    assert fake_classifier.calls[-1] == ["I am furious."]
+    assert scores[1]["anger"] > scores[1]["joy"]
+
+
+def test_score_sentences_deduplicates_misses(fake_classifier):
+    _, rescored = score_sentences(fake_classifier, ["I am sad.", "I am sad."], SentenceScoreCache())
+    assert rescored == 1
+
+
+def test_score_sentences_survives_eviction(fake_classifier):
+    """More distinct sentences than the cache holds: fresh scores are returned, not read back"""
+    cache = SentenceScoreCache(max_entries=2)
+    sentences = ["I am happy.", "I am sad.", "I am furious.", "I am scared."]
+    scores, rescored = score_sentences(fake_classifier, sentences, cache)
+    assert rescored == 4
+    assert all(s is not None for s in scores)
+    assert scores[0]["joy"] > scores[0]["sadness"]
+    assert cache.hits == 0 and cache.misses == 4
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SentenceScoreCache(max_entries=2)
+    cache.put("a", {"joy": 1.0})
+    cache.put("b", {"joy": 0.5})
+    cache.get("a")
+    cache.put("c", {"joy": 0.1})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+
+def test_aggregate_scores_weights_by_length():
+    aggregated = aggregate_scores(["a", "bbb"], [{"joy": 1.0}, {"joy": 0.0}])
+    assert aggregated["joy"] == 0.25
+
+
+def test_analyze_stream_flush(fake_classifier):
+    init_db()
+    ml_models["emotion_classifier"] = fake_classifier
+    try:
+        client = TestClient(app)
+        with client.websocket_connect("/api/analyze/stream") as ws:
+            ws.send_json({"text": "I am happy. I am excited.", "flush": True})
+            update = ws.receive_json()
+            assert update["dominant_emotion"] == "joy"
+            assert update["sentences"] == 2
+
+            ws.send_json({"append": " I am sad.", "flush": True})
+            update = ws.receive_json()
+            assert update["sentences"] == 3
+            assert update["rescored"] <= 1
+    finally:
+        ml_models.pop("emotion_classifier", None)
+
+
+def test_analyze_stream_is_rate_limited_and_survives_bad_frames(fake_classifier, monkeypatch):
+    init_db()
+    monkeypatch.setattr(ratelimit, "_rate_limiter", MemoryRateLimiter(rate_per_second=0.01, burst=1))
+    ml_models["emotion_classifier"] = fake_classifier
+    try:
+        client = TestClient(app)
+        with client.websocket_connect("/api/analyze/stream") as ws:
+            ws.send_text("not json")
+            assert ws.receive_json() == {"error": "Expected a JSON object"}
+
+            ws.send_json({"text": "I am happy.", "flush": True})
+            assert ws.receive_json()["dominant_emotion"] == "joy"
+            ws.send_json({"text": "I am sad.", "flush": True})
+            denied = ws.receive_json()
+            assert denied["error"] == "Rate limit exceeded" and denied["retry_after"] > 1
+    finally:
+        ml_models.pop("emotion_classifier", None)
+
+
+def test_analyze_timeline_rescores_only_edited_sentences(fake_classifier):
+    init_db()
+    get_sentence_cache().clear()
+    ml_models["emotion_classifier"] = fake_classifier
+    try:
+        client = TestClient(app)
+        text = "I woke up happy. Then the meeting made me furious. Now I feel lonely."
+        data = client.post("/api/analyze", json={"text": text, "timeline": True}).json()
+
+        assert [s["dominant_emotion"] for s in data["timeline"]] == ["joy", "anger", "sadness"]
+        assert data["timeline"][1]["text"] == "Then the meeting made me furious."
+        assert set(data["emotion_scores"]) == set(data["timeline"][0]["emotion_scores"])
+        assert len(fake_classifier.calls) == 1
+
+        fake_classifier.calls.clear()
+        client.post("/api/analyze", json={"text": text.replace("lonely", "scared"), "timeline": True})
+        assert fake_classifier.scored_texts == ["Now I feel scared."]
+    finally:
+        ml_models.pop("emotion_classifier", None)
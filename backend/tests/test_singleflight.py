@@ -0,0 +1,55 @@
+"""
+Single-flight coalescing and URL normalization tests
+"""
+
+import threading
+import time
+import pytest
+from utils.singleflight import SingleFlight, text_fingerprint
+from utils.scraper import normalize_url
+
+
+def test_single_flight_shares_one_execution():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"dominant_emotion": "joy"}
+
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("url:a", slow_fetch)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(r is results[0] for r in results)
+    assert flight.in_flight() == 0
+
+
+def test_single_flight_propagates_errors_and_forgets_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("Could not extract text from URL")
+
+    with pytest.raises(ValueError):
+        flight.do("url:b", fail)
+    assert flight.do("url:b", lambda: 42) == 42
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Example.com:443/news/?utm_source=x&b=2&a=1#top") == "https://example.com/news?a=1&b=2"
+    assert normalize_url("http://example.com") == "http://example.com/"
+    assert normalize_url("http://example.com:8080/a") == "http://example.com:8080/a"
+
+
+def test_text_fingerprint_ignores_surrounding_whitespace():
+    assert text_fingerprint("  I am happy ") == text_fingerprint("I am happy")
@@ -0,0 +1,133 @@
+"""
+Data version, ETag and result cache tests
+"""
+
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from models.connection import init_db, SessionLocal
+from models.database import User, MoodLog
+from utils.auth import get_current_user
+from utils.versioning import RedisVersionStore, get_version_store, make_etag, result_cache
+
+
+@pytest.fixture
+def user_client(monkeypatch):
+    # Process-local versions are only trusted in explicit single-process mode
+    monkeypatch.setattr("utils.versioning.DATA_VERSIONS_SINGLE_PROCESS", True)
+    init_db()
+    db = SessionLocal()
+    user = User(firebase_uid=f"etag-{uuid.uuid4().hex}", email="etag@example.com")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app), user
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("path", ["/api/history", "/api/history/summary", "/api/mood/history"])
+def test_read_endpoints_revalidate_with_etag(user_client, path):
+    client, _ = user_client
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = client.get(path, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    # A different request shape gets a different ETag
+    if path != "/api/history/summary":
+        assert client.get(path, params={"page": 2}).headers["etag"] != etag
+
+
+def test_write_bumps_version_and_invalidates(user_client):
+    client, user = user_client
+    etag = client.get("/api/mood/history").headers["etag"]
+    version = get_version_store().get(user.id)
+
+    assert client.post("/api/mood/check-in", json={"mood_rating": 4}).status_code == 200
+    assert get_version_store().get(user.id) == version + 1
+
+    response = client.get("/api/mood/history", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+
+
+def test_result_cache_skips_queries(user_client, monkeypatch):
+    client, user = user_client
+    result_cache.clear()
+    assert client.get("/api/history/summary").json() == []
+
+    # Rows inserted behind the session hooks' back are not visible until the version moves
+    db = SessionLocal()
+    db.add(MoodLog(user_id=user.id, mood_rating=5))
+    monkeypatch.setattr("utils.versioning.bump_versions", lambda user_ids: None)
+    db.commit()
+    db.close()
+    assert client.get("/api/history/summary").json() == []
+
+    get_version_store().bump(user.id)
+    assert len(client.get("/api/history/summary").json()) == 1
+
+
+def test_process_local_versions_disable_caching_by_default(user_client, monkeypatch):
+    from utils import versioning
+
+    client, user = user_client
+    if versioning.get_version_store().shared:
+        pytest.skip("versions are shared through Redis")
+    # Not configured as single-process: other workers may exist even when WEB_CONCURRENCY is unset
+    monkeypatch.setattr(versioning, "DATA_VERSIONS_SINGLE_PROCESS", False)
+    assert client.get("/api/history/summary").json() == []
+
+    # A write seen only by another worker: this worker's version never moves
+    db = SessionLocal()
+    db.add(MoodLog(user_id=user.id, mood_rating=5))
+    monkeypatch.setattr("utils.versioning.bump_versions", lambda user_ids: None)
+    db.commit()
+    db.close()
+
+    response = client.get("/api/history/summary")
+    assert "etag" not in response.headers
+    assert len(response.json()) == 1
+
+
+class DictRedis:
+    """The few Redis commands RedisVersionStore uses, over a dict"""
+
+    def __init__(self):
+        self.data = {}
+
+    def setnx(self, key, value):
+        return self.data.setdefault(key, str(value).encode()) == str(value).encode()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+
+def test_redis_epoch_changes_when_counters_are_flushed(monkeypatch):
+    client = DictRedis()
+    store, other_worker = RedisVersionStore(client), RedisVersionStore(client)
+    assert store.epoch == other_worker.epoch
+
+    monkeypatch.setattr("utils.versioning._version_store", store)
+    store.bump(7)
+    etag = make_etag(7, "history", {})
+
+    # Flush: the counter starts over, but under a new epoch the old ETag cannot match
+    client.data.clear()
+    store.bump(7)
+    assert make_etag(7, "history", {}) != etag
@@ -0,0 +1,149 @@
+"""
+Agent response templates
+Per-mode response templates for all eight emotions and intensity bands, compiled once at import
+"""
+
+from string import Formatter
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+DEFAULT_RESPONSE = "Analysis complete. Review your emotion scores for insights."
+
+# Upper bound (exclusive) of each intensity band, checked in order
+INTENSITY_BANDS = ((0.4, "low"), (0.7, "medium"), (float("inf"), "high"))
+BAND_NAMES = tuple(name for _, name in INTENSITY_BANDS)
+
+# A template is one string for every band, or a {band: string} dict ("*" = any other band)
+TemplateSpec = Union[str, Dict[str, str]]
+
+
+def intensity_band(intensity: float) -> str:
+    """Name of the intensity band a score falls in"""
+    for upper, name in INTENSITY_BANDS:
+        if intensity < upper:
+            return name
+    return BAND_NAMES[-1]
+
+
+class CompiledTemplate:
+    """A response string parsed once; static strings skip formatting entirely"""
+
+    __slots__ = ("source", "is_static")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.is_static = all(field is None for _, field, _, _ in Formatter().parse(source))
+
+    def render(self, scores: Mapping[str, float]) -> str:
+        return self.source if self.is_static else self.source.format_map(scores)
+
+
+class AgentMode:
+    """Compiled templates of one agent mode, indexed by (emotion, band)"""
+
+    def __init__(self, name: str, templates: Dict[str, TemplateSpec], default: str = DEFAULT_RESPONSE):
+        self.name = name
+        self.default = CompiledTemplate(default)
+        self._table: Dict[Tuple[str, str], CompiledTemplate] = {}
+        for emotion, spec in templates.items():
+            bands = spec if isinstance(spec, dict) else {"*": spec}
+            for band in BAND_NAMES:
+                source = bands.get(band, bands.get("*"))
+                if source is not None:
+                    self._table[(emotion, band)] = CompiledTemplate(source)
+
+    def template(self, emotion: str, intensity: float) -> CompiledTemplate:
+        return self._table.get((emotion, intensity_band(intensity)), self.default)
+
+    def render(self, emotion: str, scores: Mapping[str, float]) -> str:
+        return self.template(emotion, scores.get(emotion, 0.0)).render(scores)
+
+
+# Registered agent modes by name
+_modes: Dict[str, AgentMode] = {}
+
+
+def register_mode(name: str, templates: Dict[str, TemplateSpec], default: str = DEFAULT_RESPONSE) -> AgentMode:
+    """
+    Compile and register (or replace) an agent mode
+
+    Args:
+        name: agent_mode value clients send
+        templates: Template per emotion; placeholders such as {anger:.1%} are filled from the scores
+        default: Response for emotions without a template
+    """
+    mode = AgentMode(name, templates, default)
+    _modes[name] = mode
+    return mode
+
+
+def get_mode(name: Optional[str]) -> Optional[AgentMode]:
+    return _modes.get(name)
+
+
+def render_response(mode: Optional[str], dominant: str, scores: Mapping[str, float]) -> str:
+    """Response text for one analysis"""
+    agent_mode = _modes.get(mode)
+    if agent_mode is None:
+        return DEFAULT_RESPONSE
+    return agent_mode.render(dominant, scores)
+
+
+def render_batch(items: Iterable[Tuple[Optional[str], str, Mapping[str, float]]]) -> List[str]:
+    """
+    Response texts for many analyses
+
+    Args:
+        items: (agent_mode, dominant emotion, scores) per analysis
+
+    Returns:
+        One response per item, in order
+    """
+    modes = _modes
+    responses = []
+    for mode, dominant, scores in items:
+        agent_mode = modes.get(mode)
+        responses.append(DEFAULT_RESPONSE if agent_mode is None else agent_mode.render(dominant, scores))
+    return responses
+
+
+register_mode("counselor", {
+    "anger": {
+        "*": "I notice you're experiencing some anger. It's completely valid to feel this way. Would you like to try a brief breathing exercise?",
+        "high": "That sounds like a lot of anger, and it's valid. Before acting on it, let's slow down together: try breathing in for four counts and out for six.",
+    },
+    "sadness": {
+        "*": "It sounds like you're going through a difficult time. Remember, it's okay to feel sad. Your emotions are valid.",
+        "high": "It sounds like you're carrying a lot of sadness right now. You don't have to hold it alone; reaching out to someone you trust could help.",
+    },
+    "fear": {
+        "*": "I sense some anxiety in your words. Let's take a moment to ground ourselves. You're safe right now.",
+        "high": "I can hear a lot of fear in this. Let's ground ourselves: name five things you can see around you. You're safe right now.",
+    },
+    "joy": "I'm glad to see you're experiencing some positive emotions. That's wonderful!",
+    "trust": "It sounds like you feel connected and supported. Those relationships are worth nurturing.",
+    "disgust": "Something here seems to have really bothered you. It's okay to step away from what doesn't sit right with you.",
+    "surprise": "It sounds like something caught you off guard. Give yourself a moment to take it in.",
+    "anticipation": "I can sense you're looking ahead to something. Noticing what you're hoping for can be grounding.",
+})
+
+register_mode("analytical", {
+    "anger": "Anger detected at {anger:.1%}. Consider identifying specific triggers to address the root cause.",
+    "sadness": "Sadness level: {sadness:.1%}. Pattern analysis suggests reviewing recent life changes.",
+    "fear": "Fear response: {fear:.1%}. Recommend cognitive reframing techniques.",
+    "joy": "Positive affect: {joy:.1%}. Maintain activities that generate this emotional state.",
+    "trust": "Trust/affection: {trust:.1%}. Social connection appears to be a stabilizing factor.",
+    "disgust": "Aversion signal: {disgust:.1%}. Identify which values or boundaries feel violated.",
+    "surprise": "Surprise: {surprise:.1%}. An unexpected event is driving this entry; log it for pattern tracking.",
+    "anticipation": "Anticipation: {anticipation:.1%}. Forward-looking focus detected; consider planning concrete next steps.",
+})
+
+register_mode("brutally_honest", {
+    "anger": "You're angry. That's clear. Now, what are you going to do about it?",
+    "sadness": "Feeling down won't solve anything. Time to identify what's actually wrong and take action.",
+    "fear": "Fear is just your brain's alarm system. Is the threat real or imagined?",
+    "joy": "Good. Keep doing whatever led to this feeling.",
+    "trust": "You trust someone. Make sure they've earned it.",
+    "disgust": "Something disgusts you. Decide whether to change it or walk away from it.",
+    "surprise": "Didn't see that coming, did you? Adjust and move on.",
+    "anticipation": "Waiting for something? Stop waiting and start preparing.",
+})
@@ -0,0 +1,309 @@
+"""
+Cold-data archival
+Moves months older than the hot window out of analyses/mood_logs into compressed columnar files
+"""
+
+import gzip
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import JSON, Boolean, DateTime, Enum, Float, Integer, delete, func, select, text
+
+from models.database import Analysis, AnalysisEmbedding, ArchivedPartition, MoodLog
+from utils.partitions import add_months, is_partitioned, month_start, partition_exists, partition_name
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Where archive files are written
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(BACKEND_DIR, "archive"))
+# Months kept in the hot tables (the history summary reads the last 180 days)
+HOT_WINDOW_MONTHS = int(os.getenv("HOT_WINDOW_MONTHS", 7))
+# Rows streamed per batch while archiving (one Parquet row group each)
+ARCHIVE_CHUNK_SIZE = int(os.getenv("ARCHIVE_CHUNK_SIZE", 5000))
+
+# Archived tables and their time column
+ARCHIVED_TABLES = {"analyses": (Analysis, "timestamp"), "mood_logs": (MoodLog, "created_at")}
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+
+def hot_window_start(now: Optional[datetime] = None) -> datetime:
+    """Oldest month still kept in the hot tables"""
+    return add_months(month_start(now or datetime.utcnow()), -HOT_WINDOW_MONTHS)
+
+
+def _arrow_type(column):
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _encode(model, row: Dict) -> Dict:
+    """Database row -> archive record (JSON columns as strings, enums as values)"""
+    record = {}
+    for column in model.__table__.columns:
+        value = row[column.name]
+        if isinstance(column.type, JSON) and value is not None:
+            value = json.dumps(value)
+        elif isinstance(column.type, Enum) and value is not None:
+            value = getattr(value, "value", value)
+        record[column.name] = value
+    return record
+
+
+def _decode(model, record: Dict) -> Dict:
+    """Archive record -> row dict shaped like the ORM attributes"""
+    row = dict(record)
+    for column in model.__table__.columns:
+        value = row.get(column.name)
+        if isinstance(column.type, JSON) and isinstance(value, str):
+            row[column.name] = json.loads(value)
+        elif isinstance(column.type, Enum) and column.type.enum_class and isinstance(value, str):
+            row[column.name] = column.type.enum_class(value)
+        elif isinstance(column.type, DateTime) and isinstance(value, str):
+            row[column.name] = datetime.fromisoformat(value)
+        elif hasattr(value, "to_pydatetime"):
+            row[column.name] = value.to_pydatetime()
+    return row
+
+
+def _archive_path(table_name: str, month: datetime) -> str:
+    """Next unused file name for a month (a month can be archived in several parts)"""
+    directory = os.path.join(ARCHIVE_DIR, table_name)
+    os.makedirs(directory, exist_ok=True)
+    extension = "parquet" if pq is not None else "ndjson.gz"
+    part = 0
+    while True:
+        path = os.path.join(directory, f"{month:%Y-%m}.{part}.{extension}")
+        if not os.path.exists(path):
+            return path
+        part += 1
+
+
+def write_archive_file(path: str, model, batches: Iterator[List[Dict]]) -> int:
+    """
+    Stream row batches into an archive file
+
+    Parquet (zstd, one row group per batch) when pyarrow is installed,
+    otherwise gzip-compressed NDJSON.
+
+    Returns:
+        Number of rows written
+    """
+    written = 0
+    if path.endswith(".parquet"):
+        schema = pa.schema([(c.name, _arrow_type(c)) for c in model.__table__.columns])
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for batch in batches:
+                writer.write_table(pa.Table.from_pylist([_encode(model, row) for row in batch], schema=schema))
+                written += len(batch)
+        return written
+
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for batch in batches:
+            for row in batch:
+                f.write(json.dumps(_encode(model, row), default=str) + "\n")
+            written += len(batch)
+    return written
+
+
+def read_archive_file(
+    path: str,
+    model,
+    time_column: str,
+    user_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> List[Dict]:
+    """Read one user's rows in [start, end] from an archive file"""
+    if path.endswith(".parquet"):
+        filters = [("user_id", "=", user_id)]
+        if start is not None:
+            filters.append((time_column, ">=", start))
+        if end is not None:
+            filters.append((time_column, "<=", end))
+        records = pq.read_table(path, filters=filters).to_pylist()
+        return [_decode(model, record) for record in records]
+
+    rows = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            row = _decode(model, json.loads(line))
+            if row["user_id"] != user_id:
+                continue
+            if (start is not None and row[time_column] < start) or (end is not None and row[time_column] > end):
+                continue
+            rows.append(row)
+    return rows
+
+
+def _batches(db, statement) -> Iterator[List[Dict]]:
+    result = db.execute(statement.execution_options(yield_per=ARCHIVE_CHUNK_SIZE)).mappings()
+    for batch in result.partitions():
+        yield [dict(row) for row in batch]
+
+
+def archive_month(db, table_name: str, month: datetime) -> int:
+    """
+    Move one month of a table into an archive file
+
+    On a partitioned PostgreSQL table the month's partition is detached,
+    exported and dropped. Otherwise (SQLite, unpartitioned tables, rows
+    that landed in the DEFAULT partition) the exported rows are deleted
+    by id, so rows inserted concurrently are never lost.
+
+    Returns:
+        Number of rows archived
+    """
+    from utils.versioning import bump_versions
+
+    model, time_column = ARCHIVED_TABLES[table_name]
+    column = getattr(model, time_column)
+    next_month = add_months(month, 1)
+    conn = db.connection()
+
+    detached = None
+    if is_partitioned(conn, table_name) and partition_exists(conn, table_name, month):
+        detached = partition_name(table_name, month)
+        db.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {detached}"))
+        statement = select(text("*")).select_from(text(detached)).order_by(text(f'user_id, "{time_column}"'))
+    else:
+        statement = select(model.__table__).where(column >= month, column < next_month).order_by(
+            model.user_id, column
+        )
+
+    archived_ids: List[int] = []
+    user_ids = set()
+
+    def tracked(batches):
+        for batch in batches:
+            archived_ids.extend(row["id"] for row in batch)
+            user_ids.update(row["user_id"] for row in batch)
+            yield batch
+
+    path = _archive_path(table_name, month)
+    rows = write_archive_file(path, model, tracked(_batches(db, statement)))
+    if rows == 0:
+        os.unlink(path)
+        if detached:
+            db.execute(text(f"DROP TABLE {detached}"))
+            db.commit()
+        else:
+            db.rollback()
+        return 0
+
+    try:
+        if table_name == "analyses":
+            for offset in range(0, len(archived_ids), 500):
+                db.execute(delete(AnalysisEmbedding).where(
+                    AnalysisEmbedding.analysis_id.in_(archived_ids[offset:offset + 500])
+                ))
+        if detached:
+            db.execute(text(f"DROP TABLE {detached}"))
+        else:
+            for offset in range(0, len(archived_ids), 500):
+                db.execute(delete(model).where(model.id.in_(archived_ids[offset:offset + 500])))
+        db.add(ArchivedPartition(
+            table_name=table_name, month=f"{month:%Y-%m}", path=os.path.relpath(path, ARCHIVE_DIR), row_count=rows
+        ))
+        db.commit()
+    except Exception:
+        db.rollback()
+        os.unlink(path)
+        raise
+
+    # Core deletes bypass the session hooks that bump data versions
+    bump_versions(user_ids)
+    logger.info(f"📦 Archived {rows} {table_name} rows for {month:%Y-%m} to {path}")
+    return rows
+
+
+def run_archival(db, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Archive every month older than the hot window
+
+    Returns:
+        Rows archived per table
+    """
+    cutoff = hot_window_start(now)
+    totals = {}
+    for table_name, (model, time_column) in ARCHIVED_TABLES.items():
+        column = getattr(model, time_column)
+        totals[table_name] = 0
+        oldest = db.query(func.min(column)).filter(column < cutoff).scalar()
+        if oldest is None:
+            continue
+        month = month_start(oldest)
+        while month < cutoff:
+            totals[table_name] += archive_month(db, table_name, month)
+            month = add_months(month, 1)
+    return totals
+
+
+def read_archived(
+    db,
+    table_name: str,
+    user_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> List[Dict]:
+    """
+    Read a user's archived rows whose time falls in [start, end]
+
+    Only files for months overlapping the range are opened.
+
+    Returns:
+        Row dicts (same keys as the table columns), newest first
+    """
+    model, time_column = ARCHIVED_TABLES[table_name]
+    query = db.query(ArchivedPartition).filter(ArchivedPartition.table_name == table_name)
+    if start is not None:
+        query = query.filter(ArchivedPartition.month >= f"{start:%Y-%m}")
+    if end is not None:
+        query = query.filter(ArchivedPartition.month <= f"{end:%Y-%m}")
+
+    rows = []
+    for entry in query.all():
+        path = os.path.join(ARCHIVE_DIR, entry.path)
+        if not os.path.exists(path):
+            logger.error(f"❌ Missing archive file {path}")
+            continue
+        rows.extend(read_archive_file(path, model, time_column, user_id, start, end))
+
+    rows.sort(key=lambda row: row[time_column], reverse=True)
+    return rows
+
+
+
+def iter_archived(db, table_name: str, user_id: int) -> Iterator[List[Dict]]:
+    """Yield a user's archived rows one archive file at a time, oldest month first"""
+    model, time_column = ARCHIVED_TABLES[table_name]
+    entries = db.query(ArchivedPartition).filter(
+        ArchivedPartition.table_name == table_name
+    ).order_by(ArchivedPartition.month, ArchivedPartition.id).all()
+
+    for entry in entries:
+        path = os.path.join(ARCHIVE_DIR, entry.path)
+        if not os.path.exists(path):
+            logger.error(f"❌ Missing archive file {path}")
+            continue
+        rows = read_archive_file(path, model, time_column, user_id)
+        if rows:
+            rows.sort(key=lambda row: row[time_column])
+            yield rows
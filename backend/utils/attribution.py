@@ -0,0 +1,102 @@
+"""
+Trigger word attribution
+Ranks words by how much they contribute to the dominant emotion using batched occlusion
+"""
+
+import os
+import re
+from typing import Dict, List
+
+from utils.sentences import classify_batch
+
+# Compute cap: at most this many words are occluded per request (one forward pass each, batched)
+TRIGGER_MAX_CANDIDATES = int(os.getenv("TRIGGER_MAX_CANDIDATES", 24))
+# Attribution only looks at the head of very long texts
+TRIGGER_MAX_CHARS = int(os.getenv("TRIGGER_MAX_CHARS", 1000))
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]+")
+
+STOPWORDS = {
+    "the", "and", "but", "for", "with", "that", "this", "was", "were", "are", "have", "has",
+    "had", "you", "your", "its", "it's", "i'm", "not", "just", "about", "from", "into", "they",
+    "them", "then", "than", "there", "their", "what", "when", "where", "which", "who", "will",
+    "would", "could", "should", "been", "being", "very", "really", "all", "any", "some", "our",
+    "out", "his", "her", "she", "him", "can", "did", "does", "doing", "also", "because", "after",
+    "before", "today", "feel", "feeling", "felt", "myself", "over", "more", "much", "too"
+}
+
+
+def candidate_words(text: str, max_candidates: int = TRIGGER_MAX_CANDIDATES) -> List[str]:
+    """
+    Pick the words worth occluding
+
+    Stopwords and very short tokens are skipped. When the text has more
+    distinct words than the budget allows, longer words are preferred.
+    """
+    seen: Dict[str, int] = {}
+    for match in _WORD.finditer(text):
+        word = match.group(0).lower()
+        if len(word) < 3 or word in STOPWORDS or word in seen:
+            continue
+        seen[word] = match.start()
+
+    words = list(seen)
+    if len(words) > max_candidates:
+        words = sorted(words, key=lambda w: (-len(w), seen[w]))[:max_candidates]
+        words.sort(key=lambda w: seen[w])
+    return words
+
+
+def _occlude(text: str, word: str) -> str:
+    """Remove every occurrence of a word (case-insensitive, whole word)"""
+    pattern = re.compile(rf"(?<![A-Za-z']){re.escape(word)}(?![A-Za-z'])", re.IGNORECASE)
+    return ' '.join(pattern.sub(' ', text).split())
+
+
+def extract_trigger_words(
+    classifier,
+    text: str,
+    emotion: str,
+    top_k: int = 5,
+    max_candidates: int = TRIGGER_MAX_CANDIDATES
+) -> List[Dict[str, float]]:
+    """
+    Rank words by their contribution to an emotion
+
+    The text and one variant per occluded word are scored in a single
+    batched classifier call; a word's weight is the drop in the emotion's
+    score when it is removed.
+
+    Args:
+        classifier: Hugging Face text-classification pipeline
+        text: Text that was analyzed
+        emotion: Plutchik emotion to attribute (usually the dominant one)
+        top_k: Number of words to return
+        max_candidates: Upper bound on occluded variants (compute cap)
+
+    Returns:
+        List of {"word", "weight"} dicts sorted by weight, strongest first
+    """
+    from routes.analyze import normalize_emotion_scores
+
+    text = text[:TRIGGER_MAX_CHARS]
+    words = candidate_words(text, max_candidates)
+    if not words:
+        return []
+
+    variants = [_occlude(text, word) for word in words]
+    raw_outputs = classify_batch(classifier, [text] + variants)
+    scores = [getattr(normalize_emotion_scores(raw), emotion) for raw in raw_outputs]
+
+    base_score = scores[0]
+    ranked = sorted(
+        ((word, base_score - score) for word, score in zip(words, scores[1:])),
+        key=lambda item: item[1],
+        reverse=True
+    )
+
+    return [
+        {"word": word, "weight": round(weight, 4)}
+        for word, weight in ranked[:top_k]
+        if weight > 0
+    ]
@@ -8,7 +8,8 @@ import firebase_admin
 from firebase_admin import auth, credentials
 from fastapi import Header, HTTPException, Depends, status
 from sqlalchemy.orm import Session
-from models.connection import get_db
+from typing import Generator
+from models.connection import get_db, read_session_factory
 from models.database import User
 import logging
 
@@ -132,3 +133,17 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid or expired token: {str(e)}"
         )
+
+
+def get_read_db(current_user: User = Depends(get_current_user)) -> Generator[Session, None, None]:
+    """
+    Dependency for read-only routes: a replica session for the current user
+
+    Falls back to the primary for users who wrote within the stickiness
+    window (READ_STICKINESS_SECONDS), preserving read-your-writes.
+    """
+    db = read_session_factory(current_user.id)()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,315 @@
+"""
+Text embeddings and per-user similarity search
+Mean-pooled classifier hidden states, stored as int8 and searched with a top-k dot product
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Token limit for embedding inputs (matches the classifier's truncation)
+EMBEDDING_MAX_TOKENS = int(os.getenv("EMBEDDING_MAX_TOKENS", 512))
+# Rows dequantized at once while scoring a query (bounds the float32 scratch per search)
+SEARCH_BLOCK_ROWS = int(os.getenv("EMBEDDING_SEARCH_BLOCK_ROWS", 4096))
+
+
+def embed_texts(classifier, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+    """
+    Embed texts with the classifier's own encoder
+
+    The last hidden layer is mean-pooled over real tokens, so no second
+    model has to be loaded.
+
+    Args:
+        classifier: Hugging Face text-classification pipeline
+        texts: Texts to embed
+        batch_size: Texts per forward pass (defaults to the runtime config)
+
+    Returns:
+        float32 array of shape (len(texts), hidden_size), L2-normalized
+    """
+    import torch
+
+    if batch_size is None:
+        from utils.runtime import inference_batch_size
+        batch_size = inference_batch_size()
+
+    model, tokenizer = classifier.model, classifier.tokenizer
+    chunks = []
+    with torch.inference_mode():
+        for offset in range(0, len(texts), batch_size):
+            inputs = tokenizer(
+                texts[offset:offset + batch_size], padding=True, truncation=True,
+                max_length=EMBEDDING_MAX_TOKENS, return_tensors="pt"
+            ).to(model.device)
+            hidden = model(**inputs, output_hidden_states=True).hidden_states[-1]
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            chunks.append(pooled.float().cpu().numpy())
+
+    if not chunks:
+        return np.zeros((0, 0), dtype=np.float32)
+    return normalize_rows(np.concatenate(chunks))
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so dot products are cosine similarities"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize(vector: np.ndarray) -> Tuple[bytes, float]:
+    """
+    Symmetric int8 quantization of one vector
+
+    Returns:
+        (int8 bytes, scale) where vector ≈ int8 * scale
+    """
+    scale = float(np.abs(vector).max()) / 127.0 or 1.0
+    return np.round(vector / scale).astype(np.int8).tobytes(), scale
+
+
+def dequantize(data: bytes, scale: float) -> np.ndarray:
+    """Inverse of quantize()"""
+    return np.frombuffer(data, dtype=np.int8).astype(np.float32) * scale
+
+
+def quantize_rows(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """quantize() applied to every row: (int8 codes, float32 scales)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.zeros(0, dtype=np.float32)
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales
+
+
+class UserVectors:
+    """
+    Growable int8 matrix of one user's vectors plus their scales and analysis ids
+
+    Vectors stay quantized in memory (a quarter of float32) and are
+    dequantized SEARCH_BLOCK_ROWS at a time while scoring a query.
+    """
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.dim = dim
+        self.count = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.codes = np.zeros((capacity, dim), dtype=np.int8)
+        self.scales = np.zeros(capacity, dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def add(self, ids: List[int], vectors: np.ndarray) -> None:
+        """Append float vectors (quantized the same way stored embeddings are)"""
+        codes, scales = quantize_rows(vectors)
+        self.add_quantized(ids, codes, scales)
+
+    def add_quantized(self, ids: List[int], codes: np.ndarray, scales: np.ndarray) -> None:
+        with self._lock:
+            self._append(ids, codes, scales)
+
+    def _append(self, ids: List[int], codes: np.ndarray, scales: np.ndarray) -> None:
+        ids = np.asarray(ids, dtype=np.int64)
+        codes, scales = np.asarray(codes, dtype=np.int8), np.asarray(scales, dtype=np.float32)
+
+        # Ids already present were re-embedded (re-scoring): overwrite them in place
+        present = np.isin(ids, self.ids[:self.count])
+        if present.any():
+            order = np.argsort(self.ids[:self.count])
+            positions = order[np.searchsorted(self.ids[:self.count], ids[present], sorter=order)]
+            self.codes[positions] = codes[present]
+            self.scales[positions] = scales[present]
+            ids, codes, scales = ids[~present], codes[~present], scales[~present]
+        if self.dim == 0 and len(ids):
+            self.dim = codes.shape[1]
+            self.codes = np.zeros((len(self.ids), self.dim), dtype=np.int8)
+
+        needed = self.count + len(ids)
+        if needed > len(self.ids):
+            capacity = max(needed, len(self.ids) * 2)
+            self.ids = np.resize(self.ids, capacity)
+            self.scales = np.resize(self.scales, capacity)
+            grown = np.zeros((capacity, self.dim), dtype=np.int8)
+            grown[:self.count] = self.codes[:self.count]
+            self.codes = grown
+        self.ids[self.count:needed] = ids
+        self.codes[self.count:needed] = codes
+        self.scales[self.count:needed] = scales
+        self.count = needed
+
+    def vector_for(self, analysis_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            positions = np.nonzero(self.ids[:self.count] == analysis_id)[0]
+            if not len(positions):
+                return None
+            return self.codes[positions[0]].astype(np.float32) * self.scales[positions[0]]
+
+    def search(self, query: np.ndarray, k: int, exclude_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Top-k analysis ids by cosine similarity to a normalized query"""
+        query = np.asarray(query, dtype=np.float32)
+        with self._lock:
+            if self.count == 0 or k <= 0:
+                return []
+            count = self.count
+            ids, codes, scales = self.ids[:count].copy(), self.codes, self.scales[:count].copy()
+            similarities = np.empty(count, dtype=np.float32)
+            for start in range(0, count, SEARCH_BLOCK_ROWS):
+                end = min(start + SEARCH_BLOCK_ROWS, count)
+                similarities[start:end] = codes[start:end].astype(np.float32) @ query
+        similarities *= scales
+        if exclude_id is not None:
+            similarities[ids == exclude_id] = -np.inf
+        k = min(k, len(ids))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [(int(ids[i]), float(similarities[i])) for i in top if np.isfinite(similarities[i])]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes + self.ids.nbytes
+
+
+class EmbeddingIndex:
+    """
+    In-memory per-user vector index with LRU eviction
+
+    A user's vectors are loaded from the database on first search and kept
+    current by add(); users that fall out of the LRU are reloaded on demand.
+    """
+
+    def __init__(self, max_users: int = 256):
+        self.max_users = max_users
+        self._users: "OrderedDict[Tuple[int, str], UserVectors]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        user_id: int,
+        model_name: str,
+        loader: Callable[[], Tuple[List[int], np.ndarray, np.ndarray]]
+    ) -> UserVectors:
+        """Return a user's vectors, loading (ids, int8 codes, scales) with `loader` on a miss"""
+        key = (user_id, model_name)
+        with self._lock:
+            vectors = self._users.get(key)
+            if vectors is not None:
+                self._users.move_to_end(key)
+                return vectors
+
+        ids, codes, scales = loader()
+        vectors = UserVectors(dim=codes.shape[1], capacity=max(len(ids), 64))
+        if len(ids):
+            vectors.add_quantized(ids, codes, scales)
+
+        with self._lock:
+            # Another request may have loaded the same user concurrently
+            existing = self._users.get(key)
+            if existing is not None:
+                return existing
+            self._users[key] = vectors
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return vectors
+
+    def add(self, user_id: int, model_name: str, ids: List[int], codes: np.ndarray, scales: np.ndarray) -> None:
+        """Add or replace quantized vectors if the user is resident (otherwise the next load picks them up)"""
+        with self._lock:
+            resident = self._users.get((user_id, model_name))
+            if resident is not None:
+                resident.add_quantized(ids, codes, scales)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+
+def load_user_vectors(db, user_id: int, model_name: str) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """Read a user's stored embeddings as (ids, int8 codes, scales)"""
+    from models.database import AnalysisEmbedding
+
+    rows = db.query(AnalysisEmbedding.analysis_id, AnalysisEmbedding.vector, AnalysisEmbedding.scale).filter(
+        AnalysisEmbedding.user_id == user_id,
+        AnalysisEmbedding.model_name == model_name
+    ).all()
+    if not rows:
+        return [], np.zeros((0, 0), dtype=np.int8), np.zeros(0, dtype=np.float32)
+
+    ids = [row.analysis_id for row in rows]
+    codes = np.frombuffer(b"".join(row.vector for row in rows), dtype=np.int8).reshape(len(rows), -1)
+    scales = np.array([row.scale for row in rows], dtype=np.float32)
+    return ids, codes, scales
+
+
+def index_analyses(db, classifier, user_id: int, analysis_ids: List[int], texts: List[str]) -> int:
+    """
+    Embed new analyses, store the quantized vectors and update the live index
+
+    Returns:
+        Number of vectors stored
+    """
+    from models.database import AnalysisEmbedding
+    from utils.sentences import classifier_name
+
+    if not analysis_ids:
+        return 0
+
+    model_name = classifier_name(classifier)
+    vectors = embed_texts(classifier, texts)
+
+    rows = []
+    for analysis_id, vector in zip(analysis_ids, vectors):
+        data, scale = quantize(vector)
+        rows.append(AnalysisEmbedding(
+            analysis_id=analysis_id, user_id=user_id, model_name=model_name, vector=data, scale=scale
+        ))
+    db.add_all(rows)
+    db.commit()
+
+    # Serve the same (quantized) values the next cold load would read back
+    codes = np.stack([np.frombuffer(row.vector, dtype=np.int8) for row in rows])
+    scales = np.array([row.scale for row in rows], dtype=np.float32)
+    get_embedding_index().add(user_id, model_name, list(analysis_ids), codes, scales)
+    return len(rows)
+
+
+def _index_analysis_job(job, classifier, user_id: int, analysis_id: int, text: str) -> int:
+    """Background worker: embed one freshly saved analysis"""
+    from models.connection import SessionLocal
+    from utils.ratelimit import admission
+
+    db = SessionLocal()
+    try:
+        # A second forward pass: it counts against the inference limit like the request's own
+        return admission.run(index_analyses, db, classifier, user_id, [analysis_id], [text], shed=False)
+    finally:
+        db.close()
+
+
+def schedule_indexing(classifier, user_id: int, analysis_id: int, text: str) -> None:
+    """Queue embedding of a new analysis so the request does not wait for it"""
+    from utils.jobs import get_job_queue
+
+    try:
+        get_job_queue().submit(_index_analysis_job, classifier, user_id, analysis_id, text)
+    except Exception as e:
+        logger.error(f"❌ Could not queue embedding for analysis {analysis_id}: {e}")
+
+
+# Global embedding index instance
+_embedding_index: Optional[EmbeddingIndex] = None
+
+
+def get_embedding_index() -> EmbeddingIndex:
+    """Get or create global embedding index"""
+    global _embedding_index
+
+    if _embedding_index is None:
+        _embedding_index = EmbeddingIndex(max_users=int(os.getenv("EMBEDDING_INDEX_MAX_USERS", 256)))
+
+    return _embedding_index
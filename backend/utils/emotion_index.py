@@ -0,0 +1,187 @@
+"""
+Per-user emotion-vector index
+Array-backed copies of each user's 8-emotion score vectors for similarity and clustering queries
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Column order of every emotion matrix
+EMOTIONS = ("joy", "sadness", "anger", "fear", "trust", "disgust", "surprise", "anticipation")
+
+
+def to_matrix(score_dicts: List[Optional[dict]]) -> np.ndarray:
+    """Stack emotion_scores JSON objects into an (n, 8) float32 matrix"""
+    return np.array(
+        [[float((scores or {}).get(emotion, 0.0)) for emotion in EMOTIONS] for scores in score_dicts],
+        dtype=np.float32
+    ).reshape(len(score_dicts), len(EMOTIONS))
+
+
+def unit_rows(matrix: np.ndarray) -> np.ndarray:
+    """Row-normalize so a dot product is cosine similarity"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def kmeans(points: np.ndarray, k: int, iterations: int = 50, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cluster points with k-means (k-means++ initialization)
+
+    Returns:
+        (centroids of shape (k, dim), cluster label per point)
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(points))
+    centroids = [points[rng.integers(len(points))]]
+    for _ in range(1, k):
+        distances = ((points[:, None, :] - np.array(centroids)[None]) ** 2).sum(-1).min(axis=1)
+        if distances.sum() == 0:
+            break
+        centroids.append(points[rng.choice(len(points), p=distances / distances.sum())])
+    centroids = np.array(centroids)
+
+    labels = np.zeros(len(points), dtype=np.int64)
+    for iteration in range(iterations):
+        new_labels = ((points[:, None, :] - centroids[None]) ** 2).sum(-1).argmin(axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for cluster in range(len(centroids)):
+            members = points[labels == cluster]
+            if len(members):
+                centroids[cluster] = members.mean(axis=0)
+    return centroids, labels
+
+
+class EmotionVectors:
+    """Immutable snapshot of one user's analyses as arrays"""
+
+    def __init__(self, ids: np.ndarray, timestamps: np.ndarray, scores: np.ndarray):
+        self.ids = ids
+        self.timestamps = timestamps
+        self.scores = scores
+        self.unit = unit_rows(scores)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def position(self, analysis_id: int) -> Optional[int]:
+        positions = np.nonzero(self.ids == analysis_id)[0]
+        return int(positions[0]) if len(positions) else None
+
+    def similar(self, analysis_id: int, k: int) -> List[Tuple[int, float]]:
+        """Nearest analyses by cosine distance, excluding the analysis itself"""
+        position = self.position(analysis_id)
+        if position is None:
+            return []
+        distances = 1.0 - self.unit @ self.unit[position]
+        distances[position] = np.inf
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        return [(int(self.ids[i]), float(distances[i])) for i in top]
+
+    def daily(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mean emotion vector per calendar day
+
+        Returns:
+            (sorted datetime64[D] days, (n_days, 8) mean vectors)
+        """
+        days = self.timestamps.astype("datetime64[D]")
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        sums = np.zeros((len(unique_days), self.scores.shape[1]), dtype=np.float64)
+        np.add.at(sums, inverse, self.scores)
+        counts = np.bincount(inverse, minlength=len(unique_days))[:, None]
+        return unique_days, (sums / counts).astype(np.float32)
+
+    def similar_days(self, analysis_id: int, k: int) -> List[Tuple[str, float]]:
+        """Days whose average mood is closest to the given analysis"""
+        position = self.position(analysis_id)
+        if position is None:
+            return []
+        days, means = self.daily()
+        distances = 1.0 - unit_rows(means) @ self.unit[position]
+        # Exclude the analysis's own day
+        distances[days == self.timestamps[position].astype("datetime64[D]")] = np.inf
+        order = [i for i in np.argsort(distances)[:k] if np.isfinite(distances[i])]
+        return [(str(days[i]), float(distances[i])) for i in order]
+
+
+def load_emotion_vectors(db, user_id: int) -> EmotionVectors:
+    """Read a user's analyses into arrays (one query, no ORM objects)"""
+    from models.database import Analysis
+
+    rows = db.query(Analysis.id, Analysis.timestamp, Analysis.emotion_scores).filter(
+        Analysis.user_id == user_id
+    ).order_by(Analysis.timestamp).all()
+
+    return EmotionVectors(
+        ids=np.array([row.id for row in rows], dtype=np.int64),
+        timestamps=np.array([row.timestamp for row in rows], dtype="datetime64[s]"),
+        scores=to_matrix([row.emotion_scores for row in rows])
+    )
+
+
+class EmotionIndex:
+    """
+    LRU of per-user EmotionVectors
+
+    Snapshots are tagged with the user's data version (utils.versioning),
+    so any write to the user's analyses triggers a reload on next use.
+    Nothing is cached when versions are not shared across workers.
+    """
+
+    def __init__(self, max_users: int = 512):
+        self.max_users = max_users
+        self._users: "OrderedDict[int, Tuple[Tuple[str, int], EmotionVectors]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, db, user_id: int) -> EmotionVectors:
+        from utils.versioning import get_version_store, versions_are_shared
+
+        if not versions_are_shared():
+            return load_emotion_vectors(db, user_id)
+        store = get_version_store()
+        # The epoch changes when shared counters are reset, so a reset counter cannot match an old snapshot
+        version = (store.epoch, store.get(user_id))
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[0] == version:
+                self._users.move_to_end(user_id)
+                return entry[1]
+
+        vectors = load_emotion_vectors(db, user_id)
+        with self._lock:
+            self.loads += 1
+            self._users[user_id] = (version, vectors)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return vectors
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+
+# Global emotion index instance
+_emotion_index: Optional[EmotionIndex] = None
+
+
+def get_emotion_index() -> EmotionIndex:
+    """Get or create global emotion index"""
+    global _emotion_index
+
+    if _emotion_index is None:
+        _emotion_index = EmotionIndex(max_users=int(os.getenv("EMOTION_INDEX_MAX_USERS", 512)))
+
+    return _emotion_index
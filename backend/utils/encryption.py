@@ -2,13 +2,43 @@
 AES-256 Encryption utilities for securing user thoughts
 """
 
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.backends import default_backend
+from functools import lru_cache
 import base64
 import os
-from typing import Optional
+from typing import List, Optional
+
+BASE_SALT = b'emotion_analysis_salt'
+
+# Fernet tokens are base64 of a version byte 0x80 followed by a timestamp
+FERNET_TOKEN_PREFIX = "gAAAAA"
+
+
+@lru_cache(maxsize=int(os.getenv("ENCRYPTION_KEY_CACHE_SIZE", 1024)))
+def _derive_fernet(key: str, salt: bytes) -> Fernet:
+    """
+    Derive a Fernet cipher (cached: PBKDF2 runs 100k iterations)
+    
+    Args:
+        key: String encryption key
+        salt: Key derivation salt
+        
+    Returns:
+        Fernet cipher instance
+    """
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+        backend=default_backend()
+    )
+    
+    derived_key = base64.urlsafe_b64encode(kdf.derive(key.encode()))
+    return Fernet(derived_key)
 
 
 class EncryptionManager:
@@ -28,6 +58,7 @@ class EncryptionManager:
             raise ValueError("ENCRYPTION_KEY environment variable not set")
         
         # Derive a proper Fernet key from the encryption key
+        self._key = encryption_key
         self.fernet = self._create_fernet(encryption_key)
     
     def _create_fernet(self, key: str) -> Fernet:
@@ -41,16 +72,52 @@ class EncryptionManager:
             Fernet cipher instance
         """
         # Use PBKDF2HMAC to derive a proper 32-byte key
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=b'emotion_analysis_salt',  # In production, use random salt per user
-            iterations=100000,
-            backend=default_backend()
-        )
+        return _derive_fernet(key, BASE_SALT)
+    
+    def user_fernet(self, user_salt: str) -> Fernet:
+        """
+        Per-user cipher derived from the base key and a user-specific salt
         
-        derived_key = base64.urlsafe_b64encode(kdf.derive(key.encode()))
-        return Fernet(derived_key)
+        Args:
+            user_salt: Stable per-user value (e.g. Firebase UID)
+            
+        Returns:
+            Fernet cipher instance (cached across calls)
+        """
+        return _derive_fernet(self._key, BASE_SALT + b':' + user_salt.encode('utf-8'))
+    
+    def encrypt_for_user(self, user_salt: str, plaintext: str) -> str:
+        """Encrypt text with the user's key"""
+        if not plaintext:
+            return ""
+        
+        return self.user_fernet(user_salt).encrypt(plaintext.encode('utf-8')).decode('utf-8')
+    
+    def decrypt_many_for_user(self, user_salt: str, ciphertexts: List[Optional[str]]) -> List[Optional[str]]:
+        """
+        Decrypt a batch of values with a single key lookup
+        
+        Values that are not Fernet tokens (rows stored before encryption
+        was enabled) are returned unchanged.
+        
+        Args:
+            user_salt: Stable per-user value used at encryption time
+            ciphertexts: Stored values (None allowed)
+            
+        Returns:
+            Plaintexts in the same order
+        """
+        fernet = self.user_fernet(user_salt)
+        plaintexts = []
+        for value in ciphertexts:
+            if not value or not value.startswith(FERNET_TOKEN_PREFIX):
+                plaintexts.append(value)
+                continue
+            try:
+                plaintexts.append(fernet.decrypt(value.encode('utf-8')).decode('utf-8'))
+            except InvalidToken:
+                plaintexts.append(value)
+        return plaintexts
     
     def encrypt_text(self, plaintext: str) -> str:
         """
@@ -107,3 +174,22 @@ def encrypt(text: str) -> str:
 def decrypt(text: str) -> str:
     """Convenience function to decrypt text"""
     return get_encryption_manager().decrypt_text(text)
+
+
+def thought_encryption_enabled() -> bool:
+    """Whether new thoughts are stored encrypted (ENCRYPT_THOUGHTS + ENCRYPTION_KEY)"""
+    return os.getenv("ENCRYPT_THOUGHTS", "false").lower() == "true" and bool(os.getenv("ENCRYPTION_KEY"))
+
+
+def encrypt_thought(user_salt: str, text: Optional[str]) -> Optional[str]:
+    """Encrypt a thought for storage, or pass it through when encryption is off"""
+    if not text or not thought_encryption_enabled():
+        return text
+    return get_encryption_manager().encrypt_for_user(user_salt, text)
+
+
+def decrypt_thoughts(user_salt: str, values: List[Optional[str]]) -> List[Optional[str]]:
+    """Decrypt a page of stored thoughts in one batch"""
+    if not os.getenv("ENCRYPTION_KEY") or not any(v and v.startswith(FERNET_TOKEN_PREFIX) for v in values):
+        return values
+    return get_encryption_manager().decrypt_many_for_user(user_salt, values)
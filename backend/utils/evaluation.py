@@ -0,0 +1,88 @@
+"""
+Classifier evaluation helpers
+Labeled dataset loading, Plutchik accuracy/F1 metrics and Pareto selection across backends
+"""
+
+import csv
+import json
+import math
+from typing import Dict, List, Sequence, Tuple
+
+EMOTIONS = ("joy", "sadness", "anger", "fear", "trust", "disgust", "surprise", "anticipation")
+
+# Dataset labels from the 6-label source model, mapped the same way normalize_emotion_scores does
+LABEL_ALIASES = {"love": "trust"}
+
+
+def normalize_label(label: str) -> str:
+    label = label.strip().lower()
+    return LABEL_ALIASES.get(label, label)
+
+
+def load_labeled_dataset(path: str) -> List[Tuple[str, str]]:
+    """
+    Read (text, label) pairs from CSV or NDJSON with `text` and `label` fields
+
+    Raises:
+        ValueError: On a label outside the eight Plutchik emotions
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.endswith((".csv", ".tsv")):
+            records = list(csv.DictReader(f, delimiter="\t" if path.endswith(".tsv") else ","))
+        else:
+            records = [json.loads(line) for line in f if line.strip()]
+
+    examples = []
+    for line_no, record in enumerate(records, start=1):
+        label = normalize_label(str(record.get("label", "")))
+        if label not in EMOTIONS:
+            raise ValueError(f"Record {line_no}: unknown label {record.get('label')!r}")
+        examples.append((str(record["text"]), label))
+    return examples
+
+
+def classification_report(gold: Sequence[str], predicted: Sequence[str]) -> Dict:
+    """
+    Accuracy plus precision/recall/F1 per Plutchik emotion
+
+    Macro-F1 averages over emotions that occur in the gold labels, so
+    emotions the dataset never covers do not drag the score to zero.
+    """
+    per_emotion = {}
+    for emotion in EMOTIONS:
+        tp = sum(1 for g, p in zip(gold, predicted) if g == emotion and p == emotion)
+        fp = sum(1 for g, p in zip(gold, predicted) if g != emotion and p == emotion)
+        fn = sum(1 for g, p in zip(gold, predicted) if g == emotion and p != emotion)
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_emotion[emotion] = {
+            "precision": round(precision, 4), "recall": round(recall, 4), "f1": round(f1, 4), "support": tp + fn
+        }
+
+    covered = [m["f1"] for m in per_emotion.values() if m["support"]]
+    correct = sum(1 for g, p in zip(gold, predicted) if g == p)
+    return {
+        "accuracy": round(correct / len(gold), 4) if gold else 0.0,
+        "macro_f1": round(sum(covered) / len(covered), 4) if covered else 0.0,
+        "per_emotion": per_emotion
+    }
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (q in [0, 100])"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def pareto_front(results: List[Dict], maximize=("macro_f1", "throughput"), minimize=("peak_memory_mb",)) -> List[Dict]:
+    """Results not dominated on quality, speed and memory"""
+    def dominates(a, b):
+        no_worse = all(a[k] >= b[k] for k in maximize) and all(a[k] <= b[k] for k in minimize)
+        better = any(a[k] > b[k] for k in maximize) or any(a[k] < b[k] for k in minimize)
+        return no_worse and better
+
+    return [r for r in results if not any(dominates(other, r) for other in results if other is not r)]
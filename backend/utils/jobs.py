@@ -0,0 +1,165 @@
+"""
+In-process background job queue
+Runs slow work (scraping, bulk classification) on a worker pool and tracks results by job id
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus:
+    """Job lifecycle states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job:
+    """A unit of background work and its outcome"""
+
+    def __init__(self, key: Optional[str] = None, owner_id: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.owner_id = owner_id
+        self.status = JobStatus.QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.progress: Dict[str, Any] = {}
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes or the timeout expires"""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "progress": self.progress,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobQueue:
+    """Thread-pool backed job queue with in-flight deduplication by key"""
+
+    def __init__(self, max_workers: int = 4, max_retained: int = 1000):
+        """
+        Initialize job queue
+
+        Args:
+            max_workers: Number of background worker threads
+            max_retained: Finished jobs kept for polling before the oldest are dropped
+        """
+        self.max_retained = max_retained
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._in_flight: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        key: Optional[str] = None,
+        owner_id: Optional[int] = None,
+        **kwargs
+    ) -> Job:
+        """
+        Queue a callable for background execution
+
+        Args:
+            fn: Callable run on a worker thread; it receives the Job as first argument
+            key: Deduplication key; while a job with the same key is queued or
+                running, that job is returned instead of queueing a new one
+            owner_id: User the job belongs to
+
+        Returns:
+            The queued (or already in-flight) job
+        """
+        with self._lock:
+            if key is not None and key in self._in_flight:
+                return self._in_flight[key]
+
+            job = Job(key=key, owner_id=owner_id)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._in_flight[key] = job
+            self._evict_finished()
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args, kwargs) -> None:
+        job.status = JobStatus.RUNNING
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = JobStatus.DONE
+        except Exception as e:
+            logger.error(f"❌ Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if job.key is not None and self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+            job._done.set()
+
+    def _evict_finished(self) -> None:
+        """Drop the oldest finished jobs once retention is exceeded (lock held)"""
+        if len(self._jobs) <= self.max_retained:
+            return
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_retained:
+                break
+            if self._jobs[job_id].finished:
+                del self._jobs[job_id]
+
+
+# Global job queue instance
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create global job queue"""
+    global _job_queue
+
+    if _job_queue is None:
+        _job_queue = JobQueue(max_workers=int(os.getenv("JOB_WORKERS", 4)))
+
+    return _job_queue
+
+
+def shutdown_job_queue() -> None:
+    """Stop workers and discard the global queue"""
+    global _job_queue
+
+    if _job_queue is not None:
+        _job_queue.shutdown(wait=False)
+        _job_queue = None
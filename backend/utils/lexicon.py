@@ -0,0 +1,181 @@
+"""
+Lexicon emotion classifier
+NRC-style word -> Plutchik emotion weights, used when the transformer model is unavailable or overloaded
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+# Recorded as model_name / model_version on rows scored by the lexicon
+MODEL_NAME = "lexicon"
+VERSION = "1"
+SCORING_MODEL = {"model_name": MODEL_NAME, "model_version": VERSION}
+
+EMOTIONS = ("joy", "sadness", "anger", "fear", "trust", "disgust", "surprise", "anticipation")
+
+# Plutchik opposites: a negated word counts toward the opposite emotion
+OPPOSITES = {
+    "joy": "sadness", "sadness": "joy",
+    "anger": "fear", "fear": "anger",
+    "trust": "disgust", "disgust": "trust",
+    "surprise": "anticipation", "anticipation": "surprise",
+}
+
+NEGATORS = {"not", "no", "never", "nothing", "nobody", "without", "hardly", "barely", "isn't", "wasn't",
+            "don't", "didn't", "doesn't", "can't", "couldn't", "won't", "wouldn't", "aren't", "ain't"}
+INTENSIFIERS = {"very": 1.5, "so": 1.3, "really": 1.4, "extremely": 1.8, "super": 1.5, "totally": 1.4,
+                "completely": 1.5, "incredibly": 1.7, "deeply": 1.5, "truly": 1.3, "too": 1.2}
+# Words after a negator or intensifier that it still applies across ("not at all happy")
+_NEGATION_SCOPE = 3
+
+# Weight 1.0 = strongly associated, 0.5 = loosely associated (after the NRC Emotion Lexicon)
+_SEED: Dict[str, Dict[str, float]] = {
+    "joy": {
+        "happy": 1.0, "happiness": 1.0, "joy": 1.0, "joyful": 1.0, "glad": 1.0, "delighted": 1.0,
+        "cheerful": 1.0, "excited": 0.8, "thrilled": 1.0, "great": 0.6, "wonderful": 1.0, "amazing": 0.8,
+        "awesome": 0.8, "fantastic": 0.8, "love": 0.6, "loved": 0.6, "fun": 0.8, "smile": 0.8, "smiling": 0.8,
+        "laugh": 0.8, "laughing": 0.8, "celebrate": 1.0, "proud": 0.8, "grateful": 0.8, "thankful": 0.8,
+        "blessed": 0.8, "beautiful": 0.6, "peaceful": 0.6, "relieved": 0.6, "good": 0.5, "enjoy": 0.8,
+        "content": 0.6, "win": 0.6, "won": 0.6, "success": 0.8, "best": 0.5, "yay": 1.0,
+    },
+    "sadness": {
+        "sad": 1.0, "sadness": 1.0, "unhappy": 1.0, "depressed": 1.0, "depression": 1.0, "down": 0.5,
+        "lonely": 1.0, "alone": 0.6, "cry": 1.0, "crying": 1.0, "cried": 1.0, "tears": 0.8, "grief": 1.0,
+        "grieving": 1.0, "miss": 0.6, "missing": 0.5, "lost": 0.6, "loss": 0.8, "hurt": 0.8, "heartbroken": 1.0,
+        "hopeless": 1.0, "empty": 0.6, "miserable": 1.0, "tired": 0.5, "exhausted": 0.5, "disappointed": 0.8,
+        "regret": 0.8, "sorry": 0.5, "died": 1.0, "death": 0.8, "passed": 0.5, "gloomy": 0.8, "worthless": 1.0,
+        "broken": 0.6, "failed": 0.6, "failure": 0.8,
+    },
+    "anger": {
+        "angry": 1.0, "anger": 1.0, "mad": 1.0, "furious": 1.0, "rage": 1.0, "annoyed": 0.8, "irritated": 0.8,
+        "frustrated": 0.8, "frustrating": 0.8, "hate": 1.0, "hated": 1.0, "outraged": 1.0, "livid": 1.0,
+        "pissed": 1.0, "resent": 0.8, "unfair": 0.8, "unacceptable": 0.8, "lied": 0.6, "betrayed": 0.8,
+        "yell": 0.8, "yelled": 0.8, "scream": 0.6, "fight": 0.6, "argument": 0.6, "stupid": 0.6,
+        "ignored": 0.6, "interrupting": 0.5, "bitter": 0.6, "hostile": 0.8, "insulted": 0.8,
+    },
+    "fear": {
+        "afraid": 1.0, "scared": 1.0, "fear": 1.0, "frightened": 1.0, "terrified": 1.0, "anxious": 1.0,
+        "anxiety": 1.0, "worried": 1.0, "worry": 0.8, "nervous": 0.8, "panic": 1.0, "panicking": 1.0,
+        "dread": 1.0, "uneasy": 0.8, "threat": 0.8, "danger": 0.8, "dangerous": 0.8, "unsafe": 0.8,
+        "horror": 0.8, "terror": 1.0, "stress": 0.6, "stressed": 0.6, "overwhelmed": 0.6, "insecure": 0.6,
+        "dark": 0.5, "fail": 0.5, "layoffs": 0.6, "risk": 0.5, "shaking": 0.6, "trembling": 0.8,
+    },
+    "trust": {
+        "trust": 1.0, "trusted": 1.0, "reliable": 0.8, "loyal": 1.0, "faithful": 0.8, "honest": 0.8,
+        "support": 0.8, "supported": 0.8, "supportive": 0.8, "safe": 0.6, "secure": 0.6, "friend": 0.6,
+        "friends": 0.6, "family": 0.5, "partner": 0.5, "adore": 0.8, "love": 0.8, "loving": 0.8, "care": 0.6,
+        "caring": 0.6, "believe": 0.6, "confident": 0.6, "depend": 0.6, "count": 0.5, "together": 0.5,
+        "hug": 0.6, "kind": 0.6, "respect": 0.8, "appreciate": 0.6, "team": 0.5,
+    },
+    "disgust": {
+        "disgust": 1.0, "disgusted": 1.0, "disgusting": 1.0, "gross": 1.0, "revolting": 1.0, "sick": 0.6,
+        "nauseous": 0.8, "vile": 1.0, "nasty": 0.8, "awful": 0.6, "horrible": 0.6, "repulsive": 1.0,
+        "filthy": 0.8, "dirty": 0.6, "rotten": 0.8, "creepy": 0.6, "ashamed": 0.6, "shame": 0.6,
+        "hypocrite": 0.8, "toxic": 0.8, "cheated": 0.6, "corrupt": 0.8, "ugly": 0.6, "yuck": 1.0,
+    },
+    "surprise": {
+        "surprise": 1.0, "surprised": 1.0, "surprising": 1.0, "shocked": 1.0, "shock": 1.0, "amazed": 0.8,
+        "astonished": 1.0, "stunned": 1.0, "unexpected": 1.0, "unexpectedly": 1.0, "suddenly": 0.8,
+        "sudden": 0.8, "wow": 1.0, "whoa": 1.0, "omg": 0.8, "unbelievable": 0.8, "believe": 0.3,
+        "speechless": 0.8, "startled": 1.0, "cancelled": 0.5, "expect": 0.5,
+    },
+    "anticipation": {
+        "anticipate": 1.0, "anticipation": 1.0, "expect": 0.6, "expecting": 0.8, "hope": 0.8, "hoping": 0.8,
+        "hopeful": 0.8, "eager": 1.0, "waiting": 0.6, "wait": 0.5, "soon": 0.5, "tomorrow": 0.5, "plan": 0.6,
+        "planning": 0.6, "future": 0.6, "upcoming": 0.8, "prepare": 0.6, "preparing": 0.6, "ready": 0.6,
+        "goal": 0.6, "curious": 0.6, "wonder": 0.5, "countdown": 1.0, "trip": 0.5, "deadline": 0.5,
+    },
+}
+
+# Additive prior so texts with few matches do not produce extreme scores
+PRIOR = 0.05
+
+_TOKEN = re.compile(r"[a-z][a-z']*")
+_SUFFIXES = ("ness", "ing", "ed", "ly", "es", "s")
+
+
+def _compile(seed: Dict[str, Dict[str, float]]) -> Dict[str, Tuple[Tuple[int, float], ...]]:
+    """Flatten the seed lists into word -> ((emotion index, weight), ...)"""
+    table: Dict[str, Dict[int, float]] = {}
+    for index, emotion in enumerate(EMOTIONS):
+        for word, weight in seed[emotion].items():
+            table.setdefault(word, {})[index] = weight
+    return {word: tuple(sorted(weights.items())) for word, weights in table.items()}
+
+
+LEXICON = _compile(_SEED)
+_OPPOSITE_INDEX = tuple(EMOTIONS.index(OPPOSITES[e]) for e in EMOTIONS)
+
+
+def lookup(word: str) -> Tuple[Tuple[int, float], ...]:
+    """Lexicon entry for a word, trying common suffix stems when it is not listed as-is"""
+    entry = LEXICON.get(word)
+    if entry is not None:
+        return entry
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            stem = word[:-len(suffix)]
+            entry = LEXICON.get(stem) or LEXICON.get(stem + "e")
+            if entry is not None:
+                return entry
+    return ()
+
+
+def _matches(text: str) -> List[Tuple[str, int, float]]:
+    """(word, emotion index, weight) for every lexicon hit, with negation and intensifiers applied"""
+    hits = []
+    negated_until = intensified_until = -1
+    boost = 1.0
+    for position, token in enumerate(_TOKEN.findall(text.lower())):
+        if token in NEGATORS or token.endswith("n't"):
+            negated_until = position + _NEGATION_SCOPE
+            continue
+        if token in INTENSIFIERS:
+            boost, intensified_until = INTENSIFIERS[token], position + _NEGATION_SCOPE
+            continue
+        entry = lookup(token)
+        if not entry:
+            continue
+        scale = boost if position <= intensified_until else 1.0
+        negated = position <= negated_until
+        for index, weight in entry:
+            if negated:
+                # "not happy" reads as mild sadness rather than joy
+                hits.append((token, _OPPOSITE_INDEX[index], weight * scale * 0.5))
+            else:
+                hits.append((token, index, weight * scale))
+    return hits
+
+
+def score_text(text: str) -> Dict[str, float]:
+    """
+    Score a text against the lexicon
+
+    Returns:
+        8-emotion Plutchik scores summing to 1 (uniform when no word matches)
+    """
+    totals = [PRIOR] * len(EMOTIONS)
+    for _, index, weight in _matches(text):
+        totals[index] += weight
+    norm = sum(totals)
+    return {emotion: totals[i] / norm for i, emotion in enumerate(EMOTIONS)}
+
+
+def trigger_words(text: str, emotion: str, top_k: int = 5) -> List[Dict[str, float]]:
+    """
+    Words that contributed to an emotion, strongest first
+
+    Returns:
+        List of {"word", "weight"} dicts, weights relative to the strongest word
+    """
+    index = EMOTIONS.index(emotion)
+    weights: Dict[str, float] = {}
+    for word, hit_index, weight in _matches(text):
+        if hit_index == index:
+            weights[word] = weights.get(word, 0.0) + weight
+    if not weights:
+        return []
+    strongest = max(weights.values())
+    ranked = sorted(weights.items(), key=lambda x: x[1], reverse=True)[:top_k]
+    return [{"word": word, "weight": round(weight / strongest, 4)} for word, weight in ranked]
+
@@ -0,0 +1,189 @@
+"""
+Monthly table partitioning
+PostgreSQL range partitions on analyses.timestamp and mood_logs.created_at
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Partitioned tables and their partition key
+PARTITIONED_TABLES = {"analyses": "timestamp", "mood_logs": "created_at"}
+
+
+def partition_indexes(table: str) -> List[Tuple[str, List[str]]]:
+    """
+    Secondary indexes to recreate on a partitioned parent (inherited by every partition)
+
+    Read from the model so indexes added later are never left behind. The
+    index on id alone is covered by the (id, <partition key>) primary key;
+    unique indexes are skipped because PostgreSQL requires the partition
+    key in them.
+    """
+    from models.database import Base
+
+    indexes = []
+    for index in sorted(Base.metadata.tables[table].indexes, key=lambda i: i.name):
+        columns = [column.name for column in index.columns]
+        if index.unique:
+            logger.warning(f"⚠️ Unique index {index.name} cannot be recreated on partitioned {table}")
+        elif columns != ["id"]:
+            indexes.append((index.name, columns))
+    return indexes
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant of the month containing value"""
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Shift a month start by a number of months"""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def is_partitioned(conn, table: str) -> bool:
+    """True if the table is a PostgreSQL partitioned parent"""
+    if not is_postgres(conn):
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :t"
+    ), {"t": table}).first() is not None
+
+
+def partition_exists(conn, table: str, month: datetime) -> bool:
+    return conn.execute(
+        text("SELECT to_regclass(:name) IS NOT NULL"), {"name": partition_name(table, month)}
+    ).scalar()
+
+
+def create_month_partition(conn, table: str, month: datetime) -> None:
+    """
+    Create the partition holding one month of rows (no-op if it exists)
+
+    PostgreSQL refuses to add a range partition while the DEFAULT partition
+    holds rows in that range (future-dated imports, or months archival has
+    not caught up with). Those rows are moved into a standalone table that
+    is then attached as the month's partition, all in the caller's
+    transaction.
+    """
+    if partition_exists(conn, table, month):
+        return
+
+    name = partition_name(table, month)
+    start, end = month, add_months(month, 1)
+    bounds = f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    default = f"{table}_default"
+    has_default = conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": default}).scalar()
+    if not has_default:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} {bounds}"))
+        return
+
+    key = PARTITIONED_TABLES[table]
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = conn.execute(text(
+        f'WITH moved AS (DELETE FROM {default} WHERE "{key}" >= :start AND "{key}" < :end RETURNING *) '
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), {"start": start, "end": end}).rowcount
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}"))
+    if moved:
+        logger.info(f"📦 Moved {moved} {table} rows from the DEFAULT partition into {name}")
+
+
+def ensure_partitions(engine, months_ahead: int = 3, now: Optional[datetime] = None) -> int:
+    """
+    Create partitions for the current month and the next few
+
+    No-op on SQLite and on PostgreSQL tables that were not converted by
+    migrate_partitions.py. Rows outside any month partition land in the
+    DEFAULT partition, so a missed run never rejects writes. Each month is
+    its own transaction; a failure is logged and the rest still run.
+
+    Returns:
+        Number of partitions checked
+    """
+    if not is_postgres(engine):
+        return 0
+
+    current = month_start(now or datetime.utcnow())
+    with engine.connect() as conn:
+        tables = [table for table in PARTITIONED_TABLES if is_partitioned(conn, table)]
+
+    checked = 0
+    for table in tables:
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            try:
+                with engine.begin() as conn:
+                    create_month_partition(conn, table, month)
+                checked += 1
+            except Exception as e:
+                logger.error(f"❌ Could not create partition {partition_name(table, month)}: {e}")
+    return checked
+
+
+def convert_to_partitioned(engine, table: str, months_ahead: int = 3) -> None:
+    """
+    Rebuild a plain table as a monthly range-partitioned table (PostgreSQL)
+
+    The primary key becomes (id, <partition key>) because PostgreSQL
+    requires the partition key in every unique constraint; foreign keys
+    that referenced <table>.id alone are dropped with the old table (each
+    is logged). For analyses that is analysis_embeddings.analysis_id, so
+    code deleting analyses must delete their embeddings itself, as
+    archival does.
+    """
+    key = PARTITIONED_TABLES[table]
+    legacy = f"{table}_unpartitioned"
+
+    with engine.begin() as conn:
+        if is_partitioned(conn, table):
+            logger.info(f"ℹ️ {table} is already partitioned")
+            return
+
+        conn.execute(text(f'UPDATE {table} SET "{key}" = now() WHERE "{key}" IS NULL'))
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+        conn.execute(text(f"ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey"))
+        conn.execute(text(
+            f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ("{key}")'
+        ))
+        conn.execute(text(f'ALTER TABLE {table} ADD PRIMARY KEY (id, "{key}")'))
+        conn.execute(text(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id"))
+        for name, columns in partition_indexes(table):
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            quoted = ", ".join(f'"{c}"' for c in columns)
+            conn.execute(text(f"CREATE INDEX {name} ON {table} ({quoted})"))
+        conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+
+        oldest = conn.execute(text(f'SELECT min("{key}") FROM {legacy}')).scalar()
+        current = month_start(datetime.utcnow())
+        month = month_start(oldest) if oldest else current
+        while month <= add_months(current, months_ahead):
+            create_month_partition(conn, table, month)
+            month = add_months(month, 1)
+
+        conn.execute(text(f"INSERT INTO {table} SELECT * FROM {legacy}"))
+        # CASCADE drops foreign keys pointing at the old table (and their ON DELETE CASCADE)
+        for constraint, referencing in conn.execute(text(
+            "SELECT conname, conrelid::regclass::text FROM pg_constraint "
+            "WHERE confrelid = CAST(:legacy AS regclass) AND contype = 'f'"
+        ), {"legacy": legacy}):
+            logger.warning(
+                f"⚠️ Dropping foreign key {constraint} on {referencing}: rows there are no longer "
+                f"deleted with their {table} rows and must be deleted explicitly"
+            )
+        conn.execute(text(f"DROP TABLE {legacy} CASCADE"))
@@ -0,0 +1,350 @@
+"""
+Per-request profiling
+Stack-sampled profiles plus timed SQL for slow or explicitly flagged requests, kept in a bounded ring buffer
+"""
+
+import hmac
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Shared secret: requests carrying it in PROFILE_HEADER are always profiled, and it guards the admin routes
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN") or None
+# Keep a profile of any request on PROFILING_PATHS slower than this (0 = off)
+PROFILING_SLOW_MS = float(os.getenv("PROFILING_SLOW_MS", 0))
+PROFILING_PATHS = tuple(
+    p.strip() for p in os.getenv("PROFILING_PATHS", "/api/analyze,/api/history/summary").split(",") if p.strip()
+)
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", 5))
+PROFILING_BUFFER_SIZE = int(os.getenv("PROFILING_BUFFER_SIZE", 50))
+PROFILING_MAX_STATEMENTS = int(os.getenv("PROFILING_MAX_STATEMENTS", 500))
+
+PROFILE_HEADER = "x-profile-token"
+# Admin requests carry the token too; they are never profiled themselves
+ADMIN_PREFIX = "/api/admin/profiles"
+
+_MAX_DEPTH = 200
+_MAX_STATEMENT_CHARS = 1000
+# A thread whose innermost Python frame is in one of these is waiting, not working
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", os.path.join("concurrent", "futures", "thread.py"))
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Profile of the request being handled (copied into threadpool work by Starlette)
+_current: ContextVar[Optional["Profile"]] = ContextVar("current_profile", default=None)
+
+
+class Profile:
+    """Samples and SQL statements collected for one request"""
+
+    def __init__(self, profile_id: int, method: str, path: str, trigger: str):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.started_at = datetime.utcnow()
+        self.status: Optional[int] = None
+        self.duration_ms: Optional[float] = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.statements: List[Dict] = []
+        self.dropped_statements = 0
+        self._started = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def add_statement(self, statement: str, duration_ms: float, executemany: bool) -> None:
+        if len(self.statements) >= PROFILING_MAX_STATEMENTS:
+            self.dropped_statements += 1
+            return
+        # Parameters are left out: they can hold user text
+        self.statements.append({
+            "statement": statement[:_MAX_STATEMENT_CHARS],
+            "duration_ms": round(duration_ms, 3),
+            "offset_ms": round(self.elapsed_ms() - duration_ms, 3),
+            "executemany": executemany
+        })
+
+    def finish(self) -> None:
+        self.duration_ms = round(self.elapsed_ms(), 3)
+
+    def folded(self) -> str:
+        """Folded stacks ("frame;frame;leaf count" per line) for flamegraph.pl, speedscope or inferno"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict:
+        sql_ms = sum(s["duration_ms"] for s in self.statements)
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            "sql_statements": len(self.statements) + self.dropped_statements,
+            "sql_ms": round(sql_ms, 3)
+        }
+
+    def to_dict(self, top_stacks: int = 20) -> Dict:
+        return {
+            **self.summary(),
+            "sample_interval_ms": PROFILING_INTERVAL_MS,
+            "top_stacks": [{"stack": s, "samples": c} for s, c in self.stacks.most_common(top_stacks)],
+            "statements": self.statements,
+            "dropped_statements": self.dropped_statements
+        }
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    if filename.startswith(_BACKEND_DIR):
+        return os.path.relpath(filename, _BACKEND_DIR)
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.sep.join(filename.split(os.sep)[-2:])
+
+
+def fold_stack(frame, thread_name: str) -> Optional[str]:
+    """Root-first "func (file:line)" frames joined by ';', or None when the thread is idle"""
+    if frame.f_code.co_filename.endswith(_IDLE_FILES):
+        return None
+    frames = []
+    while frame is not None and len(frames) < _MAX_DEPTH:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":"))
+        frame = frame.f_back
+    frames.append(f"thread:{thread_name}".replace(";", ":"))
+    return ";".join(reversed(frames))
+
+
+class StackSampler:
+    """
+    One background thread sampling every thread while profiles are active
+
+    Threads that ran SQL for a profiled request are attributed to that
+    request only. Other busy threads (the event loop, threadpool work that
+    has not touched the database yet, background jobs) are added to every
+    active profile, rooted at their thread name, since they compete with
+    the request for the GIL and the loop.
+    """
+
+    def __init__(self, interval_ms: float = PROFILING_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._lock = threading.Lock()
+        self._active: List[Profile] = []
+        self._owners: Dict[int, Profile] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.remove(profile)
+            for ident in [i for i, owner in self._owners.items() if owner is profile]:
+                del self._owners[ident]
+
+    def attach(self, profile: Optional[Profile]) -> None:
+        """Attribute the current thread's samples to a profile (None releases it)"""
+        # Runs before every SQL statement: skip the lock when nothing is attributed
+        if profile is None and not self._owners:
+            return
+        with self._lock:
+            if profile is None:
+                self._owners.pop(threading.get_ident(), None)
+            elif profile in self._active:
+                self._owners[threading.get_ident()] = profile
+
+    def sample(self) -> None:
+        with self._lock:
+            active = list(self._active)
+            owners = dict(self._owners)
+        if not active:
+            return
+        names = {t.ident: t.name for t in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = fold_stack(frame, names.get(ident, str(ident)))
+            if stack is None:
+                continue
+            owner = owners.get(ident)
+            for profile in [owner] if owner is not None else active:
+                profile.stacks[stack] += 1
+                profile.samples += 1
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._lock:
+                    if not self._active:
+                        self._thread = None
+                        return
+                self.sample()
+                time.sleep(self.interval)
+        finally:
+            # If sampling raised, let the next start() launch a fresh thread
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+
+class ProfileStore:
+    """Most recent profiles, oldest dropped first"""
+
+    def __init__(self, max_profiles: int = PROFILING_BUFFER_SIZE):
+        self._profiles = deque(maxlen=max_profiles)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> List[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    _sampler.attach(profile)
+    if profile is not None and context is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is not None and started is not None:
+        profile.add_statement(statement, (time.perf_counter() - started) * 1000, executemany)
+
+
+def install_sql_hooks() -> None:
+    """Time statements of profiled requests on every engine (primary and replicas)"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    return bool(PROFILING_TOKEN and token and hmac.compare_digest(token, PROFILING_TOKEN))
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests that carry the admin token header, or that run
+    slower than slow_ms on one of the watched paths
+
+    Slow-request profiling samples every request on the watched paths and
+    keeps only the slow ones, so it costs a little on each; the token
+    trigger costs nothing for other requests. Profiled responses to the
+    header trigger carry X-Profile-Id.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        slow_ms: Optional[float] = None,
+        paths: Optional[tuple] = None
+    ) -> None:
+        self.app = app
+        self.slow_ms = PROFILING_SLOW_MS if slow_ms is None else slow_ms
+        self.paths = PROFILING_PATHS if paths is None else tuple(paths)
+        install_sql_hooks()
+
+    def _trigger(self, scope: Scope) -> Optional[str]:
+        path = scope["path"]
+        if path.startswith(ADMIN_PREFIX):
+            return None
+        if PROFILING_TOKEN and is_admin_token(Headers(scope=scope).get(PROFILE_HEADER)):
+            return "header"
+        if self.slow_ms > 0 and path.startswith(self.paths):
+            return "slow"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        store = get_profile_store()
+        profile = Profile(store.next_id(), scope["method"], scope["path"], trigger)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                if trigger == "header":
+                    MutableHeaders(scope=message)["X-Profile-Id"] = str(profile.id)
+            await send(message)
+
+        token = _current.set(profile)
+        _sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _sampler.stop(profile)
+            _current.reset(token)
+            profile.finish()
+            if profile.status is None:
+                profile.status = 500
+            if trigger == "header" or profile.duration_ms >= self.slow_ms:
+                store.add(profile)
+                logger.warning(
+                    f"🐢 Profiled {profile.method} {profile.path} ({trigger}): {profile.duration_ms:.0f} ms, "
+                    f"{len(profile.statements)} SQL statements, profile {profile.id}"
+                )
+
+
+_sampler = StackSampler()
+
+# Global profile store instance
+_profile_store: Optional[ProfileStore] = None
+
+
+def get_profile_store() -> ProfileStore:
+    """Get or create global profile store"""
+    global _profile_store
+
+    if _profile_store is None:
+        _profile_store = ProfileStore()
+
+    return _profile_store
@@ -0,0 +1,238 @@
+"""
+Query plan checks
+EXPLAIN every query shape the history, summary and mood routes send and flag full scans and temp sorts
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.orm import Session
+
+from models.database import Analysis, Base, MoodLog
+
+
+@dataclass
+class QueryShape:
+    """One SQL shape a route generates, and the composite index that serves it"""
+    name: str
+    build: Callable[[Session, int, datetime], object]  # -> Select
+    table: str
+    index: Tuple[str, ...]
+
+
+def _count(query):
+    """The statement Query.count() sends"""
+    return select(func.count()).select_from(query.statement.subquery())
+
+
+def _page(query, column, limit: int = 10, offset: int = 20):
+    return query.order_by(column.desc()).limit(limit).offset(offset).statement
+
+
+def _history_shapes() -> List[QueryShape]:
+    from routes.analyze import history_query
+
+    # Filter combinations the history screen sends -> (filters, best index)
+    variants = {
+        "all": ({}, ("user_id", "timestamp")),
+        "source_type": ({"source_type": "TEXT"}, ("user_id", "source_type", "timestamp")),
+        "emotion": ({"emotion": "joy"}, ("user_id", "dominant_emotion", "timestamp")),
+        "source_type+emotion": ({"source_type": "TEXT", "emotion": "joy"}, ("user_id", "dominant_emotion", "timestamp")),
+        "search": ({"search": "work"}, ("user_id", "timestamp")),
+        "date_range": ({"dates": True}, ("user_id", "timestamp")),
+        "emotion+date_range": ({"emotion": "joy", "dates": True}, ("user_id", "dominant_emotion", "timestamp")),
+        "source_type+date_range": ({"source_type": "TEXT", "dates": True}, ("user_id", "source_type", "timestamp")),
+    }
+
+    def builder(filters, counted):
+        def build(db, user_id, now):
+            dates = (now - timedelta(days=30), now) if filters.get("dates") else (None, None)
+            query = history_query(
+                db, user_id, filters.get("source_type"), filters.get("emotion"), filters.get("search"), *dates
+            )
+            return _count(query) if counted else _page(query, Analysis.timestamp)
+        return build
+
+    shapes = []
+    for name, (filters, index) in variants.items():
+        shapes.append(QueryShape(f"history[{name}] page", builder(filters, False), "analyses", index))
+        shapes.append(QueryShape(f"history[{name}] count", builder(filters, True), "analyses", index))
+    return shapes
+
+
+def _other_shapes() -> List[QueryShape]:
+    from routes.analyze import summary_queries
+    from routes.mood import mood_history_query
+
+    def summary(which):
+        def build(db, user_id, now):
+            return summary_queries(db, user_id, now - timedelta(days=180))[which].statement
+        return build
+
+    return [
+        QueryShape("summary analyses", summary(0), "analyses", ("user_id", "timestamp")),
+        QueryShape("summary mood_logs", summary(1), "mood_logs", ("user_id", "created_at")),
+        QueryShape(
+            "mood history page",
+            lambda db, user_id, now: _page(mood_history_query(db, user_id), MoodLog.created_at),
+            "mood_logs", ("user_id", "created_at")
+        ),
+        QueryShape(
+            "mood history count",
+            lambda db, user_id, now: _count(mood_history_query(db, user_id)),
+            "mood_logs", ("user_id", "created_at")
+        ),
+        QueryShape(
+            "export analyses",
+            lambda db, user_id, now: select(Analysis).where(Analysis.user_id == user_id).order_by(Analysis.timestamp),
+            "analyses", ("user_id", "timestamp")
+        ),
+        QueryShape(
+            "export mood_logs",
+            lambda db, user_id, now: select(MoodLog).where(MoodLog.user_id == user_id).order_by(MoodLog.created_at),
+            "mood_logs", ("user_id", "created_at")
+        ),
+    ]
+
+
+def query_shapes() -> List[QueryShape]:
+    """Every checked query shape"""
+    return _history_shapes() + _other_shapes()
+
+
+class _Captured(Exception):
+    pass
+
+
+def _capture_listener(conn, cursor, statement, parameters, context, executemany):
+    if conn.info.get("capture_sql") is not None:
+        conn.info["capture_sql"].append((statement, parameters))
+        raise _Captured()
+
+
+def capture_sql(conn, statement) -> Tuple[str, object]:
+    """SQL text and driver parameters for a statement, without running it"""
+    engine = conn.engine
+    if not event.contains(engine, "before_cursor_execute", _capture_listener):
+        event.listen(engine, "before_cursor_execute", _capture_listener)
+    conn.info["capture_sql"] = captured = []
+    try:
+        conn.execute(statement)
+    except _Captured:
+        pass
+    finally:
+        conn.info["capture_sql"] = None
+    return captured[0]
+
+
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+def explain(conn, statement) -> Tuple[List[str], List[str]]:
+    """
+    EXPLAIN a statement
+
+    Returns:
+        Tuple of (plan lines, problems); problems name full table scans
+        and sorts/temp b-trees the indexes did not avoid
+    """
+    sql, parameters = capture_sql(conn, statement)
+    tables = set(Base.metadata.tables)
+
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        lines = [row[3] for row in rows]
+        problems = []
+        for line in lines:
+            match = _SQLITE_SCAN.match(line)
+            if match and match.group(1) in tables:
+                problems.append(f"full scan: {line}")
+            if "USE TEMP B-TREE" in line:
+                problems.append(f"temp sort: {line}")
+        return lines, problems
+
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    lines, problems = [], []
+
+    def walk(node, depth=0):
+        relation = node.get("Relation Name")
+        label = node["Node Type"] + (f" on {relation}" if relation else "")
+        if node.get("Index Name"):
+            label += f" using {node['Index Name']}"
+        lines.append("  " * depth + label)
+        if node["Node Type"] == "Seq Scan" and relation in tables:
+            problems.append(f"full scan: {label}")
+        if node["Node Type"] == "Sort":
+            problems.append(f"sort: {label} by {', '.join(node.get('Sort Key', []))}")
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(plan[0]["Plan"])
+    return lines, problems
+
+
+def check_query_plans(conn, user_id: int, now: Optional[datetime] = None) -> List[Dict]:
+    """
+    EXPLAIN every route query shape for one user
+
+    Returns:
+        One {"name", "plan", "problems", "shape"} dict per shape
+    """
+    now = now or datetime.utcnow()
+    db = Session(bind=conn)
+    results = []
+    for shape in query_shapes():
+        plan, problems = explain(conn, shape.build(db, user_id, now))
+        results.append({"name": shape.name, "plan": plan, "problems": problems, "shape": shape})
+    return results
+
+
+def index_name(table: str, columns: Sequence[str]) -> str:
+    return f"ix_{table}_{'_'.join(columns)}"
+
+
+def existing_indexes(conn, table: str) -> List[Tuple[str, ...]]:
+    """Column lists of a table's indexes (unique ones included)"""
+    indexes = [tuple(ix["column_names"]) for ix in inspect(conn).get_indexes(table)]
+    primary = inspect(conn).get_pk_constraint(table).get("constrained_columns") or []
+    return indexes + ([tuple(primary)] if primary else [])
+
+
+def propose_indexes(conn, results: List[Dict]) -> List[Tuple[str, str, Tuple[str, ...]]]:
+    """
+    Composite indexes missing for the shapes that had problems
+
+    An index already serves a shape when its leading columns are the
+    shape's equality columns followed by its range/order column.
+
+    Returns:
+        Unique (name, table, columns) proposals
+    """
+    proposals = {}
+    for result in results:
+        if not result["problems"]:
+            continue
+        shape = result["shape"]
+        covered = any(columns[:len(shape.index)] == shape.index for columns in existing_indexes(conn, shape.table))
+        if not covered:
+            name = index_name(shape.table, shape.index)
+            proposals[name] = (name, shape.table, shape.index)
+    return list(proposals.values())
+
+
+def create_indexes(conn, proposals: List[Tuple[str, str, Tuple[str, ...]]]) -> None:
+    """Create proposed indexes (CONCURRENTLY is not used: run during a quiet period on PostgreSQL)"""
+    for name, table, columns in proposals:
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({quoted})"))
+
+
+def analyze_tables(conn) -> None:
+    """Refresh planner statistics so plans reflect the real data volume"""
+    conn.execute(text("ANALYZE"))
@@ -0,0 +1,210 @@
+"""
+Per-user rate limiting and inference admission control
+Token buckets per user plus a global limit on queued inference work
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Tuple
+
+from fastapi import Depends, HTTPException, status
+
+from models.database import User
+from utils.auth import get_current_user
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryRateLimiter:
+    """In-process token buckets keyed by user"""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        """
+        Initialize rate limiter
+
+        Args:
+            rate_per_second: Tokens refilled per second
+            burst: Bucket capacity (requests allowed back-to-back)
+        """
+        self.rate = rate_per_second
+        self.burst = burst
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> Tuple[bool, float]:
+        """
+        Take one token from the key's bucket
+
+        Returns:
+            (allowed, seconds until a token is available)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (float(self.burst), now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True, 0.0
+            self._buckets[key] = (tokens, now)
+            return False, (1 - tokens) / self.rate
+
+
+class RedisRateLimiter:
+    """Token buckets shared across nodes, updated atomically by a Lua script"""
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + (now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, client, rate_per_second: float, burst: int, prefix: str = "ratelimit"):
+        self.client = client
+        self.rate = rate_per_second
+        self.burst = burst
+        self.prefix = prefix
+        self._script = client.register_script(self.SCRIPT)
+
+    def acquire(self, key: str) -> Tuple[bool, float]:
+        allowed, tokens = self._script(keys=[f"{self.prefix}:{key}"], args=[self.rate, self.burst, time.time()])
+        if int(allowed):
+            return True, 0.0
+        return False, (1 - float(tokens)) / self.rate
+
+
+class AdmissionController:
+    """
+    Bounds concurrent and queued inference
+
+    Up to `max_concurrency` callers run inference at once and up to
+    `max_queue` more may wait; anything beyond that is shed with 503.
+    Slots are taken in worker threads around the classifier call only,
+    so request-path work (fetching, coalescing, database) never holds one.
+    """
+
+    def __init__(self, max_concurrency: int = 2, max_queue: int = 16):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._active = 0
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self._semaphore = threading.Semaphore(max_concurrency)
+        # Exponentially weighted average inference time, used for Retry-After
+        self.avg_latency = 0.5
+
+    @property
+    def depth(self) -> int:
+        return self._active + self._waiting
+
+    def expected_wait(self) -> float:
+        """Seconds a request arriving now is expected to spend queued and running"""
+        return (self.depth + 1) * self.avg_latency / self.max_concurrency
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new request would be shed"""
+        return self._waiting >= self.max_queue
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog is expected to drain"""
+        return max(1, math.ceil(self.depth * self.avg_latency / self.max_concurrency))
+
+    @contextmanager
+    def slot(self, shed: bool = True):
+        """
+        Hold an inference slot for the duration of the block (blocks the calling thread)
+
+        Args:
+            shed: Raise 503 instead of queueing when the queue is full;
+                background jobs pass False and always wait their turn
+        """
+        with self._lock:
+            if shed and self.saturated:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Inference queue is full, please retry later",
+                    headers={"Retry-After": str(self.retry_after())}
+                )
+            self._waiting += 1
+        try:
+            self._semaphore.acquire()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        with self._lock:
+            self._active += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+                self.avg_latency = 0.8 * self.avg_latency + 0.2 * (time.monotonic() - started)
+            self._semaphore.release()
+
+    def run(self, fn: Callable[..., Any], *args, shed: bool = True, **kwargs) -> Any:
+        """Call fn while holding a slot (for run_in_threadpool and job workers)"""
+        with self.slot(shed=shed):
+            return fn(*args, **kwargs)
+
+
+# Global limiter and admission controller instances
+_rate_limiter = None
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("INFERENCE_MAX_CONCURRENCY", 2)),
+    max_queue=int(os.getenv("INFERENCE_MAX_QUEUE", 16))
+)
+
+
+def get_rate_limiter():
+    """Get or create the rate limiter (Redis when available, else in-memory)"""
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        from utils.redis_client import get_redis_client
+
+        rate = float(os.getenv("RATE_LIMIT_PER_MINUTE", 30)) / 60.0
+        burst = int(os.getenv("RATE_LIMIT_BURST", 10))
+        client = get_redis_client()
+        _rate_limiter = RedisRateLimiter(client, rate, burst) if client is not None else MemoryRateLimiter(rate, burst)
+
+    return _rate_limiter
+
+
+async def rate_limited_user(current_user: User = Depends(get_current_user)) -> User:
+    """
+    FastAPI dependency: authenticated user, limited to a token bucket per user
+
+    Raises 429 with Retry-After once the user's bucket is empty.
+    """
+    try:
+        allowed, retry_after = get_rate_limiter().acquire(str(current_user.id))
+    except Exception as e:
+        # Fail open: a broken limiter backend must not take the API down
+        logger.error(f"❌ Rate limiter error: {e}")
+        return current_user
+
+    if not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+    return current_user
@@ -0,0 +1,47 @@
+"""
+Optional Redis connection
+Shared client for features that can keep state in Redis on multi-node deployments
+"""
+
+import logging
+import os
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_checked = False
+_lock = threading.Lock()
+
+
+def get_redis_client() -> Optional["redis.Redis"]:  # noqa: F821
+    """
+    Get the shared Redis client, or None when Redis is not configured or unreachable
+
+    The connection is attempted once per process; callers fall back to
+    in-memory state when this returns None.
+    """
+    global _client, _checked
+
+    if _checked:
+        return _client
+
+    with _lock:
+        if _checked:
+            return _client
+
+        url = os.getenv("REDIS_URL")
+        if url:
+            try:
+                import redis
+
+                client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+                client.ping()
+                _client = client
+                logger.info("✅ Connected to Redis")
+            except Exception as e:
+                logger.warning(f"⚠️ Redis unavailable ({e}), using in-memory state")
+        _checked = True
+
+    return _client
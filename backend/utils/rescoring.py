@@ -0,0 +1,340 @@
+"""
+Background re-scoring
+Brings stored emotion scores up to the current model: lexicon-fallback rows and rows from older models
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from models.database import Analysis, AnalysisEmbedding, RescoreCheckpoint, User
+
+logger = logging.getLogger(__name__)
+
+# Rows read, classified and written per chunk (one transaction + checkpoint each)
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", 64))
+# Fraction of wall time the re-scorer may spend working; it sleeps the rest
+RESCORE_DUTY_CYCLE = min(max(float(os.getenv("RESCORE_DUTY_CYCLE", 0.25)), 0.01), 1.0)
+# Longest the re-scorer waits for live inference to drain before starting a chunk anyway
+RESCORE_MAX_YIELD_SECONDS = float(os.getenv("RESCORE_MAX_YIELD_SECONDS", 30))
+# A run whose checkpoint heartbeat is older than this is presumed dead and may be taken over
+RESCORE_LEASE_SECONDS = float(os.getenv("RESCORE_LEASE_SECONDS", 300))
+
+# Set when a fallback result is stored; cleared when a re-scoring job is queued
+_pending = threading.Event()
+# Set at shutdown; a running job stops after its current chunk (the checkpoint lets it resume)
+_stop = threading.Event()
+
+
+def mark_pending() -> None:
+    """Record that provisional rows are waiting for the model"""
+    _pending.set()
+
+
+def stop_rescoring() -> None:
+    """Ask a running re-scoring job to stop after the current chunk"""
+    _stop.set()
+
+
+def stale_filter(model_name: str, model_version: str):
+    """Rows whose scores did not come from this model version (or are provisional)"""
+    return or_(
+        Analysis.needs_rescore.is_(True),
+        Analysis.model_name.is_(None),
+        Analysis.model_name != model_name,
+        func.coalesce(Analysis.model_version, "") != model_version
+    )
+
+
+def _open_checkpoint(db, model_name: str, model_version: str) -> Optional[RescoreCheckpoint]:
+    return db.query(RescoreCheckpoint).filter(
+        RescoreCheckpoint.model_name == model_name,
+        RescoreCheckpoint.model_version == model_version,
+        RescoreCheckpoint.finished_at.is_(None)
+    ).first()
+
+
+def claim_checkpoint(db, model_name: str, model_version: str, owner: str) -> Optional[RescoreCheckpoint]:
+    """
+    Claim the unfinished checkpoint for this model version, creating it if needed
+
+    A unique index allows one unfinished checkpoint per model version, and
+    it is claimed with a conditional UPDATE. Only one process (on any host)
+    runs a model version at a time. A claim whose heartbeat (updated_at) is
+    older than RESCORE_LEASE_SECONDS is taken over.
+
+    Returns:
+        The claimed checkpoint, or None while another live run holds it
+    """
+    checkpoint = _open_checkpoint(db, model_name, model_version)
+    if checkpoint is None:
+        db.add(RescoreCheckpoint(
+            model_name=model_name, model_version=model_version, last_id=0, rescored=0, skipped=0,
+            owner=owner, updated_at=datetime.utcnow()
+        ))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another process created it first
+            db.rollback()
+        checkpoint = _open_checkpoint(db, model_name, model_version)
+        if checkpoint is not None and checkpoint.owner == owner:
+            return checkpoint
+        if checkpoint is None:
+            return None
+
+    now = datetime.utcnow()
+    claimed = db.execute(
+        update(RescoreCheckpoint).where(
+            RescoreCheckpoint.id == checkpoint.id,
+            RescoreCheckpoint.finished_at.is_(None),
+            or_(
+                RescoreCheckpoint.owner.is_(None),
+                RescoreCheckpoint.owner == owner,
+                RescoreCheckpoint.updated_at < now - timedelta(seconds=RESCORE_LEASE_SECONDS)
+            )
+        ).values(owner=owner, updated_at=now)
+    ).rowcount
+    db.commit()
+    if not claimed:
+        return None
+    db.refresh(checkpoint)
+    return checkpoint
+
+
+def _renew(db, checkpoint: RescoreCheckpoint, owner: str) -> bool:
+    """Extend the lease; False when another process has taken the run over"""
+    renewed = db.execute(
+        update(RescoreCheckpoint).where(
+            RescoreCheckpoint.id == checkpoint.id, RescoreCheckpoint.owner == owner
+        ).values(updated_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return bool(renewed)
+
+
+def _yield_to_live_traffic(busy_seconds: float) -> None:
+    """Sleep off the duty cycle, then wait for queued live inference to drain"""
+    from utils.ratelimit import admission
+
+    _stop.wait(busy_seconds * (1 - RESCORE_DUTY_CYCLE) / RESCORE_DUTY_CYCLE)
+    deadline = time.monotonic() + RESCORE_MAX_YIELD_SECONDS
+    while admission.depth > 0 and time.monotonic() < deadline and not _stop.is_set():
+        time.sleep(0.05)
+
+
+def rescore_chunk(db, classifier, rows, model: Dict[str, str]) -> int:
+    """
+    Re-score one chunk of (Analysis id, user_id, text, agent_mode, has_response, firebase_uid) rows
+
+    Texts are decrypted per user, classified in one batch and written
+    back with a single bulk UPDATE. Rows without text (URL analyses) are
+    stamped with the model so they are not walked again; rows that did
+    not decrypt (ENCRYPTION_KEY unset or wrong) are left untouched rather
+    than scoring their ciphertext.
+
+    Returns:
+        Number of rows re-scored
+    """
+    from routes.analyze import normalize_emotion_scores, get_dominant_emotion
+    from utils.agent_templates import render_batch
+    from utils.embeddings import index_analyses
+    from utils.encryption import FERNET_TOKEN_PREFIX, decrypt_thoughts
+    from utils.ratelimit import admission
+    from utils.sentences import classify_batch
+
+    texts = [row.encrypted_text for row in rows]
+    by_salt: Dict[str, List[int]] = {}
+    for position, row in enumerate(rows):
+        by_salt.setdefault(row.firebase_uid, []).append(position)
+    for salt, positions in by_salt.items():
+        for position, value in zip(positions, decrypt_thoughts(salt, [texts[p] for p in positions])):
+            texts[position] = value
+
+    undecrypted = {p for p, value in enumerate(texts) if value and value.startswith(FERNET_TOKEN_PREFIX)}
+    if undecrypted:
+        logger.warning(f"⚠️ Skipping {len(undecrypted)} analyses that could not be decrypted")
+    scorable = [p for p, value in enumerate(texts) if value and p not in undecrypted]
+    # Holds an inference slot like live requests, so admission sees (and bounds) the batch
+    raw_outputs = admission.run(classify_batch, classifier, [texts[p] for p in scorable], shed=False)
+
+    scored = {}
+    for position, raw in zip(scorable, raw_outputs):
+        scores = normalize_emotion_scores(raw)
+        scored[position] = (scores.model_dump(), get_dominant_emotion(scores)[0])
+    responses = dict(zip(scored, render_batch(
+        (rows[p].agent_mode, dominant, scores) for p, (scores, dominant) in scored.items()
+    )))
+
+    params = []
+    for position, row in enumerate(rows):
+        if position in undecrypted:
+            continue
+        values = {"id": row.id, "needs_rescore": False, **model}
+        if position in scored:
+            scores, dominant = scored[position]
+            values.update(emotion_scores=scores, dominant_emotion=dominant)
+            if row.has_response:
+                values["agent_response"] = responses[position]
+        params.append(values)
+
+    # Bulk UPDATE by primary key; rows differ in which columns change, so group by key set
+    groups: Dict[tuple, List[Dict]] = {}
+    for values in params:
+        groups.setdefault(tuple(sorted(values)), []).append(values)
+    for group in groups.values():
+        db.execute(update(Analysis), group)
+
+    # Embeddings from another model (or none, for fallback rows) are replaced
+    ids = [rows[p].id for p in scored]
+    if ids:
+        db.execute(delete(AnalysisEmbedding).where(AnalysisEmbedding.analysis_id.in_(ids)))
+    db.commit()
+
+    by_owner: Dict[int, List[int]] = {}
+    for position in scored:
+        by_owner.setdefault(rows[position].user_id, []).append(position)
+    for user_id, positions in by_owner.items():
+        try:
+            admission.run(
+                index_analyses, db, classifier, user_id,
+                [rows[p].id for p in positions], [texts[p] for p in positions], shed=False
+            )
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Could not embed re-scored analyses for user {user_id}: {e}")
+    return len(scored)
+
+
+def run_rescoring(
+    db,
+    classifier,
+    batch_size: int = RESCORE_BATCH_SIZE,
+    throttle: bool = True,
+    progress: Optional[Dict] = None
+) -> Dict[str, int]:
+    """
+    Re-score every analysis not scored by the current model version
+
+    Rows are streamed oldest first in keyset-paginated chunks. Each chunk
+    commits its updates together with a checkpoint, so a run stopped at
+    any point resumes where it left off. With throttle, the run works at
+    most RESCORE_DUTY_CYCLE of the time and waits for queued live
+    inference before every chunk, keeping request latency unaffected.
+
+    Returns:
+        Totals for this run: {"rescored", "skipped", "last_id"}
+    """
+    from utils.sentences import scoring_model
+
+    model = scoring_model(classifier)
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    checkpoint = claim_checkpoint(db, model["model_name"], model["model_version"], owner)
+    if checkpoint is None:
+        logger.info(f"🔁 Re-scoring for {model['model_name']} is already running elsewhere")
+        return {"rescored": 0, "skipped": 0, "last_id": 0}
+    try:
+        return _run_claimed(db, classifier, checkpoint, owner, model, batch_size, throttle, progress)
+    finally:
+        db.rollback()
+        db.execute(
+            update(RescoreCheckpoint).where(
+                RescoreCheckpoint.id == checkpoint.id, RescoreCheckpoint.owner == owner
+            ).values(owner=None)
+        )
+        db.commit()
+
+
+def _run_claimed(db, classifier, checkpoint, owner, model, batch_size, throttle, progress) -> Dict[str, int]:
+    from utils.versioning import bump_versions
+
+    stale = stale_filter(model["model_name"], model["model_version"])
+    totals = {"rescored": 0, "skipped": 0, "last_id": checkpoint.last_id}
+    if progress is not None:
+        progress["remaining"] = db.query(func.count(Analysis.id)).filter(stale, Analysis.id > checkpoint.last_id).scalar()
+        progress.update(totals)
+
+    while not _stop.is_set():
+        if not _renew(db, checkpoint, owner):
+            logger.warning("⚠️ Re-scoring lease lost to another process; stopping")
+            break
+        started = time.monotonic()
+        rows = db.query(
+            Analysis.id,
+            Analysis.user_id,
+            Analysis.encrypted_text,
+            Analysis.agent_mode,
+            Analysis.agent_response.isnot(None).label("has_response"),
+            User.firebase_uid
+        ).join(User, User.id == Analysis.user_id).filter(
+            stale, Analysis.id > checkpoint.last_id
+        ).order_by(Analysis.id).limit(batch_size).all()
+        if not rows:
+            checkpoint.finished_at = datetime.utcnow()
+            db.commit()
+            break
+
+        rescored = rescore_chunk(db, classifier, rows, model)
+        checkpoint.last_id = rows[-1].id
+        checkpoint.rescored += rescored
+        checkpoint.skipped += len(rows) - rescored
+        checkpoint.updated_at = datetime.utcnow()
+        db.commit()
+        # Core bulk updates bypass the session hooks that bump data versions
+        bump_versions({row.user_id for row in rows})
+
+        totals["rescored"] += rescored
+        totals["skipped"] += len(rows) - rescored
+        totals["last_id"] = checkpoint.last_id
+        if progress is not None:
+            progress.update(totals)
+            progress["remaining"] = max(progress["remaining"] - len(rows), 0)
+
+        if throttle:
+            _yield_to_live_traffic(time.monotonic() - started)
+
+    return totals
+
+
+def _rescore_job(job, classifier) -> Dict[str, int]:
+    """Background worker: re-score stale analyses at low priority"""
+    from models.connection import SessionLocal
+
+    job.progress = {}
+    db = SessionLocal()
+    try:
+        totals = run_rescoring(db, classifier, progress=job.progress)
+        if totals["rescored"]:
+            logger.info(f"🔁 Re-scored {totals['rescored']} analyses with the current model")
+        return totals
+    finally:
+        db.close()
+
+
+def schedule_rescoring(classifier, force: bool = False) -> None:
+    """
+    Queue a re-scoring job
+
+    Cheap to call on every model-scored request: only the first call after
+    a fallback (or a forced call, e.g. at startup after a model upgrade)
+    queues a job, and the job queue collapses concurrent submissions onto
+    the running one.
+    """
+    from utils.jobs import get_job_queue
+
+    if not force and not _pending.is_set():
+        return
+    _pending.clear()
+    _stop.clear()
+    try:
+        get_job_queue().submit(_rescore_job, classifier, key="rescore")
+    except Exception as e:
+        logger.error(f"❌ Could not queue re-scoring: {e}")
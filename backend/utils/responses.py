@@ -0,0 +1,58 @@
+"""
+Fast JSON response classes
+orjson-backed rendering with a stdlib fallback when orjson is not installed
+"""
+
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Fallback encoder for types the stdlib json module does not know"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson
+
+    Registered as the app-wide default response class. Routes that build
+    plain dicts/lists (datetimes and enums included) can return it directly
+    to skip FastAPI's jsonable_encoder pass entirely.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> Response:
+    """
+    Pre-serialized response for an already-validated Pydantic model
+
+    Returning a Response bypasses response_model re-validation; the model
+    is dumped straight to JSON bytes by pydantic-core.
+    """
+    return Response(content=model.model_dump_json(), status_code=status_code, media_type="application/json")
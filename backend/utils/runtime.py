@@ -0,0 +1,189 @@
+"""
+Inference runtime configuration
+Per-worker PyTorch thread counts and optional CPU pinning to avoid oversubscription
+"""
+
+import json
+import logging
+import os
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "runtime_config.json")
+
+# Lock file handle that keeps this process's worker slot claimed
+_slot_handle = None
+_slot_index = None
+_runtime_config: Optional[dict] = None
+
+
+def available_cpus() -> List[int]:
+    """CPUs this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cpu_list(spec: str) -> List[int]:
+    """Parse a CPU list such as "0-3,8,10-11" """
+    cpus = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def load_runtime_config(path: Optional[str] = None) -> dict:
+    """
+    Resolve the runtime configuration
+
+    Values come from the tuned config file (RUNTIME_CONFIG, default
+    backend/runtime_config.json written by benchmarks/tune_threads.py),
+    overridden by environment variables. Unset thread counts default to
+    an even split of the available CPUs across workers.
+    """
+    config = {}
+    path = path or os.getenv("RUNTIME_CONFIG", DEFAULT_CONFIG_PATH)
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable runtime config {path}: {e}")
+
+    env_overrides = {
+        "workers": "WEB_CONCURRENCY",
+        "intra_op_threads": "TORCH_INTRA_OP_THREADS",
+        "inter_op_threads": "TORCH_INTER_OP_THREADS",
+        "batch_size": "INFERENCE_BATCH_SIZE",
+    }
+    for key, env in env_overrides.items():
+        if os.getenv(env):
+            config[key] = int(os.getenv(env))
+    if os.getenv("CPU_AFFINITY"):
+        config["cpu_affinity"] = os.getenv("CPU_AFFINITY")
+
+    workers = max(int(config.get("workers", 1)), 1)
+    config["workers"] = workers
+    config.setdefault("intra_op_threads", max(len(available_cpus()) // workers, 1))
+    config.setdefault("inter_op_threads", 1)
+    config.setdefault("batch_size", 32)
+    config.setdefault("cpu_affinity", None)
+    return config
+
+
+def get_runtime_config() -> dict:
+    """Get the resolved runtime config (loaded once per process)"""
+    global _runtime_config
+
+    if _runtime_config is None:
+        _runtime_config = load_runtime_config()
+
+    return _runtime_config
+
+
+def inference_batch_size() -> int:
+    """Batch size for pipeline calls over many texts"""
+    return int(get_runtime_config()["batch_size"])
+
+
+def claim_worker_slot(workers: int) -> int:
+    """
+    Claim a worker index in [0, workers) using lock files
+
+    Uvicorn does not tell workers their index, so each process grabs the
+    first free slot lock; the lock is released when the process exits.
+    Repeated calls return the slot already held. Falls back to the PID
+    when file locking is unavailable.
+    """
+    global _slot_handle, _slot_index
+
+    if _slot_index is not None:
+        return _slot_index
+
+    try:
+        import fcntl
+    except ImportError:
+        _slot_index = os.getpid() % workers
+        return _slot_index
+
+    lock_dir = os.getenv("WORKER_SLOT_DIR", "/tmp")
+    _slot_index = os.getpid() % workers
+    for index in range(workers):
+        handle = open(os.path.join(lock_dir, f"emotion-api-worker-{index}.lock"), "w")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            _slot_handle = handle
+            _slot_index = index
+            break
+        except OSError:
+            handle.close()
+    return _slot_index
+
+
+def is_primary_worker() -> bool:
+    """True in exactly one worker per host (slot 0), for once-per-deployment startup work"""
+    workers = get_runtime_config()["workers"]
+    return workers == 1 or claim_worker_slot(workers) == 0
+
+
+def affinity_cpus(config: dict) -> Optional[List[int]]:
+    """CPUs this worker should be pinned to, or None to leave affinity alone"""
+    spec = config.get("cpu_affinity")
+    if not spec:
+        return None
+    if spec != "auto":
+        return parse_cpu_list(spec)
+
+    cpus = available_cpus()
+    workers = config["workers"]
+    per_worker = max(len(cpus) // workers, 1)
+    index = claim_worker_slot(workers)
+    start = (index * per_worker) % len(cpus)
+    return cpus[start:start + per_worker]
+
+
+def configure_inference_runtime(config: Optional[dict] = None) -> dict:
+    """
+    Apply thread counts and CPU affinity for this worker
+
+    Must run before the model is loaded (inter-op threads can only be
+    set before PyTorch starts any parallel work).
+
+    Returns:
+        The settings that were applied
+    """
+    import torch
+
+    config = config or get_runtime_config()
+    applied = {"workers": config["workers"], "batch_size": config["batch_size"]}
+
+    cpus = affinity_cpus(config)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+            applied["cpus"] = cpus
+        except OSError as e:
+            logger.warning(f"⚠️ Could not set CPU affinity {cpus}: {e}")
+
+    intra = int(config["intra_op_threads"])
+    if cpus:
+        intra = min(intra, len(cpus))
+    torch.set_num_threads(intra)
+    applied["intra_op_threads"] = intra
+
+    try:
+        torch.set_num_interop_threads(int(config["inter_op_threads"]))
+        applied["inter_op_threads"] = int(config["inter_op_threads"])
+    except RuntimeError:
+        # Already initialized in this process (e.g. on reload)
+        applied["inter_op_threads"] = torch.get_num_interop_threads()
+
+    return applied
@@ -122,3 +122,41 @@ def extract_metadata(url: str) -> dict:
     except Exception as e:
         logger.error(f"Metadata extraction error: {e}")
         return {}
+
+
+# Query parameters that only track campaigns and never change page content
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for deduplication
+    
+    Lowercases scheme and host, drops default ports, fragments and
+    tracking parameters (utm_*, fbclid, ...), and sorts the query string.
+    
+    Args:
+        url: URL as submitted
+        
+    Returns:
+        Normalized URL
+    """
+    from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+    
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
@@ -0,0 +1,217 @@
+"""
+Sentence-level scoring utilities
+Splits text into sentences and caches per-sentence emotion scores
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Sentence boundaries: terminal punctuation followed by whitespace, or line breaks
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n+')
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences
+
+    Args:
+        text: Raw journal text
+
+    Returns:
+        List of non-empty, whitespace-normalized sentences
+    """
+    if not text:
+        return []
+
+    sentences = []
+    for chunk in _SENTENCE_BOUNDARY.split(text):
+        sentence = ' '.join(chunk.split())
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def sentence_key(sentence: str, model_name: str = "") -> str:
+    """Stable cache key for a sentence scored by a given model"""
+    digest = hashlib.sha1(f"{model_name}\x00{sentence}".encode('utf-8')).hexdigest()
+    return digest
+
+
+def classifier_name(classifier) -> str:
+    """Best-effort model identifier for a Hugging Face pipeline"""
+    model = getattr(classifier, "model", None)
+    return getattr(model, "name_or_path", "") or ""
+
+
+def classifier_version(classifier) -> str:
+    """
+    Model revision for a Hugging Face pipeline
+
+    HF_MODEL_VERSION wins when set (e.g. for local checkpoints); otherwise
+    the Hub commit hash the weights were loaded from, if known.
+    """
+    override = os.getenv("HF_MODEL_VERSION")
+    if override:
+        return override
+    config = getattr(getattr(classifier, "model", None), "config", None)
+    return getattr(config, "_commit_hash", None) or ""
+
+
+def scoring_model(classifier) -> Dict[str, str]:
+    """model_name / model_version column values for rows scored by a classifier"""
+    return {"model_name": classifier_name(classifier), "model_version": classifier_version(classifier)}
+
+
+class SentenceScoreCache:
+    """Thread-safe LRU cache of normalized emotion scores keyed by sentence hash"""
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize sentence cache
+
+        Args:
+            max_entries: Maximum number of sentences kept before LRU eviction
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, float]]:
+        """Return cached scores and mark the entry as recently used"""
+        with self._lock:
+            scores = self._entries.get(key)
+            if scores is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return scores
+
+    def put(self, key: str, scores: Dict[str, float]) -> None:
+        """Store scores, evicting the least recently used entries if full"""
+        with self._lock:
+            self._entries[key] = scores
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def classify_batch(classifier, texts: List[str], batch_size: Optional[int] = None) -> List[List[Dict]]:
+    """
+    Run the classifier once over a batch of texts
+
+    Args:
+        classifier: Hugging Face text-classification pipeline (top_k=None)
+        texts: Texts to classify
+        batch_size: Texts per forward pass (defaults to the runtime config)
+
+    Returns:
+        One list of {label, score} dicts per input text
+    """
+    if not texts:
+        return []
+
+    if batch_size is None:
+        from utils.runtime import inference_batch_size
+        batch_size = inference_batch_size()
+
+    outputs = classifier(texts, truncation=True, batch_size=min(batch_size, len(texts)))
+
+    # Single-input calls may come back un-nested depending on pipeline version
+    if outputs and isinstance(outputs[0], dict):
+        outputs = [outputs]
+    return outputs
+
+
+def score_sentences(
+    classifier,
+    sentences: List[str],
+    cache: Optional[SentenceScoreCache] = None
+) -> tuple[List[Dict[str, float]], int]:
+    """
+    Score sentences, reusing cached results and batching the misses
+
+    Args:
+        classifier: Hugging Face text-classification pipeline
+        sentences: Sentences to score
+        cache: Sentence cache (a throwaway cache is used if None)
+
+    Returns:
+        Tuple of (normalized 8-emotion scores per sentence, number of sentences run through the model)
+    """
+    from routes.analyze import normalize_emotion_scores
+
+    if cache is None:
+        cache = SentenceScoreCache(max_entries=max(len(sentences), 1))
+
+    model_name = classifier_name(classifier)
+    keys = [sentence_key(s, model_name) for s in sentences]
+    results: List[Optional[Dict[str, float]]] = [cache.get(k) for k in keys]
+
+    # Deduplicate misses so repeated sentences are only scored once
+    pending: Dict[str, str] = {}
+    for key, sentence, scores in zip(keys, sentences, results):
+        if scores is None and key not in pending:
+            pending[key] = sentence
+
+    if pending:
+        raw_outputs = classify_batch(classifier, list(pending.values()))
+        # Filled from the fresh scores, not the cache: it may already have evicted them
+        fresh: Dict[str, Dict[str, float]] = {}
+        for key, raw in zip(pending.keys(), raw_outputs):
+            fresh[key] = normalize_emotion_scores(raw).model_dump()
+            cache.put(key, fresh[key])
+
+        results = [scores if scores is not None else fresh[key] for key, scores in zip(keys, results)]
+
+    return results, len(pending)
+
+
+def aggregate_scores(sentences: List[str], scores: List[Dict[str, float]]) -> Dict[str, float]:
+    """
+    Combine per-sentence scores into a document-level vector
+
+    Sentences are weighted by their length so short interjections
+    do not outweigh the body of the entry.
+    """
+    if not scores:
+        return {}
+
+    weights = [max(len(s), 1) for s in sentences]
+    total = float(sum(weights))
+    aggregated = {emotion: 0.0 for emotion in scores[0]}
+    for weight, sentence_scores in zip(weights, scores):
+        for emotion, value in sentence_scores.items():
+            aggregated[emotion] += value * weight / total
+    return aggregated
+
+
+# Global sentence cache instance
+_sentence_cache: Optional[SentenceScoreCache] = None
+
+
+def get_sentence_cache() -> SentenceScoreCache:
+    """Get or create global sentence score cache"""
+    global _sentence_cache
+
+    if _sentence_cache is None:
+        _sentence_cache = SentenceScoreCache(
+            max_entries=int(os.getenv("SENTENCE_CACHE_SIZE", 10000))
+        )
+
+    return _sentence_cache
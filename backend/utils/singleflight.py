@@ -0,0 +1,78 @@
+"""
+Single-flight request coalescing
+Concurrent callers asking for the same key share one execution of the work
+"""
+
+import hashlib
+import threading
+from typing import Any, Callable, Dict
+
+
+class _Call:
+    """An in-flight execution that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key (thread-safe)"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key
+
+        The first caller (leader) executes fn; callers arriving while it
+        runs block and receive the same result, or the same exception.
+        Nothing is cached once the call completes.
+
+        Args:
+            key: Coalescing key (e.g. normalized URL or text hash)
+            fn: Work to execute
+
+        Returns:
+            The shared result of fn
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def in_flight(self) -> int:
+        """Number of keys currently executing"""
+        with self._lock:
+            return len(self._calls)
+
+
+def text_fingerprint(text: str) -> str:
+    """Hash of text used as a coalescing key"""
+    return hashlib.sha256(text.strip().encode('utf-8')).hexdigest()
@@ -0,0 +1,241 @@
+"""
+Per-user data versions, ETags and versioned result caching
+A user's version is bumped whenever one of their Analysis or MoodLog rows is written
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Set when the API runs as one process (no --workers, WEB_CONCURRENCY unset or 1), so process-local
+# versions can back ETags and the result cache without Redis. Off by default: the worker count
+# uvicorn was started with is not visible to the app.
+DATA_VERSIONS_SINGLE_PROCESS = os.getenv("DATA_VERSIONS_SINGLE_PROCESS", "false").lower() == "true"
+
+
+class MemoryVersionStore:
+    """Process-local version counters (only consistent with a single worker)"""
+
+    shared = False
+
+    def __init__(self):
+        # Random epoch so ETags issued before a restart (or by another worker) never match
+        self.epoch = uuid.uuid4().hex[:8]
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    def bump(self, user_id: int) -> int:
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            return self._versions[user_id]
+
+
+class RedisVersionStore:
+    """
+    Version counters shared by every worker through Redis
+
+    The epoch is a random value kept next to the counters. A flush or an
+    unpersisted restart drops both, so the counters start over under a new
+    epoch and ETags issued before never match.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix: str = "data_version"):
+        self.client = client
+        self.prefix = prefix
+        self.epoch = self._current_epoch()
+
+    def _current_epoch(self) -> str:
+        key = f"{self.prefix}:epoch"
+        # The first worker to find the epoch missing picks it; the others read the winner's
+        self.client.setnx(key, uuid.uuid4().hex[:8])
+        value = self.client.get(key)
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    def get(self, user_id: int) -> int:
+        epoch, value = self.client.mget(f"{self.prefix}:epoch", f"{self.prefix}:{user_id}")
+        if epoch is None:
+            self.epoch = self._current_epoch()
+            return 0
+        self.epoch = epoch.decode() if isinstance(epoch, bytes) else str(epoch)
+        return int(value) if value else 0
+
+    def bump(self, user_id: int) -> int:
+        return int(self.client.incr(f"{self.prefix}:{user_id}"))
+
+
+class ResultCache:
+    """LRU cache of rendered response bodies keyed by (user, version, scope, params)"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: tuple, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Global store and cache instances
+_version_store = None
+result_cache = ResultCache(max_entries=int(os.getenv("RESULT_CACHE_SIZE", 2048)))
+
+
+def get_version_store():
+    """Get or create the version store (Redis when available, else in-memory)"""
+    global _version_store
+
+    if _version_store is None:
+        from utils.redis_client import get_redis_client
+
+        client = get_redis_client()
+        _version_store = RedisVersionStore(client) if client is not None else MemoryVersionStore()
+
+    return _version_store
+
+
+def versions_are_shared() -> bool:
+    """
+    True when every worker sees the same data versions
+
+    With process-local counters and several workers, a write handled by
+    one worker never reaches the others, so versions must not be trusted
+    for ETags or cached results there. Without Redis they are trusted only
+    when DATA_VERSIONS_SINGLE_PROCESS says there are no other workers.
+    """
+    return get_version_store().shared or DATA_VERSIONS_SINGLE_PROCESS
+
+
+def bump_versions(user_ids: Iterable[int]) -> None:
+    """Invalidate cached reads for the given users and pin their reads to the primary"""
+    from models.connection import mark_written
+
+    user_ids = set(user_ids)
+    mark_written(user_ids)
+    store = get_version_store()
+    for user_id in user_ids:
+        if user_id is not None:
+            store.bump(user_id)
+
+
+def make_etag(user_id: int, scope: str, params: Dict[str, Any], version: Optional[int] = None) -> str:
+    """Weak ETag derived from the user's data version and the request shape"""
+    store = get_version_store()
+    if version is None:
+        version = store.get(user_id)
+    shape = hashlib.sha1(json.dumps([scope, params], sort_keys=True, default=str).encode()).hexdigest()[:12]
+    return f'W/"{store.epoch}-{user_id}-{version}-{shape}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+
+def versioned_json_response(
+    request: Request,
+    user_id: int,
+    scope: str,
+    params: Dict[str, Any],
+    build: Callable[[], Any]
+) -> Response:
+    """
+    Serve a read endpoint with ETag revalidation and a versioned result cache
+
+    If the client's If-None-Match matches the current version, a 304 is
+    returned without running `build` (no queries). Otherwise the rendered
+    body is served from the cache for this (user, version, scope, params),
+    building it on a miss. Without versions shared across workers the
+    body is built on every request and no ETag is issued.
+    """
+    from utils.responses import dumps
+
+    try:
+        if not versions_are_shared():
+            return Response(
+                content=dumps(build()), media_type="application/json", headers={"Cache-Control": "private, no-cache"}
+            )
+        version = get_version_store().get(user_id)
+    except Exception as e:
+        # Version backend unavailable: serve uncached rather than fail the read
+        logger.error(f"❌ Data version lookup failed: {e}")
+        return Response(content=dumps(build()), media_type="application/json")
+
+    etag = make_etag(user_id, scope, params, version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    key = (get_version_store().epoch, user_id, version, scope, json.dumps(params, sort_keys=True, default=str))
+    body = result_cache.get(key)
+    if body is None:
+        body = dumps(build())
+        result_cache.put(key, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def install_session_hooks(session_factory) -> None:
+    """
+    Bump data versions automatically when sessions commit Analysis/MoodLog writes
+
+    Core bulk statements (e.g. insert(Analysis) executemany) bypass the
+    unit of work and must call bump_versions() themselves.
+    """
+    from models.database import Analysis, MoodLog
+
+    tracked = (Analysis, MoodLog)
+
+    @event.listens_for(session_factory, "after_flush")
+    def _collect(session, flush_context):
+        users = session.info.setdefault("written_user_ids", set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, tracked):
+                users.add(obj.user_id)
+
+    @event.listens_for(session_factory, "after_commit")
+    def _bump(session):
+        users = session.info.pop("written_user_ids", None)
+        if users:
+            try:
+                bump_versions(users)
+            except Exception as e:
+                logger.error(f"❌ Data version bump failed: {e}")
+
+    @event.listens_for(session_factory, "after_rollback")
+    def _discard(session):
+        session.info.pop("written_user_ids", None)